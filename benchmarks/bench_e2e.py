@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Offline end-to-end benchmark of the conversation and AI Task entities.
+
+Runs turns against the fake ModelScope server (benchmarks/fake_modelscope.py)
+on a test Home Assistant instance with a synthetic home, and reports
+throughput, p50/p99 latency and allocations per scenario and home size.
+No API key or network access is needed.
+
+Example:
+    python benchmarks/bench_e2e.py --entities 100 1000 10000 --turns 200
+
+With --chaos, faults from a profile (see custom_components/.../chaos.py and
+benchmarks/chaos/) are injected into the client, to see how retries,
+hedging (--fallback-model), the circuit breaker and timeouts hold up.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+from fake_modelscope import (
+    FakeModelScopeServer,
+    add_server_arguments,
+    server_config_from_args,
+)
+from harness import (
+    BenchIntegration,
+    SyntheticHome,
+    async_create_hass,
+    async_setup_integration,
+    async_teardown_integration,
+    populate_home,
+    use_fake_api,
+)
+
+from homeassistant.components import conversation
+from homeassistant.core import Context, HomeAssistant
+from homeassistant.helpers.chat_session import async_get_chat_session
+
+from yanfeng_ai_task.chaos import ChaosInjector, ChaosProfile, load_profile
+from yanfeng_ai_task.const import CONF_FALLBACK_CHAT_MODEL
+
+SCENARIOS = ("layer1", "llm", "tools", "ai_task", "image")
+
+# Only allocations made by the integration count towards "KiB/turn"
+INTEGRATION_PATH = "yanfeng_ai_task"
+
+
+@dataclass
+class ScenarioResult:
+    """Measurements of one scenario at one home size."""
+
+    entities: int
+    scenario: str
+    turns: int
+    errors: int
+    turns_per_second: float
+    p50_ms: float
+    p99_ms: float
+    peak_kib: float | None = None
+    retained_kib_per_turn: float | None = None
+    top_allocation: str | None = None
+    injected: dict[str, int] | None = None
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """Return a percentile of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def make_turn(
+    hass: HomeAssistant,
+    integration: BenchIntegration,
+    home: SyntheticHome,
+    scenario: str,
+) -> Callable[[int], Awaitable[Any]]:
+    """Return a coroutine function running turn i of a scenario."""
+    lights = home.by_domain("light")
+
+    async def converse(text: str) -> Any:
+        user_input = conversation.ConversationInput(
+            text=text,
+            context=Context(),
+            conversation_id=None,
+            device_id=None,
+            language="zh-Hans",
+            agent_id=integration.conversation.entity_id,
+        )
+        result = await integration.conversation.async_process(user_input)
+        if result.response.response_type.value == "error":
+            raise RuntimeError(result.response.speech["plain"]["speech"])
+        return result
+
+    async def layer1(i: int) -> Any:
+        action = "打开" if i % 2 else "关闭"
+        return await converse(f"{action}{lights[i % len(lights)].name}")
+
+    async def llm(i: int) -> Any:
+        return await converse("给我讲个笑话")
+
+    async def tools(i: int) -> Any:
+        return await converse("总结一下家里的情况")
+
+    async def ai_task(i: int) -> Any:
+        from homeassistant.components import ai_task as ha_ai_task
+
+        instructions = "写一句欢迎回家的话"
+        with (
+            async_get_chat_session(hass) as session,
+            conversation.async_get_chat_log(hass, session) as chat_log,
+        ):
+            chat_log.async_add_user_content(conversation.UserContent(instructions))
+            return await integration.ai_task._async_generate_data(  # noqa: SLF001
+                ha_ai_task.GenDataTask(name="bench", instructions=instructions),
+                chat_log,
+            )
+
+    async def image(i: int) -> Any:
+        from homeassistant.components import ai_task as ha_ai_task
+
+        instructions = "画一只在窗台上晒太阳的猫"
+        with (
+            async_get_chat_session(hass) as session,
+            conversation.async_get_chat_log(hass, session) as chat_log,
+        ):
+            chat_log.async_add_user_content(conversation.UserContent(instructions))
+            return await integration.ai_task._async_generate_image(  # noqa: SLF001
+                ha_ai_task.GenImageTask(name="bench", instructions=instructions),
+                chat_log,
+            )
+
+    return {"layer1": layer1, "llm": llm, "tools": tools, "ai_task": ai_task, "image": image}[
+        scenario
+    ]
+
+
+async def run_turns(
+    turn: Callable[[int], Awaitable[Any]], count: int, concurrency: int
+) -> tuple[list[float], int, float]:
+    """Run count turns, at most concurrency at a time.
+
+    Returns the latencies in seconds, the number of errors and the wall time.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await turn(i)
+            except Exception as err:  # noqa: BLE001
+                errors += 1
+                if errors == 1:
+                    print(f"   ⚠️  first error: {type(err).__name__}: {err}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def measure_allocations(
+    turn: Callable[[int], Awaitable[Any]], count: int
+) -> tuple[float, float, str | None]:
+    """Run count turns under tracemalloc.
+
+    Returns the peak traced memory in KiB, the integration's retained KiB
+    per turn and its top allocation site.
+    """
+    tracemalloc.start(10)
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        for i in range(count):
+            try:
+                await turn(i)
+            except Exception:  # noqa: BLE001
+                pass
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    integration_filter = [tracemalloc.Filter(True, f"*{INTEGRATION_PATH}*")]
+    stats = after.filter_traces(integration_filter).compare_to(
+        before.filter_traces(integration_filter), "lineno"
+    )
+    retained = sum(stat.size_diff for stat in stats)
+    top = max(stats, key=lambda stat: stat.size_diff, default=None)
+    top_site = (
+        f"{top.traceback[0].filename.rsplit('/', 1)[-1]}:{top.traceback[0].lineno}"
+        if top is not None and top.size_diff > 0
+        else None
+    )
+    return peak / 1024, retained / 1024 / max(1, count), top_site
+
+
+async def bench_home_size(
+    args: argparse.Namespace,
+    server: FakeModelScopeServer,
+    entities: int,
+    chaos_profile: ChaosProfile | None,
+) -> list[ScenarioResult]:
+    """Run all scenarios on a home of the given size."""
+    results: list[ScenarioResult] = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+        home = populate_home(hass, entities, seed=args.seed or 0)
+        index_start = time.perf_counter()
+        integration = await async_setup_integration(
+            hass,
+            {CONF_FALLBACK_CHAT_MODEL: args.fallback_model} if args.fallback_model else None,
+        )
+        runtime_data = integration.entry.runtime_data
+        print(
+            f"\n🏠 {len(home.entities)} entities "
+            f"(setup + name index {time.perf_counter() - index_start:.2f}s)"
+        )
+        try:
+            for scenario in args.scenarios:
+                turn = make_turn(hass, integration, home, scenario)
+                turns = args.turns if scenario != "image" else max(1, args.turns // 10)
+                # Warm up caches and connections before measuring
+                await run_turns(turn, min(5, turns), 1)
+                # Faults only during the measured turns, drawn the same way each time
+                if chaos_profile is not None:
+                    runtime_data.chaos = ChaosInjector(chaos_profile)
+                latencies, errors, wall = await run_turns(turn, turns, args.concurrency)
+                result = ScenarioResult(
+                    entities=len(home.entities),
+                    scenario=scenario,
+                    turns=turns,
+                    errors=errors,
+                    turns_per_second=round(turns / wall, 1),
+                    p50_ms=round(statistics.median(latencies) * 1000, 1),
+                    p99_ms=round(percentile(latencies, 99) * 1000, 1),
+                )
+                if runtime_data.chaos is not None:
+                    result.injected = dict(runtime_data.chaos.injected)
+                    runtime_data.chaos = None
+                if args.allocation_turns:
+                    peak, retained, top = await measure_allocations(
+                        turn, args.allocation_turns
+                    )
+                    result.peak_kib = round(peak, 1)
+                    result.retained_kib_per_turn = round(retained, 2)
+                    result.top_allocation = top
+                results.append(result)
+                print_result(result)
+            if chaos_profile is not None:
+                print(f"   model health: {runtime_data.model_health.as_dict()}")
+        finally:
+            await async_teardown_integration(integration)
+            await hass.async_stop(force=True)
+    return results
+
+
+def print_result(result: ScenarioResult) -> None:
+    """Print one result row."""
+    allocations = (
+        f"{result.peak_kib:>9.1f} {result.retained_kib_per_turn:>9.2f}  {result.top_allocation or '-'}"
+        if result.peak_kib is not None
+        else ""
+    )
+    print(
+        f"   {result.scenario:<8} {result.turns:>6} {result.errors:>6} "
+        f"{result.turns_per_second:>8.1f} {result.p50_ms:>8.1f} {result.p99_ms:>8.1f} "
+        f"{allocations}"
+    )
+    if result.injected:
+        print(f"            injected: {result.injected}")
+
+
+async def main() -> int:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--turns", type=int, default=200, help="每个场景的轮数")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时进行的轮数")
+    parser.add_argument(
+        "--allocation-turns", type=int, default=20,
+        help="在 tracemalloc 下额外运行的轮数，0 表示不统计内存",
+    )
+    parser.add_argument("--json", help="把结果写入 JSON 文件，便于版本间比较")
+    parser.add_argument("--chaos", help="故障注入配置 JSON 文件，例如 benchmarks/chaos/429_storm.json")
+    parser.add_argument("--fallback-model", help="备用对话模型，用于观察对冲请求和熔断")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    chaos_profile = load_profile(args.chaos) if args.chaos else None
+
+    server = FakeModelScopeServer(server_config_from_args(args))
+    base_url = await server.start()
+    print(f"✅ Fake ModelScope API on {base_url} (latency {args.latency}s ± {args.jitter}s)")
+    print(
+        "   scenario  turns errors  turns/s   p50 ms   p99 ms  peak KiB  KiB/turn  top allocation"
+    )
+
+    results: list[ScenarioResult] = []
+    try:
+        with use_fake_api(base_url):
+            for entities in args.entities:
+                results.extend(await bench_home_size(args, server, entities, chaos_profile))
+    finally:
+        await server.stop()
+
+    print(f"\n📊 Fake server requests: {server.requests}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump([asdict(result) for result in results], file, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+    # Injected faults are meant to cause errors
+    return 1 if not args.chaos and any(result.errors for result in results) else 0
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding="utf-8")
+    sys.exit(asyncio.run(main()))
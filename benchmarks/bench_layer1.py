@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Layer 1 accuracy and latency benchmark on a labelled utterance corpus.
+
+Runs every utterance of benchmarks/layer1_corpus.json through the
+conversation entity, on homes made of the corpus entities plus N synthetic
+ones, and compares the service calls Layer 1 makes with the expected ones.
+The LLM is never called: reaching it counts as a fallback.
+
+Reports per category and home size:
+- hit rate             做了期望的调用 / 给出了回答 / 正确地交给 LLM
+- false-positive rate  控制了错误的实体或服务，回答了错误的内容，或抢了 LLM 的话
+- fallback rate        本该由第一层处理，却交给了 LLM
+- per-utterance latency p50 / p99
+
+No API key, network or running Home Assistant is needed, so it can run in CI:
+    python benchmarks/bench_layer1.py --entities 0 1000 --min-hit-rate 0.8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import asdict, dataclass, field
+import json
+import math
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any
+
+from harness import (
+    BenchIntegration,
+    SyntheticHome,
+    async_create_hass,
+    async_setup_integration,
+    async_teardown_integration,
+    populate_home,
+)
+
+from homeassistant.components import conversation
+from homeassistant.core import Context, HomeAssistant
+from homeassistant.helpers import area_registry as ar, entity_registry as er
+
+from yanfeng_ai_task.const import CONF_OPTIMISTIC_ACK, CONF_SPECULATIVE_LLM
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "layer1_corpus.json"
+
+HIT = "hit"
+FALSE_POSITIVE = "false_positive"
+FALLBACK = "fallback"
+# Layer 1 handled the utterance without calling anything or answering it
+MISS = "miss"
+
+
+# domain, service, entity_id, service data
+ExpectedCall = tuple[str, str, str, dict[str, Any]]
+
+
+class LLMFallback(Exception):
+    """Raised instead of calling the LLM."""
+
+
+@dataclass
+class Verdict:
+    """Outcome of one utterance."""
+
+    category: str
+    text: str
+    verdict: str
+    latency_ms: float
+    detail: str = ""
+
+
+@dataclass
+class CategoryResult:
+    """Aggregated verdicts of one category, or of all of them ("all")."""
+
+    entities: int
+    category: str
+    utterances: int
+    hit_rate: float
+    false_positive_rate: float
+    fallback_rate: float
+    p50_ms: float
+    p99_ms: float
+    failures: list[str] = field(default_factory=list)
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """Return a percentile of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def add_corpus_entities(hass: HomeAssistant, entities: list[dict[str, Any]]) -> None:
+    """Add the hand-named entities of the corpus, with their areas, to hass."""
+    area_registry = ar.async_get(hass)
+    entity_registry = er.async_get(hass)
+    for entity in entities:
+        domain, object_id = entity["entity_id"].split(".", 1)
+        area = area_registry.async_get_area_by_name(
+            entity["area"]
+        ) or area_registry.async_create(entity["area"])
+        registry_entry = entity_registry.async_get_or_create(
+            domain, "yanfeng_corpus", object_id, suggested_object_id=object_id
+        )
+        entity_registry.async_update_entity(registry_entry.entity_id, area_id=area.id)
+        hass.states.async_set(
+            registry_entry.entity_id,
+            entity["state"],
+            {"friendly_name": entity["name"], **entity.get("attributes", {})},
+        )
+
+
+def expand_calls(calls: list[tuple[str, str, dict[str, Any]]]) -> list[ExpectedCall]:
+    """Split service calls into one (domain, service, entity_id, data) per entity."""
+    expanded = []
+    for domain, service, data in calls:
+        entity_ids = data.get("entity_id", [])
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        rest = {key: value for key, value in data.items() if key != "entity_id"}
+        expanded.extend((domain, service, entity_id, rest) for entity_id in entity_ids)
+    return expanded
+
+
+def expected_calls(
+    hass: HomeAssistant, expect: list[dict[str, Any]], areas: dict[str, str]
+) -> tuple[list[ExpectedCall], list[ExpectedCall]]:
+    """Expand the expected calls, return the required and the allowed ones.
+
+    "area" means every entity of the domain in that area. Those already in
+    the "unless_state" state are allowed but not required, Layer 1 may skip
+    the redundant calls.
+    """
+    required: list[ExpectedCall] = []
+    allowed: list[ExpectedCall] = []
+    for call in expect:
+        if "entity_id" in call:
+            entity_ids = [call["entity_id"]]
+        else:
+            entity_ids = [
+                entity_id
+                for entity_id, area in areas.items()
+                if area == call["area"] and entity_id.startswith(f"{call['domain']}.")
+            ]
+        for entity_id in entity_ids:
+            expected = (call["domain"], call["service"], entity_id, call.get("data", {}))
+            allowed.append(expected)
+            state = hass.states.get(entity_id)
+            if state is None or state.state != call.get("unless_state"):
+                required.append(expected)
+    return required, allowed
+
+
+def data_matches(expected: dict[str, Any], actual: dict[str, Any]) -> bool:
+    """Return whether actual contains the expected service data."""
+    for key, value in expected.items():
+        if key not in actual:
+            return False
+        if isinstance(value, (int, float)) and isinstance(actual[key], (int, float)):
+            if not math.isclose(value, actual[key], abs_tol=0.01):
+                return False
+        elif value != actual[key]:
+            return False
+    return True
+
+
+def judge(
+    utterance: dict[str, Any],
+    expected: tuple[list[ExpectedCall], list[ExpectedCall]],
+    calls: list[tuple[str, str, dict[str, Any]]],
+    fell_back: bool,
+    speech: str,
+) -> tuple[str, str]:
+    """Return the verdict of an utterance and what went wrong, if anything."""
+    actual = expand_calls(calls)
+    called = ", ".join(f"{d}.{s}({e}, {data})" for d, s, e, data in actual)
+    expect = utterance["expect"]
+    required, allowed = expected
+
+    if expect == "llm":
+        if actual:
+            return FALSE_POSITIVE, f"called {called}"
+        if not fell_back:
+            return FALSE_POSITIVE, f"answered {speech!r}"
+        return HIT, ""
+
+    if expect == "answer":
+        if actual:
+            return FALSE_POSITIVE, f"called {called}"
+        if fell_back:
+            return FALLBACK, "sent to the LLM"
+        if (contains := utterance.get("answer_contains")) and contains not in speech:
+            return FALSE_POSITIVE, f"answered {speech!r}"
+        return HIT, ""
+
+    unexpected = [
+        call
+        for call in actual
+        if not any(
+            call[:3] == wanted[:3] and data_matches(wanted[3], call[3])
+            for wanted in allowed
+        )
+    ]
+    if unexpected:
+        return FALSE_POSITIVE, "called " + ", ".join(
+            f"{d}.{s}({e}, {data})" for d, s, e, data in unexpected
+        )
+    missing = [
+        wanted
+        for wanted in required
+        if not any(
+            call[:3] == wanted[:3] and data_matches(wanted[3], call[3])
+            for call in actual
+        )
+    ]
+    if not missing:
+        return HIT, ""
+    missing_text = ", ".join(f"{d}.{s}({e})" for d, s, e, _ in missing)
+    if fell_back:
+        return FALLBACK, f"sent to the LLM, missing {missing_text}"
+    return MISS, f"replied {speech!r}, missing {missing_text}"
+
+
+async def run_corpus(
+    hass: HomeAssistant,
+    integration: BenchIntegration,
+    home: SyntheticHome,
+    utterances: list[dict[str, Any]],
+    areas: dict[str, str],
+) -> list[Verdict]:
+    """Run every utterance once, conversations in order, and judge it."""
+    entity = integration.conversation
+    initial_states = {state.entity_id: state for state in hass.states.async_all()}
+    changed: set[str] = set()
+    conversation_ids: dict[str, str] = {}
+    verdicts = []
+
+    def restore() -> None:
+        for entity_id in changed:
+            state = initial_states[entity_id]
+            hass.states.async_set(entity_id, state.state, state.attributes)
+        changed.clear()
+
+    for utterance in utterances:
+        group = utterance.get("conversation")
+        if group not in conversation_ids:
+            # A new conversation starts from the initial states
+            restore()
+
+        home.calls.clear()
+        expected = (
+            expected_calls(hass, utterance["expect"], areas)
+            if isinstance(utterance["expect"], list)
+            else ([], [])
+        )
+        fell_back = False
+        speech = ""
+        user_input = conversation.ConversationInput(
+            text=utterance["text"],
+            context=Context(),
+            conversation_id=conversation_ids.get(group),
+            device_id=None,
+            language="zh-Hans",
+            agent_id=entity.entity_id,
+        )
+        start = time.perf_counter()
+        try:
+            result = await entity.async_process(user_input)
+        except LLMFallback:
+            fell_back = True
+        else:
+            speech = result.response.speech.get("plain", {}).get("speech", "")
+            if group is not None:
+                conversation_ids[group] = result.conversation_id
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        changed.update(entity_id for _, _, entity_id, _ in expand_calls(home.calls))
+        verdict, detail = judge(utterance, expected, home.calls, fell_back, speech)
+        verdicts.append(
+            Verdict(utterance["category"], utterance["text"], verdict, latency_ms, detail)
+        )
+
+    # Leave the home as it was for the next pass
+    restore()
+    return verdicts
+
+
+def aggregate(
+    entities: int, category: str, verdicts: list[Verdict], latencies: list[float]
+) -> CategoryResult:
+    """Aggregate the verdicts of one category."""
+    count = len(verdicts)
+    by_verdict = {
+        name: sum(verdict.verdict == name for verdict in verdicts)
+        for name in (HIT, FALSE_POSITIVE, FALLBACK)
+    }
+    return CategoryResult(
+        entities=entities,
+        category=category,
+        utterances=count,
+        hit_rate=round(by_verdict[HIT] / count, 3),
+        false_positive_rate=round(by_verdict[FALSE_POSITIVE] / count, 3),
+        fallback_rate=round(by_verdict[FALLBACK] / count, 3),
+        p50_ms=round(statistics.median(latencies), 2),
+        p99_ms=round(percentile(latencies, 99), 2),
+        failures=[
+            f"[{verdict.verdict}] {verdict.text}: {verdict.detail}"
+            for verdict in verdicts
+            if verdict.verdict != HIT
+        ],
+    )
+
+
+async def bench_home_size(
+    args: argparse.Namespace, corpus: dict[str, Any], padding: int
+) -> list[CategoryResult]:
+    """Run the corpus on the corpus entities plus padding synthetic ones."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+        home = populate_home(hass, padding, seed=args.seed, simulate_devices=True)
+        add_corpus_entities(hass, corpus["entities"])
+        areas = {
+            **{entity.entity_id: entity.area for entity in home.entities},
+            **{entity["entity_id"]: entity["area"] for entity in corpus["entities"]},
+        }
+        integration = await async_setup_integration(
+            hass, {CONF_OPTIMISTIC_ACK: False, CONF_SPECULATIVE_LLM: False}
+        )
+
+        async def fallback(*args: Any, **kwargs: Any) -> None:
+            raise LLMFallback
+
+        integration.conversation._async_handle_chat_log = fallback  # noqa: SLF001
+        entities = len(home.entities) + len(corpus["entities"])
+
+        try:
+            # The first pass decides the verdicts, the others only add latencies
+            verdicts = await run_corpus(hass, integration, home, corpus["utterances"], areas)
+            latencies: dict[str, list[float]] = {}
+            for verdict in verdicts:
+                latencies.setdefault(verdict.category, []).append(verdict.latency_ms)
+            for _ in range(args.repeat - 1):
+                for verdict in await run_corpus(
+                    hass, integration, home, corpus["utterances"], areas
+                ):
+                    latencies[verdict.category].append(verdict.latency_ms)
+        finally:
+            await async_teardown_integration(integration)
+            await hass.async_stop(force=True)
+
+    categories = list(dict.fromkeys(verdict.category for verdict in verdicts))
+    results = [
+        aggregate(
+            entities,
+            category,
+            [verdict for verdict in verdicts if verdict.category == category],
+            latencies[category],
+        )
+        for category in categories
+    ]
+    results.append(
+        aggregate(
+            entities,
+            "all",
+            verdicts,
+            [latency for samples in latencies.values() for latency in samples],
+        )
+    )
+    return results
+
+
+def print_results(results: list[CategoryResult], verbose: bool) -> None:
+    """Print the result table of one home size."""
+    print(f"\n🏠 {results[0].entities} entities")
+    print("   category   utterances   hit    fp   fallback   p50 ms   p99 ms")
+    for result in results:
+        print(
+            f"   {result.category:<10} {result.utterances:>10} "
+            f"{result.hit_rate:>5.0%} {result.false_positive_rate:>5.0%} "
+            f"{result.fallback_rate:>10.0%} {result.p50_ms:>8.2f} {result.p99_ms:>8.2f}"
+        )
+    failures = results[-1].failures
+    if failures:
+        print(f"   ⚠️  {len(failures)} utterances not handled as expected")
+        for failure in failures if verbose else failures[:10]:
+            print(f"      {failure}")
+
+
+async def main() -> int:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="语料 JSON 文件")
+    parser.add_argument(
+        "--entities", type=int, nargs="+", default=[0, 100, 1000, 10000],
+        help="语料实体之外的虚拟实体数",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="统计延迟时语料重复的遍数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-hit-rate", type=float, default=0.0, help="低于此命中率时退出码为 1")
+    parser.add_argument(
+        "--max-false-positive-rate", type=float, default=1.0,
+        help="高于此误操作率时退出码为 1",
+    )
+    parser.add_argument("--verbose", action="store_true", help="列出全部未命中的语句")
+    parser.add_argument("--json", help="把结果写入 JSON 文件，便于版本间比较")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as file:
+        corpus = json.load(file)
+    print(
+        f"✅ Corpus: {len(corpus['utterances'])} utterances, "
+        f"{len(corpus['entities'])} named entities"
+    )
+
+    results: list[CategoryResult] = []
+    for padding in args.entities:
+        size_results = await bench_home_size(args, corpus, padding)
+        print_results(size_results, args.verbose)
+        results.extend(size_results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump([asdict(result) for result in results], file, indent=2, ensure_ascii=False)
+        print(f"\n💾 Results written to {args.json}")
+
+    totals = [result for result in results if result.category == "all"]
+    if any(
+        result.hit_rate < args.min_hit_rate
+        or result.false_positive_rate > args.max_false_positive_rate
+        for result in totals
+    ):
+        print("\n❌ Below the required accuracy")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding="utf-8")
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Microbenchmarks of the message-building hot path in entity.py.
+
+_prepare_messages_from_chat_log, _format_tool and _format_structure_prompt
+run on every LLM iteration. This measures the CPU time and peak memory per
+call on synthetic chat logs (long histories, many tools, large tool
+results, image attachments), pyperf-style: calibrated loops, warmup, then
+several values reported as mean ± stdev.
+
+Results can be saved as a baseline and compared with a later version:
+    python benchmarks/bench_messages.py --save baseline.json
+    (change the code)
+    python benchmarks/bench_messages.py --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+import gc
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+from harness import async_create_hass, async_setup_integration, async_teardown_integration
+
+import voluptuous as vol
+
+from homeassistant.components import conversation
+from homeassistant.const import __version__ as HA_VERSION
+from homeassistant.helpers import config_validation as cv, llm
+
+from yanfeng_ai_task.entity import _format_tool
+
+MANIFEST = (
+    Path(__file__).resolve().parent.parent
+    / "custom_components" / "yanfeng_ai_task" / "manifest.json"
+)
+AGENT_ID = "conversation.yanfeng_bench"
+
+
+@dataclass
+class BenchResult:
+    """Measurements of one benchmark."""
+
+    name: str
+    loops: int
+    values: int
+    mean_us: float
+    stdev_us: float
+    min_us: float
+    peak_kib: float
+
+
+class SyntheticTool(llm.Tool):
+    """Tool with an intent-like parameter schema."""
+
+    def __init__(self, index: int) -> None:
+        """Initialize the tool."""
+        self.name = f"HassTool{index}"
+        self.description = f"Synthetic tool number {index}, controls devices by name or area."
+        self.parameters = vol.Schema(
+            {
+                vol.Optional("name", description="设备名称"): cv.string,
+                vol.Optional("area", description="区域"): cv.string,
+                vol.Optional("floor"): cv.string,
+                vol.Optional("domain"): vol.All(cv.ensure_list, [cv.string]),
+                vol.Optional("device_class"): vol.All(cv.ensure_list, [cv.string]),
+                vol.Optional("brightness"): vol.All(vol.Coerce(int), vol.Range(0, 100)),
+                vol.Optional("temperature"): vol.Coerce(float),
+                vol.Optional("preset"): vol.In(["home", "away", "sleep", "eco"]),
+            }
+        )
+
+    async def async_call(self, hass: Any, tool_input: Any, llm_context: Any) -> Any:
+        """Never called."""
+        raise NotImplementedError
+
+
+def structure_dict(fields: int) -> dict[str, Any]:
+    """Return a dict structure like the ones AI Task data generation passes."""
+    return {
+        f"field_{i}": {
+            "type": ("string", "number", "boolean")[i % 3],
+            "description": f"第 {i} 个字段的说明，描述这个字段应该包含什么内容。",
+            "required": i % 2 == 0,
+        }
+        for i in range(fields)
+    }
+
+
+def structure_schema(fields: int) -> vol.Schema:
+    """Return a voluptuous structure, as the AI Task service builds it."""
+    return vol.Schema(
+        {
+            vol.Required(f"field_{i}", description=f"第 {i} 个字段的说明"): (
+                cv.string, vol.Coerce(float), cv.boolean
+            )[i % 3]
+            for i in range(fields)
+        }
+    )
+
+
+def tool_result(states: int) -> dict[str, Any]:
+    """Return a GetLiveContext-like tool result with states entries."""
+    return {
+        "success": True,
+        "result": [
+            {
+                "name": f"客厅灯{i}",
+                "domain": "light",
+                "state": "on" if i % 2 else "off",
+                "areas": "客厅",
+                "attributes": {"brightness": i % 255, "color_mode": "brightness"},
+            }
+            for i in range(states)
+        ],
+    }
+
+
+def make_chat_log(hass: Any, content: list[Any]) -> conversation.ChatLog:
+    """Return a chat log with the given content."""
+    return conversation.ChatLog(hass, "bench", content=content)
+
+
+def build_cases(
+    hass: Any, entity: Any, image_dir: Path
+) -> dict[str, Callable[[], Any]]:
+    """Return the benchmarks by name."""
+    system = conversation.SystemContent(content="你是一个智能家居助手。" * 20)
+    serializer = llm.selector_serializer
+    prepare = entity._prepare_messages_from_chat_log  # noqa: SLF001
+    format_structure = entity._format_structure_prompt  # noqa: SLF001
+
+    short = make_chat_log(hass, [system, conversation.UserContent("打开客厅灯")])
+
+    history: list[Any] = [system]
+    for i in range(100):
+        history.append(conversation.UserContent(f"第 {i} 个问题：明天的天气怎么样，需要带伞吗？"))
+        history.append(
+            conversation.AssistantContent(
+                agent_id=AGENT_ID, content=f"第 {i} 个回答：明天多云转小雨，建议带伞。" * 3
+            )
+        )
+    long_history = make_chat_log(hass, history)
+
+    with_tools: list[Any] = [system, conversation.UserContent("总结一下家里的情况")]
+    for i in range(10):
+        call = llm.ToolInput(tool_name="GetLiveContext", tool_args={"area": "客厅"}, id=f"t{i}")
+        with_tools.append(
+            conversation.AssistantContent(agent_id=AGENT_ID, content=None, tool_calls=[call])
+        )
+        with_tools.append(
+            conversation.ToolResultContent(
+                agent_id=AGENT_ID,
+                tool_call_id=call.id,
+                tool_name=call.tool_name,
+                tool_result=tool_result(200),
+            )
+        )
+    tool_results = make_chat_log(hass, with_tools)
+
+    attachments = []
+    for i in range(4):
+        path = image_dir / f"image_{i}.jpg"
+        path.write_bytes(os.urandom(256 * 1024))
+        attachments.append(
+            conversation.Attachment(
+                media_content_id=f"media-source://bench/image_{i}.jpg",
+                mime_type="image/jpeg",
+                path=path,
+            )
+        )
+    images = make_chat_log(
+        hass,
+        [system, conversation.UserContent("这些照片里有什么？", attachments=attachments)],
+    )
+
+    tools = [SyntheticTool(i) for i in range(50)]
+    schema_30 = structure_schema(30)
+    dict_30 = structure_dict(30)
+
+    return {
+        "prepare_short": lambda: prepare(short, None, None, serializer),
+        "prepare_long_history": lambda: prepare(long_history, None, None, serializer),
+        "prepare_tool_results": lambda: prepare(tool_results, None, None, serializer),
+        "prepare_images": lambda: prepare(images, None, None, serializer),
+        "prepare_structure": lambda: prepare(short, None, schema_30, serializer),
+        "format_tool": lambda: _format_tool(tools[0], serializer),
+        "format_tools_50": lambda: [_format_tool(tool, serializer) for tool in tools],
+        "format_structure_dict": lambda: format_structure(dict_30, serializer),
+        "format_structure_schema": lambda: format_structure(schema_30, serializer),
+    }
+
+
+def measure(
+    name: str, func: Callable[[], Any], values: int, min_time: float
+) -> BenchResult:
+    """Measure CPU time per call and peak memory of one call."""
+    # Calibrate: double the loops until one value takes min_time
+    loops = 1
+    while True:
+        start = time.process_time()
+        for _ in range(loops):
+            func()
+        if time.process_time() - start >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = []
+    for _ in range(values):
+        start = time.process_time()
+        for _ in range(loops):
+            func()
+        samples.append((time.process_time() - start) / loops * 1e6)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return BenchResult(
+        name=name,
+        loops=loops,
+        values=values,
+        mean_us=round(statistics.mean(samples), 2),
+        stdev_us=round(statistics.stdev(samples) if len(samples) > 1 else 0.0, 2),
+        min_us=round(min(samples), 2),
+        peak_kib=round(peak / 1024, 1),
+    )
+
+
+def metadata() -> dict[str, Any]:
+    """Return what the results depend on, saved with the baseline."""
+    with open(MANIFEST, encoding="utf-8") as file:
+        integration_version = json.load(file).get("version")
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "integration_version": integration_version,
+        "homeassistant_version": HA_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def compare(results: list[BenchResult], path: str, threshold: float) -> bool:
+    """Print the change against a saved baseline, return True on a regression."""
+    with open(path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    before = {result["name"]: result for result in baseline["benchmarks"]}
+    meta = baseline.get("metadata", {})
+    print(
+        f"\n📊 Compared with {path} (version {meta.get('integration_version')}, "
+        f"{meta.get('date')})"
+    )
+    print(f"   {'benchmark':<26} {'before µs':>11} {'now µs':>11} {'change':>8}  memory")
+
+    regression = False
+    for result in results:
+        if (old := before.get(result.name)) is None:
+            print(f"   {result.name:<26} {'-':>11} {result.mean_us:>11.2f}      new")
+            continue
+        change = result.mean_us / old["mean_us"] - 1 if old["mean_us"] else 0.0
+        # Only changes larger than the threshold and the noise count
+        noise = (result.stdev_us + old["stdev_us"]) / max(old["mean_us"], 1e-9)
+        if change > max(threshold, noise):
+            verdict, regression = "🔴 slower", True
+        elif change < -max(threshold, noise):
+            verdict = "🟢 faster"
+        else:
+            verdict = "   same"
+        memory = f"{old['peak_kib']:.1f} → {result.peak_kib:.1f} KiB"
+        print(
+            f"   {result.name:<26} {old['mean_us']:>11.2f} {result.mean_us:>11.2f} "
+            f"{change:>+7.1%}  {memory}  {verdict}"
+        )
+    return regression
+
+
+async def main() -> int:
+    """Run the microbenchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", nargs="+", help="只运行名称包含这些字符串的基准")
+    parser.add_argument("--values", type=int, default=10, help="每个基准的测量次数")
+    parser.add_argument("--min-time", type=float, default=0.05, help="每次测量的最短 CPU 时间（秒）")
+    parser.add_argument("--save", help="把结果保存为基线 JSON")
+    parser.add_argument("--compare", help="与基线 JSON 比较，变慢时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=0.2, help="视为变化的最小比例")
+    args = parser.parse_args()
+
+    results: list[BenchResult] = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+        integration = await async_setup_integration(hass)
+        try:
+            cases = build_cases(hass, integration.conversation, Path(config_dir))
+            print(f"   {'benchmark':<26} {'loops':>7} {'mean µs':>11} {'± stdev':>9} {'min µs':>11} {'peak KiB':>9}")
+            for name, func in cases.items():
+                if args.filter and not any(part in name for part in args.filter):
+                    continue
+                result = measure(name, func, args.values, args.min_time)
+                results.append(result)
+                print(
+                    f"   {name:<26} {result.loops:>7} {result.mean_us:>11.2f} "
+                    f"{result.stdev_us:>9.2f} {result.min_us:>11.2f} {result.peak_kib:>9.1f}"
+                )
+        finally:
+            await async_teardown_integration(integration)
+            await hass.async_stop(force=True)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(
+                {"metadata": metadata(), "benchmarks": [asdict(result) for result in results]},
+                file,
+                indent=2,
+                ensure_ascii=False,
+            )
+        print(f"\n💾 Baseline written to {args.save}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        print("\n❌ Slower than the baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding="utf-8")
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Local stand-in for the ModelScope API-Inference endpoints used by the integration.
+
+Serves:
+- POST /v1/chat/completions   文本回复或脚本化的 tool calls，可选 SSE 流式输出
+- POST /v1/images/generations 返回 task_id（异步模式）
+- GET  /v1/tasks/{id}         先返回 PENDING 若干次，再返回 SUCCEED
+- GET  /images/{id}.png       生成的图片
+
+Latency is drawn from a normal distribution (mean, jitter) per request.
+Tool-call scripts are JSON rules: when the last user message contains
+"match", the first response calls "tool" with "arguments"; once the tool
+result is back, the final answer is "reply".
+
+Standalone: python benchmarks/fake_modelscope.py --port 8765 --latency 0.3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+from dataclasses import dataclass, field
+import itertools
+import json
+import random
+import sys
+from typing import Any
+
+from aiohttp import web
+
+# 1x1 transparent PNG
+PNG_BYTES = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+# 默认脚本：需要全屋信息的问题先调用 GetLiveContext，再回答
+DEFAULT_TOOL_SCRIPT: list[dict[str, Any]] = [
+    {"match": "总结", "tool": "GetLiveContext", "arguments": {}, "reply": "家里设备都正常。"},
+    {"match": "建议", "tool": "GetLiveContext", "arguments": {}, "reply": "建议关掉没人房间的灯。"},
+]
+
+
+@dataclass
+class FakeServerConfig:
+    """Behaviour of the fake server."""
+
+    latency: float = 0.05  # seconds, mean per request
+    jitter: float = 0.0  # seconds, standard deviation
+    stream_chunks: int = 8  # SSE chunks per streamed reply
+    image_polls: int = 2  # PENDING responses before a task succeeds
+    reply: str = "好的，已经为您处理。"
+    tool_script: list[dict[str, Any]] = field(
+        default_factory=lambda: list(DEFAULT_TOOL_SCRIPT)
+    )
+    seed: int | None = None
+
+
+class FakeModelScopeServer:
+    """aiohttp server that answers like ModelScope API-Inference."""
+
+    def __init__(self, config: FakeServerConfig | None = None) -> None:
+        """Initialize the server."""
+        self.config = config or FakeServerConfig()
+        self.requests: dict[str, int] = {"chat": 0, "image": 0, "poll": 0}
+        self._random = random.Random(self.config.seed)
+        self._task_ids = itertools.count(1)
+        self._tasks: dict[str, int] = {}
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+        self.app = web.Application()
+        self.app.router.add_post("/v1/chat/completions", self._chat)
+        self.app.router.add_post("/v1/images/generations", self._image)
+        self.app.router.add_get("/v1/tasks/{task_id}", self._task)
+        self.app.router.add_get("/images/{name}", self._image_file)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving, return the base URL with a trailing slash."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}/"
+        return self.base_url
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _delay(self) -> None:
+        """Sleep for one drawn request latency."""
+        delay = self._random.gauss(self.config.latency, self.config.jitter)
+        await asyncio.sleep(max(0.0, delay))
+
+    def _script_rule(self, messages: list[dict[str, Any]]) -> dict[str, Any] | None:
+        """Return the tool script rule matching the last user message."""
+        user_text = next(
+            (
+                str(message.get("content") or "")
+                for message in reversed(messages)
+                if message.get("role") == "user"
+            ),
+            "",
+        )
+        return next(
+            (rule for rule in self.config.tool_script if rule["match"] in user_text),
+            None,
+        )
+
+    def _completion(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Build the chat completion for a request."""
+        messages = payload.get("messages", [])
+        rule = self._script_rule(messages) if payload.get("tools") else None
+        prompt_tokens = len(json.dumps(messages, ensure_ascii=False)) // 2
+
+        if rule is not None and messages[-1].get("role") != "tool":
+            message: dict[str, Any] = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{next(self._task_ids)}",
+                        "type": "function",
+                        "function": {
+                            "name": rule["tool"],
+                            "arguments": json.dumps(rule.get("arguments", {})),
+                        },
+                    }
+                ],
+            }
+            finish_reason = "tool_calls"
+            completion_tokens = 20
+        else:
+            reply = rule.get("reply", self.config.reply) if rule else self.config.reply
+            message = {"role": "assistant", "content": reply}
+            finish_reason = "stop"
+            completion_tokens = len(reply)
+
+        return {
+            "id": f"chatcmpl-{next(self._task_ids)}",
+            "object": "chat.completion",
+            "model": payload.get("model", ""),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    async def _chat(self, request: web.Request) -> web.StreamResponse:
+        """Answer a chat completion request."""
+        self.requests["chat"] += 1
+        payload = await request.json()
+        await self._delay()
+        completion = self._completion(payload)
+        if not payload.get("stream"):
+            return web.json_response(completion)
+
+        # OpenAI-style SSE: the content split into chunks, then [DONE]
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        message = completion["choices"][0]["message"]
+        content = message.get("content") or ""
+        size = max(1, len(content) // self.config.stream_chunks)
+        for start in range(0, len(content), size):
+            chunk = {
+                "id": completion["id"],
+                "model": completion["model"],
+                "choices": [{"index": 0, "delta": {"content": content[start:start + size]}}],
+            }
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            await asyncio.sleep(0)
+        if message.get("tool_calls"):
+            chunk = {
+                "id": completion["id"],
+                "choices": [{"index": 0, "delta": {"tool_calls": message["tool_calls"]}}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _image(self, request: web.Request) -> web.Response:
+        """Submit an image generation task."""
+        self.requests["image"] += 1
+        await request.json()
+        await self._delay()
+        task_id = str(next(self._task_ids))
+        self._tasks[task_id] = 0
+        return web.json_response({"task_id": task_id, "request_id": task_id})
+
+    async def _task(self, request: web.Request) -> web.Response:
+        """Report the status of an image generation task."""
+        self.requests["poll"] += 1
+        task_id = request.match_info["task_id"]
+        if task_id not in self._tasks:
+            return web.json_response({"message": "task not found"}, status=404)
+
+        self._tasks[task_id] += 1
+        if self._tasks[task_id] <= self.config.image_polls:
+            return web.json_response({"task_id": task_id, "task_status": "RUNNING"})
+        return web.json_response(
+            {
+                "task_id": task_id,
+                "task_status": "SUCCEED",
+                "output_images": [f"{self.base_url}images/{task_id}.png"],
+            }
+        )
+
+    async def _image_file(self, request: web.Request) -> web.Response:
+        """Serve a generated image."""
+        return web.Response(body=PNG_BYTES, content_type="image/png")
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the fake server options to a command line parser."""
+    parser.add_argument("--latency", type=float, default=0.05, help="平均响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟标准差（秒）")
+    parser.add_argument("--image-polls", type=int, default=2, help="图片任务完成前的 RUNNING 次数")
+    parser.add_argument("--tool-script", help="tool call 脚本 JSON 文件")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def server_config_from_args(args: argparse.Namespace) -> FakeServerConfig:
+    """Build the server config from parsed command line options."""
+    config = FakeServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        image_polls=args.image_polls,
+        seed=args.seed,
+    )
+    if args.tool_script:
+        with open(args.tool_script, encoding="utf-8") as file:
+            config.tool_script = json.load(file)
+    return config
+
+
+async def main() -> int:
+    """Run the fake server until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeModelScopeServer(server_config_from_args(args))
+    base_url = await server.start(args.host, args.port)
+    print(f"✅ Fake ModelScope API listening on {base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding="utf-8")
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        pass
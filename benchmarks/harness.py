@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""Shared setup for the benchmarks.
+
+Creates a test Home Assistant instance (no network, registries in a temp
+config directory) with a synthetic home of N entities, and the integration's
+conversation and AI Task entities talking to the fake ModelScope server.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import random
+import sys
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+from unittest.mock import patch
+
+import aiohttp
+import voluptuous as vol
+
+# Import the integration from this checkout
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "custom_components"))
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+    floor_registry as fr,
+    label_registry as lr,
+    llm,
+)
+from homeassistant.util.json import JsonObjectType
+
+from yanfeng_ai_task import YanfengAIRuntimeData, helpers
+from yanfeng_ai_task.const import (
+    CONF_LLM_HASS_API,
+    CONF_RESPONSE_MODE,
+    DOMAIN,
+)
+from yanfeng_ai_task.entity import YanfengAILLMBaseEntity
+from yanfeng_ai_task.entity_index import EntityNameIndex
+from yanfeng_ai_task.helpers import ModelScopeAPIClient
+
+BENCH_API_ID = "yanfeng_bench"
+
+ROOMS = ["客厅", "卧室", "主卧", "次卧", "书房", "厨房", "餐厅", "阳台", "卫生间", "儿童房"]
+
+# domain, 中文名, share of the synthetic entities
+DOMAINS: list[tuple[str, str, float]] = [
+    ("light", "灯", 0.40),
+    ("switch", "插座", 0.20),
+    ("climate", "空调", 0.10),
+    ("cover", "窗帘", 0.10),
+    ("fan", "风扇", 0.10),
+    ("media_player", "音箱", 0.05),
+    ("sensor", "温度", 0.05),
+]
+
+SERVICES = {
+    "light": ["turn_on", "turn_off", "toggle"],
+    "switch": ["turn_on", "turn_off", "toggle"],
+    "climate": ["turn_on", "turn_off", "set_temperature", "set_hvac_mode"],
+    "cover": ["open_cover", "close_cover", "stop_cover", "set_cover_position"],
+    "fan": ["turn_on", "turn_off", "set_percentage", "increase_speed", "decrease_speed"],
+    "media_player": [
+        "turn_on", "turn_off", "media_play", "media_pause", "media_play_pause",
+        "media_next_track", "media_previous_track", "volume_set", "volume_up",
+        "volume_down",
+    ],
+}
+
+
+@dataclass(slots=True)
+class SyntheticEntity:
+    """An entity of the synthetic home."""
+
+    entity_id: str
+    name: str
+    domain: str
+    area: str
+
+
+@dataclass
+class SyntheticHome:
+    """Entities of the synthetic home and the service calls made to them."""
+
+    entities: list[SyntheticEntity]
+    calls: list[tuple[str, str, dict[str, Any]]] = field(default_factory=list)
+
+    def by_domain(self, domain: str) -> list[SyntheticEntity]:
+        """Return the entities of a domain."""
+        return [entity for entity in self.entities if entity.domain == domain]
+
+
+async def async_create_hass(config_dir: str) -> HomeAssistant:
+    """Create a Home Assistant instance with empty registries."""
+    hass = HomeAssistant(config_dir)
+    hass.config.language = "zh-Hans"
+    await fr.async_load(hass)
+    await lr.async_load(hass)
+    await ar.async_load(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    return hass
+
+
+def _initial_state(domain: str, rng: random.Random) -> tuple[str, dict[str, Any]]:
+    """Return a plausible state and attributes for a synthetic entity."""
+    if domain == "climate":
+        return "cool", {"temperature": 26, "min_temp": 16, "max_temp": 30}
+    if domain == "cover":
+        return "closed", {"current_position": 0}
+    if domain == "fan":
+        return "off", {"percentage": 0}
+    if domain == "media_player":
+        return "paused", {"volume_level": 0.3}
+    if domain == "sensor":
+        return str(rng.randint(18, 30)), {"unit_of_measurement": "°C"}
+    return rng.choice(("on", "off")), {}
+
+
+def populate_home(
+    hass: HomeAssistant,
+    count: int,
+    seed: int = 0,
+    service_latency: float = 0.0,
+    simulate_devices: bool = False,
+) -> SyntheticHome:
+    """Add count entities, spread over rooms and domains, to hass.
+
+    Names are "<room><domain name><n>", e.g. "客厅灯12", so every entity can
+    be addressed by name. Service calls are recorded, and with
+    simulate_devices also applied to the states (see simulate_call).
+    """
+    rng = random.Random(seed)
+    area_registry = ar.async_get(hass)
+    entity_registry = er.async_get(hass)
+    areas = {
+        room: area_registry.async_get_area_by_name(room)
+        or area_registry.async_create(room)
+        for room in ROOMS
+    }
+
+    home = SyntheticHome(entities=[])
+    for domain, domain_name, share in DOMAINS:
+        for n in range(max(1, round(count * share))):
+            room = ROOMS[n % len(ROOMS)]
+            name = f"{room}{domain_name}{n // len(ROOMS) + 1}"
+            registry_entry = entity_registry.async_get_or_create(
+                domain, "yanfeng_bench", f"{domain}_{n}",
+                suggested_object_id=f"bench_{domain}_{n}",
+            )
+            entity_registry.async_update_entity(
+                registry_entry.entity_id, area_id=areas[room].id
+            )
+            state, attributes = _initial_state(domain, rng)
+            hass.states.async_set(
+                registry_entry.entity_id, state, {"friendly_name": name, **attributes}
+            )
+            home.entities.append(
+                SyntheticEntity(registry_entry.entity_id, name, domain, room)
+            )
+
+    async def record(call: ServiceCall) -> None:
+        if service_latency:
+            await asyncio.sleep(service_latency)
+        home.calls.append((call.domain, call.service, dict(call.data)))
+        if simulate_devices:
+            simulate_call(hass, call.domain, call.service, call.data)
+
+    for domain, services in SERVICES.items():
+        for service in services:
+            hass.services.async_register(domain, service, record)
+
+    return home
+
+
+def simulate_call(
+    hass: HomeAssistant, domain: str, service: str, data: Mapping[str, Any]
+) -> None:
+    """Apply the effect of a service call to the states of its entities."""
+    entity_ids = data.get("entity_id", [])
+    if isinstance(entity_ids, str):
+        entity_ids = [entity_ids]
+
+    for entity_id in entity_ids:
+        if (state := hass.states.get(entity_id)) is None:
+            continue
+        new_state = state.state
+        attributes = dict(state.attributes)
+        if service == "turn_on":
+            new_state = "cool" if domain == "climate" else "on"
+        elif service == "media_play":
+            new_state = "playing"
+        elif service == "turn_off":
+            new_state = "off"
+        elif service == "toggle":
+            new_state = "off" if state.state == "on" else "on"
+        elif service == "media_pause":
+            new_state = "paused"
+        elif service == "open_cover":
+            new_state, attributes["current_position"] = "open", 100
+        elif service == "close_cover":
+            new_state, attributes["current_position"] = "closed", 0
+        elif service == "set_cover_position":
+            attributes["current_position"] = data["position"]
+            new_state = "open" if data["position"] else "closed"
+        elif service == "set_hvac_mode":
+            new_state = data["hvac_mode"]
+        for key in ("temperature", "percentage", "volume_level"):
+            if key in data:
+                attributes[key] = data[key]
+        if "brightness_pct" in data:
+            attributes["brightness"] = round(data["brightness_pct"] * 255 / 100)
+        hass.states.async_set(entity_id, new_state, attributes)
+
+
+class GetLiveContextTool(llm.Tool):
+    """Returns the state of every entity, like the Assist API tool of that name."""
+
+    name = "GetLiveContext"
+    description = "Get the current state of all devices in the home."
+    parameters = vol.Schema({})
+
+    async def async_call(
+        self, hass: HomeAssistant, tool_input: llm.ToolInput, llm_context: llm.LLMContext
+    ) -> JsonObjectType:
+        """Return the states."""
+        return {
+            "success": True,
+            "result": [
+                {
+                    "name": state.attributes.get("friendly_name", state.entity_id),
+                    "domain": state.domain,
+                    "state": state.state,
+                }
+                for state in hass.states.async_all()
+            ],
+        }
+
+
+class BenchAPI(llm.API):
+    """LLM API with the tools the fake server's scripts call."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the API."""
+        self.hass = hass
+        self.id = BENCH_API_ID
+        self.name = "Yanfeng benchmark"
+
+    async def async_get_api_instance(self, llm_context: llm.LLMContext) -> llm.APIInstance:
+        """Return the API instance."""
+        return llm.APIInstance(
+            api=self,
+            api_prompt="You control a synthetic home.",
+            llm_context=llm_context,
+            tools=[GetLiveContextTool()],
+        )
+
+
+@dataclass
+class BenchIntegration:
+    """The integration's entities set up against the fake server."""
+
+    entry: ConfigEntry
+    conversation: Any
+    ai_task: Any
+    session: aiohttp.ClientSession
+
+
+@contextmanager
+def use_fake_api(base_url: str, poll_interval: float = 0.05) -> Iterator[None]:
+    """Point the integration's ModelScope client at the fake server."""
+
+    def client(self: YanfengAILLMBaseEntity) -> ModelScopeAPIClient:
+        runtime_data = self.entry.runtime_data
+        return ModelScopeAPIClient(
+            self.session,
+            self.api_key,
+            runtime_data.model_health,
+            base_url=base_url,
+            metrics=runtime_data.metrics,
+            tracer=runtime_data.tracer,
+            chaos=runtime_data.chaos,
+        )
+
+    with (
+        patch.object(YanfengAILLMBaseEntity, "client", property(client)),
+        patch.object(helpers, "TASK_POLL_INTERVAL", poll_interval),
+    ):
+        yield
+
+
+async def async_setup_integration(
+    hass: HomeAssistant, subentry_options: dict[str, Any] | None = None
+) -> BenchIntegration:
+    """Create the config entry, runtime data and entities of the integration."""
+    # Imported here, ai_task needs a Home Assistant version with AI Task
+    from yanfeng_ai_task.ai_task import YanfengAITaskEntity
+    from yanfeng_ai_task.conversation import YanfengAIConversationEntity
+
+    if BENCH_API_ID not in {api.id for api in llm.async_get_apis(hass)}:
+        llm.async_register_api(hass, BenchAPI(hass))
+
+    options = {
+        CONF_RESPONSE_MODE: "friendly",
+        CONF_LLM_HASS_API: [BENCH_API_ID],
+        **(subentry_options or {}),
+    }
+    entry = ConfigEntry(
+        data={"api_key": "bench"},
+        discovery_keys=MappingProxyType({}),
+        domain=DOMAIN,
+        minor_version=1,
+        options={},
+        source="user",
+        subentries_data=[
+            {"data": options, "subentry_type": "conversation", "title": "Bench", "unique_id": None},
+            {"data": {}, "subentry_type": "ai_task_data", "title": "Bench AI Task", "unique_id": None},
+        ],
+        title="Bench",
+        unique_id=None,
+        version=2,
+    )
+
+    entity_index = EntityNameIndex(hass)
+    await entity_index.async_setup()
+    session = aiohttp.ClientSession()
+    entry.runtime_data = YanfengAIRuntimeData(session=session, entity_index=entity_index)
+
+    subentries = {s.subentry_type: s for s in entry.subentries.values()}
+    conversation_entity = YanfengAIConversationEntity(entry, subentries["conversation"])
+    ai_task_entity = YanfengAITaskEntity(hass, entry, subentries["ai_task_data"])
+    for entity, entity_id in (
+        (conversation_entity, "conversation.yanfeng_bench"),
+        (ai_task_entity, "ai_task.yanfeng_bench"),
+    ):
+        entity.hass = hass
+        entity.entity_id = entity_id
+
+    return BenchIntegration(entry, conversation_entity, ai_task_entity, session)
+
+
+async def async_teardown_integration(integration: BenchIntegration) -> None:
+    """Close what async_setup_integration opened."""
+    integration.entry.runtime_data.entity_index.async_shutdown()
+    await integration.session.close()
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
+import secrets
+
 import aiohttp
 import voluptuous as vol
 
@@ -22,49 +25,221 @@ from homeassistant.exceptions import (
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.typing import ConfigType
 
+from .blocking import BlockingDetector
+from .chaos import ChaosInjector, load_profile
 from .const import (
+    CONF_BLOCKING_DETECTOR,
+    CONF_CHAOS_PROFILE,
+    CONF_CHAT_PROVIDER,
+    CONF_FLIGHT_RECORDER_FILE,
+    CONF_LOCAL_API_KEY,
+    CONF_LOCAL_BASE_URL,
     CONF_PROMPT,
+    CONF_RECORD_UTTERANCES,
+    CONF_RECORDER_KEY,
     DEFAULT_AI_TASK_NAME,
+    DEFAULT_BLOCKING_DETECTOR,
+    DEFAULT_CHAT_PROVIDER,
+    DEFAULT_FLIGHT_RECORDER_FILE,
+    DEFAULT_RECORD_UTTERANCES,
     DEFAULT_TITLE,
     DOMAIN,
+    FLIGHT_RECORDER_FILE,
     LOGGER,
+    PROFILE_DEFAULT_SECONDS,
+    PROFILE_MAX_SECONDS,
+    PROVIDER_LOCAL_PRIMARY,
+    PROVIDER_MODELSCOPE,
     RECOMMENDED_AI_TASK_OPTIONS,
     RECOMMENDED_CHAT_MODEL,
+    SERVICE_DUMP_FLIGHT_RECORDER,
+    SERVICE_EXPORT_TRACES,
+    SERVICE_PROFILE,
+    SPECULATION_MAX_REQUESTS,
+    SPECULATION_WINDOW,
     TIMEOUT_SECONDS,
+    TRACES_FILE,
 )
+from .entity_index import EntityNameIndex
+from .flight_recorder import FlightRecorder
+from .helpers import ModelHealth, RateLimiter
+from .metrics import LatencyMetrics
+from .profiler import async_profile
+from .tracing import Tracer, export_spans_jsonl
+from .usage import TokenUsageTracker
 
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 PLATFORMS = (
     Platform.AI_TASK,
     Platform.CONVERSATION,
+    Platform.SENSOR,
 )
 
+
+@dataclass
+class YanfengAIRuntimeData:
+    """Runtime data for a Yanfeng AI Task config entry."""
+
+    session: aiohttp.ClientSession
+    entity_index: EntityNameIndex
+    # Bounds speculative LLM requests so they can't exhaust the API quota
+    speculation_limiter: RateLimiter = field(
+        default_factory=lambda: RateLimiter(SPECULATION_MAX_REQUESTS, SPECULATION_WINDOW)
+    )
+    # Chat model latency and circuit breaker state, used for hedged requests
+    model_health: ModelHealth = field(default_factory=ModelHealth)
+    # Per-stage latency, for diagnostics and the latency sensors
+    metrics: LatencyMetrics = field(default_factory=LatencyMetrics)
+    # Sampled spans of recent turns, written out by the export_traces service
+    tracer: Tracer = field(default_factory=Tracer)
+    # The last turns, for diagnostics and the dump_flight_recorder service
+    flight_recorder: FlightRecorder = field(default_factory=FlightRecorder)
+    # Token usage per subentry and model, stored across restarts
+    usage: TokenUsageTracker = field(default_factory=TokenUsageTracker)
+    # Fault injection into the ModelScope client, only with a chaos profile
+    chaos: ChaosInjector | None = None
+    # Event loop blocking detector, only in the debug mode of the entry options
+    blocking: BlockingDetector | None = None
+
+
 # Type alias for config entry with runtime data
-YanfengAIConfigEntry = ConfigEntry[aiohttp.ClientSession]
+YanfengAIConfigEntry = ConfigEntry[YanfengAIRuntimeData]
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up Yanfeng AI Task."""
+
+    async def async_export_traces(call: ServiceCall) -> ServiceResponse:
+        """Append the buffered spans of all loaded entries to a JSONL file."""
+        spans = [
+            span
+            for entry in hass.config_entries.async_loaded_entries(DOMAIN)
+            for span in entry.runtime_data.tracer.spans()
+        ]
+        path = hass.config.path(TRACES_FILE)
+        try:
+            count = await hass.async_add_executor_job(export_spans_jsonl, spans, path)
+        except OSError as err:
+            raise HomeAssistantError(f"Failed to write traces to {path}: {err}") from err
+
+        LOGGER.info("Exported %d spans to %s", count, path)
+        return {"path": path, "spans": count}
+
+    async def async_dump_flight_recorder(call: ServiceCall) -> ServiceResponse:
+        """Return the recorded turns of all loaded entries."""
+        return {
+            "entries": [
+                {
+                    "entry_id": entry.entry_id,
+                    "title": entry.title,
+                    "turns": entry.runtime_data.flight_recorder.turns(),
+                }
+                for entry in hass.config_entries.async_loaded_entries(DOMAIN)
+            ]
+        }
+
+    async def async_profile_service(call: ServiceCall) -> ServiceResponse:
+        """Profile the integration, write the reports to the config directory."""
+        return await async_profile(hass, call.data["seconds"], call.data.get("turns"))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_TRACES,
+        async_export_traces,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_FLIGHT_RECORDER,
+        async_dump_flight_recorder,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile_service,
+        schema=vol.Schema(
+            {
+                vol.Optional("seconds", default=PROFILE_DEFAULT_SECONDS): vol.All(
+                    vol.Coerce(float), vol.Range(min=1, max=PROFILE_MAX_SECONDS)
+                ),
+                vol.Optional("turns"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: YanfengAIConfigEntry) -> bool:
     """Set up Yanfeng AI Task from a config entry."""
 
+    # Fault injection for resilience testing, see chaos.py
+    chaos = None
+    if profile_file := (entry.options.get(CONF_CHAOS_PROFILE) or "").strip():
+        try:
+            profile = await hass.async_add_executor_job(
+                load_profile, hass.config.path(profile_file)
+            )
+        except (OSError, ValueError, vol.Invalid) as err:
+            raise ConfigEntryError(f"Invalid chaos profile {profile_file}: {err}") from err
+        LOGGER.warning(
+            "Fault injection enabled with %s, ModelScope requests will fail on purpose",
+            profile_file,
+        )
+        chaos = ChaosInjector(profile)
+
+    # Debug mode reporting code that blocks the event loop, see blocking.py
+    blocking = None
+    if entry.options.get(CONF_BLOCKING_DETECTOR, DEFAULT_BLOCKING_DETECTOR):
+        blocking = BlockingDetector(hass.loop)
+        blocking.start()
+        entry.async_on_unload(blocking.stop)
+
     # Create HTTP session
     session = aiohttp.ClientSession(
         timeout=aiohttp.ClientTimeout(total=TIMEOUT_SECONDS)
     )
 
-    # Test API connection
-    if not await _test_api_connection(session, entry.data[CONF_API_KEY]):
+    # Test the chat providers, local servers used first before ModelScope
+    if not await _async_test_chat_providers(session, entry):
         LOGGER.error("API connection test failed")
         await session.close()
-        raise ConfigEntryNotReady("Failed to connect to ModelScope API")
+        raise ConfigEntryNotReady("Failed to connect to any chat provider")
 
     LOGGER.info("API connection test successful")
 
-    entry.runtime_data = session
+    # Build the pinyin entity name index used by Layer 1
+    entity_index = EntityNameIndex(hass)
+    await entity_index.async_setup()
+    entry.async_on_unload(entity_index.async_shutdown)
+
+    usage = TokenUsageTracker(hass, entry.entry_id)
+    await usage.async_load()
+
+    # Key of the utterance hashes in the flight recorder, created once per entry
+    if CONF_RECORDER_KEY not in entry.data:
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_RECORDER_KEY: secrets.token_hex(32)}
+        )
+
+    entry.runtime_data = YanfengAIRuntimeData(
+        session=session,
+        entity_index=entity_index,
+        usage=usage,
+        chaos=chaos,
+        blocking=blocking,
+        flight_recorder=FlightRecorder(
+            hass,
+            hass.config.path(FLIGHT_RECORDER_FILE)
+            if entry.options.get(CONF_FLIGHT_RECORDER_FILE, DEFAULT_FLIGHT_RECORDER_FILE)
+            else None,
+            record_text=entry.options.get(
+                CONF_RECORD_UTTERANCES, DEFAULT_RECORD_UTTERANCES
+            ),
+            hash_key=bytes.fromhex(entry.data[CONF_RECORDER_KEY]),
+        ),
+    )
 
     # Set up platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -87,12 +262,76 @@ async def async_unload_entry(hass: HomeAssistant, entry: YanfengAIConfigEntry) -
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok:
-        session = entry.runtime_data
-        await session.close()
+        await entry.runtime_data.usage.async_save()
+        await entry.runtime_data.session.close()
     
     return unload_ok
 
 
+def _local_servers(
+    entry: YanfengAIConfigEntry,
+) -> tuple[list[tuple[str, str | None]], list[tuple[str, str | None]]]:
+    """Return the (base_url, api_key) of local servers used first and as failover."""
+    primary: list[tuple[str, str | None]] = []
+    failover: list[tuple[str, str | None]] = []
+    for subentry in entry.subentries.values():
+        provider = subentry.data.get(CONF_CHAT_PROVIDER, DEFAULT_CHAT_PROVIDER)
+        base_url = (subentry.data.get(CONF_LOCAL_BASE_URL) or "").strip()
+        if provider == PROVIDER_MODELSCOPE or not base_url:
+            continue
+        server = (base_url, subentry.data.get(CONF_LOCAL_API_KEY))
+        if server not in primary and server not in failover:
+            (primary if provider == PROVIDER_LOCAL_PRIMARY else failover).append(server)
+    return primary, failover
+
+
+async def _async_test_chat_providers(
+    session: aiohttp.ClientSession, entry: YanfengAIConfigEntry
+) -> bool:
+    """Return True if a chat provider the subentries use is reachable.
+
+    Local servers used first are tried before ModelScope, and a ModelScope
+    outage doesn't block setup while a local failover server answers.
+    """
+    primary, failover = _local_servers(entry)
+    for base_url, api_key in primary:
+        if await _test_local_connection(session, base_url, api_key):
+            return True
+
+    if await _test_api_connection(session, entry.data[CONF_API_KEY]):
+        return True
+
+    for base_url, api_key in failover:
+        if await _test_local_connection(session, base_url, api_key):
+            LOGGER.warning(
+                "ModelScope API is unreachable, chat fails over to %s", base_url
+            )
+            return True
+    return False
+
+
+async def _test_local_connection(
+    session: aiohttp.ClientSession, base_url: str, api_key: str | None
+) -> bool:
+    """Test an OpenAI-compatible server by listing its models."""
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    try:
+        async with session.get(
+            f"{base_url.rstrip('/')}/models", headers=headers
+        ) as response:
+            if response.status == 200:
+                LOGGER.info("Local chat server %s connection successful", base_url)
+                return True
+            LOGGER.error(
+                "Local chat server %s test failed with status: %s",
+                base_url, response.status,
+            )
+            return False
+    except (aiohttp.ClientError, TimeoutError) as err:
+        LOGGER.error("Failed to test local chat server %s: %s", base_url, err)
+        return False
+
+
 async def _test_api_connection(session: aiohttp.ClientSession, api_key: str) -> bool:
     """Test the ModelScope API connection."""
     try:
@@ -13,6 +13,7 @@ from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 from homeassistant.util.json import json_loads
 
+from .blocking import watch_turn
 from .const import (
     CONF_CHAT_MODEL,
     CONF_CUSTOM_IMAGE_MODEL,
@@ -28,6 +29,8 @@ from .entity import (
     ERROR_GETTING_RESPONSE,
     YanfengAILLMBaseEntity,
 )
+from .flight_recorder import LAYER_IMAGE, note_layer
+from .profiler import profile_turn
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigSubentry
@@ -84,7 +87,18 @@ class YanfengAITaskEntity(
                     len(chat_log.content))
 
         try:
-            await self._async_handle_chat_log(chat_log, task.structure)
+            runtime_data = self.entry.runtime_data
+            with (
+                runtime_data.tracer.span(
+                    "ai_task_data", conversation_id=chat_log.conversation_id
+                ),
+                runtime_data.flight_recorder.turn(
+                    "ai_task_data", chat_log.conversation_id, task.instructions
+                ),
+                profile_turn(),
+                watch_turn(runtime_data.blocking),
+            ):
+                await self._async_handle_chat_log(chat_log, task.structure)
         except Exception as err:
             LOGGER.error("Error in _async_handle_chat_log: %s", err, exc_info=True)
             raise HomeAssistantError(f"Error processing chat: {err}") from err
@@ -212,13 +226,29 @@ class YanfengAITaskEntity(
 
         try:
             # Use image generation model
-            response = await self.client.generate_image(
-                model=image_model,
-                prompt=prompt,
-                image_url=image_url,
-                size="1024*1024",
-                n=1,
-            )
+            runtime_data = self.entry.runtime_data
+            with (
+                runtime_data.tracer.span(
+                    "ai_task_image",
+                    conversation_id=chat_log.conversation_id,
+                    model=image_model,
+                    edit=image_url is not None,
+                ),
+                runtime_data.flight_recorder.turn(
+                    "ai_task_image", chat_log.conversation_id, prompt
+                ) as record,
+                profile_turn(),
+                watch_turn(runtime_data.blocking),
+            ):
+                record.model = image_model
+                note_layer(LAYER_IMAGE)
+                response = await self.client.generate_image(
+                    model=image_model,
+                    prompt=prompt,
+                    image_url=image_url,
+                    size="1024*1024",
+                    n=1,
+                )
 
             # Extract image URLs from ModelScope response
             image_urls = []
@@ -0,0 +1,199 @@
+"""Event loop blocking detector for the Yanfeng AI Task integration.
+
+A debug mode, enabled in the entry options, that watches the event loop
+while one of the integration's turns is in progress:
+
+- a heartbeat callback on the loop measures the loop lag, i.e. how late it
+  runs compared to when it was scheduled
+- a watchdog thread notices when the heartbeat stops for longer than the
+  threshold and records the stack of the loop thread at that moment, which
+  is the code blocking the loop (sync file I/O, YAML parsing, CPU work)
+
+Stalls are kept with their duration and stack for the diagnostics download,
+flagged when the stack goes through the integration's own files.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    BLOCKING_EVENTS_SIZE,
+    BLOCKING_STACK_DEPTH,
+    BLOCKING_THRESHOLD,
+    DOMAIN,
+    LOGGER,
+)
+from .metrics import LatencyHistogram
+
+_INTEGRATION_DIR = f"{os.sep}{DOMAIN}{os.sep}"
+
+
+@dataclass(slots=True)
+class BlockingEvent:
+    """One stretch of time the event loop was blocked during a turn."""
+
+    time: str
+    duration_ms: float
+    # Innermost frame in the integration's files, None if the stack has none
+    site: str | None
+    # "file:line function" from the outermost to the innermost frame
+    stack: list[str]
+
+
+class BlockingDetector:
+    """Measures the loop lag during turns and records what blocked the loop."""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        threshold: float = BLOCKING_THRESHOLD,
+    ) -> None:
+        """Initialize the detector, call start to run the watchdog."""
+        self._loop = loop
+        self.threshold = threshold
+        # Heartbeats several times per threshold, so a stall is seen in time
+        self._interval = threshold / 4
+        self._loop_thread_id: int | None = None
+        self._turns_running = 0
+        self.turns_watched = 0
+        self._heartbeat: asyncio.TimerHandle | None = None
+        self._expected = 0.0
+        self._last_beat = 0.0
+        # (last beat, stack) captured by the watchdog during a stall
+        self._captured: tuple[float, list[traceback.FrameSummary]] | None = None
+        self.lag = LatencyHistogram()
+        self.max_lag = 0.0
+        self.events: deque[BlockingEvent] = deque(maxlen=BLOCKING_EVENTS_SIZE)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the watchdog thread."""
+        self._thread = threading.Thread(
+            target=self._watch, name=f"{DOMAIN}_blocking_detector", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the watchdog thread and the heartbeat."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+
+    @contextmanager
+    def turn(self) -> Iterator[None]:
+        """Watch the event loop while a turn is in progress."""
+        if self._turns_running == 0:
+            self._loop_thread_id = threading.get_ident()
+            self._captured = None
+            self._schedule(time.monotonic())
+        self._turns_running += 1
+        try:
+            yield
+        finally:
+            self._turns_running -= 1
+            self.turns_watched += 1
+            if self._turns_running == 0 and self._heartbeat is not None:
+                self._heartbeat.cancel()
+                self._heartbeat = None
+
+    def _schedule(self, now: float) -> None:
+        """Schedule the next heartbeat."""
+        self._last_beat = now
+        self._expected = now + self._interval
+        self._heartbeat = self._loop.call_later(self._interval, self._beat)
+
+    def _beat(self) -> None:
+        """Measure how late the heartbeat ran, record a stall if too late."""
+        now = time.monotonic()
+        lag = max(0.0, now - self._expected)
+        self.lag.add(lag)
+        self.max_lag = max(self.max_lag, lag)
+
+        captured, self._captured = self._captured, None
+        if lag > self.threshold:
+            # The stack is only this stall's if captured since the last beat
+            stack = (
+                captured[1]
+                if captured is not None and captured[0] == self._last_beat
+                else []
+            )
+            self._record(lag, stack)
+        self._schedule(now)
+
+    def _record(self, lag: float, stack: list[traceback.FrameSummary]) -> None:
+        """Keep a stall, and log it if the integration's code blocked."""
+        frames = [f"{frame.filename}:{frame.lineno} {frame.name}" for frame in stack]
+        site = next(
+            (
+                formatted
+                for formatted, frame in zip(reversed(frames), reversed(stack))
+                if _INTEGRATION_DIR in frame.filename
+            ),
+            None,
+        )
+        self.events.append(
+            BlockingEvent(
+                time=dt_util.now().isoformat(),
+                duration_ms=round(lag * 1000, 1),
+                site=site,
+                stack=frames,
+            )
+        )
+        if site is not None:
+            LOGGER.warning("Event loop blocked for %.0f ms in %s", lag * 1000, site)
+        else:
+            LOGGER.debug(
+                "Event loop blocked for %.0f ms during a turn, outside %s",
+                lag * 1000,
+                DOMAIN,
+            )
+
+    def _watch(self) -> None:
+        """Capture the loop thread's stack when the heartbeat is overdue."""
+        while not self._stop.wait(self._interval):
+            if not self._turns_running or self._loop_thread_id is None:
+                continue
+            last_beat = self._last_beat
+            if time.monotonic() - self._expected < self.threshold:
+                continue
+            if self._captured is not None and self._captured[0] == last_beat:
+                continue  # Already captured this stall
+            if (frame := sys._current_frames().get(self._loop_thread_id)) is None:  # noqa: SLF001
+                continue
+            stack = traceback.extract_stack(frame, limit=BLOCKING_STACK_DEPTH)
+            self._captured = (last_beat, stack)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the loop lag and the recorded stalls."""
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "turns_watched": self.turns_watched,
+            "lag": self.lag.as_dict(),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "events": [asdict(event) for event in self.events],
+        }
+
+
+@contextmanager
+def watch_turn(detector: BlockingDetector | None) -> Iterator[None]:
+    """Watch the event loop during a turn, if the detector is enabled."""
+    if detector is None:
+        yield
+        return
+    with detector.turn():
+        yield
@@ -0,0 +1,181 @@
+"""Opt-in fault injection for the ModelScope client.
+
+Makes the client behave as during an outage, to check retries, hedging,
+the circuit breaker and turn timeouts without waiting for a real one:
+extra latency from a distribution, HTTP error codes (alone or in 429
+storms), truncated JSON bodies and image tasks that never finish. Draws
+come from a seeded random generator, so a profile replays the same faults
+for the same sequence of requests.
+
+Enabled by naming a profile JSON file in the config directory in the entry
+options, never by default.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+import json
+import random
+from typing import Any
+
+import voluptuous as vol
+
+# Endpoints faults can be injected into
+CHAOS_CHAT = "chat"
+CHAOS_IMAGE = "image"
+CHAOS_POLL = "poll"
+CHAOS_ENDPOINTS = (CHAOS_CHAT, CHAOS_IMAGE, CHAOS_POLL)
+
+# Logged instead of the response body of an injected error
+CHAOS_ERROR_TEXT = "injected by the chaos profile"
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+_RATE = vol.All(vol.Coerce(float), vol.Range(min=0, max=1))
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional("seed"): vol.Any(None, vol.Coerce(int)),
+        vol.Optional("endpoints"): vol.All(
+            [vol.In(CHAOS_ENDPOINTS)], vol.Length(min=1)
+        ),
+        vol.Optional("latency_distribution"): vol.In(LATENCY_DISTRIBUTIONS),
+        vol.Optional("latency_mean"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional("latency_spread"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional("error_rate"): _RATE,
+        vol.Optional("error_codes"): vol.All(
+            [vol.All(vol.Coerce(int), vol.Range(min=400, max=599))], vol.Length(min=1)
+        ),
+        vol.Optional("storm_rate"): _RATE,
+        vol.Optional("storm_length"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional("storm_status"): vol.All(vol.Coerce(int), vol.Range(min=400, max=599)),
+        vol.Optional("malformed_rate"): _RATE,
+        vol.Optional("stuck_task_rate"): _RATE,
+    }
+)
+
+
+@dataclass
+class ChaosProfile:
+    """Which faults to inject, and how often.
+
+    Latency is added to every request of the chosen endpoints:
+    - fixed:     latency_mean
+    - uniform:   latency_mean ± latency_spread
+    - normal:    mean latency_mean, standard deviation latency_spread
+    - lognormal: median latency_mean, sigma latency_spread (long tail)
+    """
+
+    seed: int | None = None
+    endpoints: list[str] = field(default_factory=lambda: list(CHAOS_ENDPOINTS))
+    latency_distribution: str = "fixed"
+    latency_mean: float = 0.0  # seconds
+    latency_spread: float = 0.0
+    # Share of requests failing with one of error_codes
+    error_rate: float = 0.0
+    error_codes: list[int] = field(default_factory=lambda: [500, 502, 503])
+    # Share of requests starting a storm: storm_length requests failing in a row
+    storm_rate: float = 0.0
+    storm_length: int = 20
+    storm_status: int = 429
+    # Share of responses whose JSON body is cut in half
+    malformed_rate: float = 0.0
+    # Share of image tasks that stay RUNNING forever
+    stuck_task_rate: float = 0.0
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ChaosProfile:
+        """Return the profile of a JSON object, raising vol.Invalid if malformed."""
+        return cls(**PROFILE_SCHEMA(data))
+
+
+def load_profile(path: str) -> ChaosProfile:
+    """Read a profile from a JSON file (blocking)."""
+    with open(path, encoding="utf-8") as file:
+        return ChaosProfile.from_dict(json.load(file))
+
+
+class ChaosInjector:
+    """Draws the faults of a profile for each request."""
+
+    def __init__(self, profile: ChaosProfile) -> None:
+        """Initialize the injector."""
+        self.profile = profile
+        self._random = random.Random(profile.seed)
+        self._storm_left = 0
+        self._stuck_tasks: dict[str, bool] = {}
+        # Faults injected so far, for diagnostics and benchmarks
+        self.injected: Counter[str] = Counter()
+
+    def _latency(self) -> float:
+        """Draw the latency to add to a request, in seconds."""
+        profile = self.profile
+        mean, spread = profile.latency_mean, profile.latency_spread
+        if profile.latency_distribution == "uniform":
+            delay = self._random.uniform(mean - spread, mean + spread)
+        elif profile.latency_distribution == "normal":
+            delay = self._random.gauss(mean, spread)
+        elif profile.latency_distribution == "lognormal":
+            delay = mean * self._random.lognormvariate(0, spread)
+        else:
+            delay = mean
+        return max(0.0, delay)
+
+    async def async_inject(self, endpoint: str) -> int | None:
+        """Sleep the injected latency, return an HTTP error status to fail with.
+
+        Returns None if the request should go ahead.
+        """
+        profile = self.profile
+        if endpoint not in profile.endpoints:
+            return None
+
+        if (delay := self._latency()) > 0:
+            self.injected["latency"] += 1
+            await asyncio.sleep(delay)
+
+        if self._storm_left:
+            self._storm_left -= 1
+            status = profile.storm_status
+        elif profile.storm_rate and self._random.random() < profile.storm_rate:
+            self._storm_left = profile.storm_length - 1
+            self.injected["storms"] += 1
+            status = profile.storm_status
+        elif profile.error_rate and self._random.random() < profile.error_rate:
+            status = self._random.choice(profile.error_codes)
+        else:
+            return None
+
+        self.injected[f"status_{status}"] += 1
+        return status
+
+    def corrupt(self, endpoint: str, body: str) -> str:
+        """Return the response body, truncated mid-JSON at the malformed rate."""
+        profile = self.profile
+        if (
+            endpoint in profile.endpoints
+            and profile.malformed_rate
+            and self._random.random() < profile.malformed_rate
+        ):
+            self.injected["malformed"] += 1
+            return body[: len(body) // 2]
+        return body
+
+    def is_stuck(self, task_id: str) -> bool:
+        """Return True for an image task that never finishes, decided once per task."""
+        if CHAOS_POLL not in self.profile.endpoints:
+            return False
+        if task_id not in self._stuck_tasks:
+            stuck = bool(self.profile.stuck_task_rate) and (
+                self._random.random() < self.profile.stuck_task_rate
+            )
+            self._stuck_tasks[task_id] = stuck
+            if stuck:
+                self.injected["stuck_tasks"] += 1
+        return self._stuck_tasks[task_id]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the profile and the faults injected so far."""
+        return {"profile": asdict(self.profile), "injected": dict(self.injected)}
@@ -20,6 +20,7 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import llm
 from homeassistant.helpers.selector import (
+    BooleanSelector,
     SelectSelector,
     SelectSelectorConfig,
     SelectSelectorMode,
@@ -30,21 +31,43 @@ from homeassistant.helpers.selector import (
 )
 
 from .const import (
+    CONF_BLOCKING_DETECTOR,
+    CONF_CHAOS_PROFILE,
     CONF_CHAT_MODEL,
+    CONF_CHAT_PROVIDER,
     CONF_CUSTOM_CHAT_MODEL,
     CONF_CUSTOM_IMAGE_MODEL,
+    CONF_FALLBACK_CHAT_MODEL,
+    CONF_FAST_CHAT_MODEL,
+    CONF_FLIGHT_RECORDER_FILE,
     CONF_IMAGE_MODEL,
+    CONF_LOCAL_API_KEY,
+    CONF_LOCAL_BASE_URL,
+    CONF_LOCAL_MODEL,
     CONF_MAX_TOKENS,
+    CONF_OPTIMISTIC_ACK,
     CONF_PROMPT,
     CONF_RECOMMENDED,
+    CONF_RECORD_UTTERANCES,
     CONF_RESPONSE_MODE,
+    CONF_SPECULATIVE_LLM,
     CONF_TEMPERATURE,
     CONF_TOP_P,
+    CONF_TURN_TIMEOUT,
+    CONF_VISION_CHAT_MODEL,
     DEFAULT_AI_TASK_NAME,
+    DEFAULT_AI_TASK_TIMEOUT,
+    DEFAULT_CHAT_PROVIDER,
     DEFAULT_CONVERSATION_NAME,
+    DEFAULT_CONVERSATION_TIMEOUT,
+    DEFAULT_BLOCKING_DETECTOR,
+    DEFAULT_FLIGHT_RECORDER_FILE,
     DEFAULT_MAX_TOKENS,
+    DEFAULT_OPTIMISTIC_ACK,
     DEFAULT_PROMPT,
+    DEFAULT_RECORD_UTTERANCES,
     DEFAULT_RESPONSE_MODE,
+    DEFAULT_SPECULATIVE_LLM,
     DEFAULT_TEMPERATURE,
     DEFAULT_TITLE,
     DEFAULT_TOP_P,
@@ -54,6 +77,7 @@ from .const import (
     RECOMMENDED_CHAT_MODEL,
     RECOMMENDED_CONVERSATION_OPTIONS,
     RECOMMENDED_IMAGE_MODEL,
+    RECOMMENDED_VISION_MODEL,
     RESPONSE_MODES,
     SUPPORTED_CHAT_MODELS,
     SUPPORTED_IMAGE_MODELS,
@@ -254,6 +278,13 @@ class YanfengAISubentryFlowHandler(ConfigSubentryFlow):
         if isinstance(suggested_llm_apis, str):
             suggested_llm_apis = [suggested_llm_apis]
 
+        # AI tasks may take longer than a conversation turn
+        default_turn_timeout = (
+            DEFAULT_AI_TASK_TIMEOUT
+            if self._subentry_type == "ai_task_data"
+            else DEFAULT_CONVERSATION_TIMEOUT
+        )
+
         return self.async_show_form(
             step_id="set_options",
             data_schema=vol.Schema(
@@ -283,6 +314,14 @@ class YanfengAISubentryFlowHandler(ConfigSubentryFlow):
                             mode=SelectSelectorMode.DROPDOWN,
                         )
                     ),
+                    vol.Optional(
+                        CONF_OPTIMISTIC_ACK,
+                        default=options.get(CONF_OPTIMISTIC_ACK, DEFAULT_OPTIMISTIC_ACK),
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_SPECULATIVE_LLM,
+                        default=options.get(CONF_SPECULATIVE_LLM, DEFAULT_SPECULATIVE_LLM),
+                    ): BooleanSelector(),
                     vol.Optional(
                         CONF_CHAT_MODEL,
                         default=options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL),
@@ -298,6 +337,59 @@ class YanfengAISubentryFlowHandler(ConfigSubentryFlow):
                     ): TextSelector(
                         TextSelectorConfig(type=TextSelectorType.TEXT)
                     ),
+                    vol.Optional(
+                        CONF_FALLBACK_CHAT_MODEL,
+                        description={"suggested_value": options.get(CONF_FALLBACK_CHAT_MODEL, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.TEXT)
+                    ),
+                    vol.Optional(
+                        CONF_FAST_CHAT_MODEL,
+                        description={"suggested_value": options.get(CONF_FAST_CHAT_MODEL, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.TEXT)
+                    ),
+                    vol.Optional(
+                        CONF_VISION_CHAT_MODEL,
+                        description={
+                            "suggested_value": options.get(
+                                CONF_VISION_CHAT_MODEL, RECOMMENDED_VISION_MODEL
+                            )
+                        },
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.TEXT)
+                    ),
+                    vol.Optional(
+                        CONF_CHAT_PROVIDER,
+                        default=options.get(CONF_CHAT_PROVIDER, DEFAULT_CHAT_PROVIDER),
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=[
+                                {"label": "仅 ModelScope", "value": "modelscope"},
+                                {"label": "ModelScope 优先，失败时用本地服务", "value": "local_failover"},
+                                {"label": "本地服务优先，失败时用 ModelScope", "value": "local_primary"},
+                            ],
+                            mode=SelectSelectorMode.DROPDOWN,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_LOCAL_BASE_URL,
+                        description={"suggested_value": options.get(CONF_LOCAL_BASE_URL, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.URL)
+                    ),
+                    vol.Optional(
+                        CONF_LOCAL_MODEL,
+                        description={"suggested_value": options.get(CONF_LOCAL_MODEL, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.TEXT)
+                    ),
+                    vol.Optional(
+                        CONF_LOCAL_API_KEY,
+                        description={"suggested_value": options.get(CONF_LOCAL_API_KEY, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.PASSWORD)
+                    ),
                     vol.Optional(
                         CONF_IMAGE_MODEL,
                         default=options.get(CONF_IMAGE_MODEL, RECOMMENDED_IMAGE_MODEL),
@@ -325,6 +417,10 @@ class YanfengAISubentryFlowHandler(ConfigSubentryFlow):
                         CONF_MAX_TOKENS,
                         default=options.get(CONF_MAX_TOKENS, DEFAULT_MAX_TOKENS),
                     ): vol.All(vol.Coerce(int), vol.Range(min=1, max=8192)),
+                    vol.Optional(
+                        CONF_TURN_TIMEOUT,
+                        default=options.get(CONF_TURN_TIMEOUT, default_turn_timeout),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=600)),
                 }
             ),
         )
@@ -406,6 +502,14 @@ class YanfengAITaskOptionsFlow(OptionsFlow):
                             mode=SelectSelectorMode.DROPDOWN,
                         )
                     ),
+                    vol.Optional(
+                        CONF_OPTIMISTIC_ACK,
+                        default=options.get(CONF_OPTIMISTIC_ACK, DEFAULT_OPTIMISTIC_ACK),
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_SPECULATIVE_LLM,
+                        default=options.get(CONF_SPECULATIVE_LLM, DEFAULT_SPECULATIVE_LLM),
+                    ): BooleanSelector(),
                     vol.Optional(
                         CONF_CHAT_MODEL,
                         default=options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL),
@@ -421,6 +525,59 @@ class YanfengAITaskOptionsFlow(OptionsFlow):
                     ): TextSelector(
                         TextSelectorConfig(type=TextSelectorType.TEXT)
                     ),
+                    vol.Optional(
+                        CONF_FALLBACK_CHAT_MODEL,
+                        description={"suggested_value": options.get(CONF_FALLBACK_CHAT_MODEL, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.TEXT)
+                    ),
+                    vol.Optional(
+                        CONF_FAST_CHAT_MODEL,
+                        description={"suggested_value": options.get(CONF_FAST_CHAT_MODEL, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.TEXT)
+                    ),
+                    vol.Optional(
+                        CONF_VISION_CHAT_MODEL,
+                        description={
+                            "suggested_value": options.get(
+                                CONF_VISION_CHAT_MODEL, RECOMMENDED_VISION_MODEL
+                            )
+                        },
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.TEXT)
+                    ),
+                    vol.Optional(
+                        CONF_CHAT_PROVIDER,
+                        default=options.get(CONF_CHAT_PROVIDER, DEFAULT_CHAT_PROVIDER),
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=[
+                                {"label": "仅 ModelScope", "value": "modelscope"},
+                                {"label": "ModelScope 优先，失败时用本地服务", "value": "local_failover"},
+                                {"label": "本地服务优先，失败时用 ModelScope", "value": "local_primary"},
+                            ],
+                            mode=SelectSelectorMode.DROPDOWN,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_LOCAL_BASE_URL,
+                        description={"suggested_value": options.get(CONF_LOCAL_BASE_URL, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.URL)
+                    ),
+                    vol.Optional(
+                        CONF_LOCAL_MODEL,
+                        description={"suggested_value": options.get(CONF_LOCAL_MODEL, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.TEXT)
+                    ),
+                    vol.Optional(
+                        CONF_LOCAL_API_KEY,
+                        description={"suggested_value": options.get(CONF_LOCAL_API_KEY, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.PASSWORD)
+                    ),
                     vol.Optional(
                         CONF_IMAGE_MODEL,
                         default=options.get(CONF_IMAGE_MODEL, RECOMMENDED_IMAGE_MODEL),
@@ -448,6 +605,28 @@ class YanfengAITaskOptionsFlow(OptionsFlow):
                         CONF_MAX_TOKENS,
                         default=options.get(CONF_MAX_TOKENS, DEFAULT_MAX_TOKENS),
                     ): vol.All(vol.Coerce(int), vol.Range(min=1, max=8192)),
+                    vol.Optional(
+                        CONF_RECORD_UTTERANCES,
+                        default=options.get(CONF_RECORD_UTTERANCES, DEFAULT_RECORD_UTTERANCES),
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_FLIGHT_RECORDER_FILE,
+                        default=options.get(
+                            CONF_FLIGHT_RECORDER_FILE, DEFAULT_FLIGHT_RECORDER_FILE
+                        ),
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_BLOCKING_DETECTOR,
+                        default=options.get(
+                            CONF_BLOCKING_DETECTOR, DEFAULT_BLOCKING_DETECTOR
+                        ),
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_CHAOS_PROFILE,
+                        description={"suggested_value": options.get(CONF_CHAOS_PROFILE, "")},
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.TEXT)
+                    ),
                 }
             ),
         )
\ No newline at end of file
@@ -17,10 +17,25 @@ CONF_TOP_P = "top_p"
 CONF_MAX_TOKENS = "max_tokens"
 CONF_CHAT_MODEL = "chat_model"
 CONF_CUSTOM_CHAT_MODEL = "custom_chat_model"  # 自定义聊天模型
+CONF_FALLBACK_CHAT_MODEL = "fallback_chat_model"  # 主模型慢或故障时的备用模型
+CONF_FAST_CHAT_MODEL = "fast_chat_model"  # 简单对话使用的小模型
+CONF_VISION_CHAT_MODEL = "vision_chat_model"  # 带图片附件时使用的 VL 模型
+CONF_CHAT_PROVIDER = "chat_provider"  # 对话后端：ModelScope / 局域网 OpenAI 兼容服务
+CONF_LOCAL_BASE_URL = "local_base_url"  # 例如 http://192.168.1.10:8080/v1
+CONF_LOCAL_MODEL = "local_model"
+CONF_LOCAL_API_KEY = "local_api_key"
+CONF_TURN_TIMEOUT = "turn_timeout"  # 每轮对话/AI 任务的总时限（秒）
 CONF_IMAGE_MODEL = "image_model"
 CONF_CUSTOM_IMAGE_MODEL = "custom_image_model"  # 自定义图像模型
 CONF_RECOMMENDED = "recommended"
 CONF_RESPONSE_MODE = "response_mode"  # 第一层响应模式
+CONF_OPTIMISTIC_ACK = "optimistic_ack"  # 先回复，后台确认设备状态
+CONF_SPECULATIVE_LLM = "speculative_llm"  # 第一层执行时提前请求 LLM
+CONF_RECORD_UTTERANCES = "record_utterances"  # 飞行记录器保存原文（默认只保存哈希）
+CONF_RECORDER_KEY = "flight_recorder_key"  # 飞行记录器哈希原文用的随机密钥（每次安装生成）
+CONF_FLIGHT_RECORDER_FILE = "flight_recorder_file"  # 飞行记录器同时写入文件
+CONF_CHAOS_PROFILE = "chaos_profile"  # 故障注入配置文件（配置目录下的 JSON），仅用于测试
+CONF_BLOCKING_DETECTOR = "blocking_detector"  # 调试：检测对话期间阻塞事件循环的代码
 
 # Default values
 DEFAULT_TITLE = "Yanfeng AI Task"
@@ -30,6 +45,12 @@ DEFAULT_TEMPERATURE = 0.7
 DEFAULT_TOP_P = 0.9
 DEFAULT_MAX_TOKENS = 2048
 DEFAULT_RESPONSE_MODE = "friendly"  # 默认响应模式：友好模式
+DEFAULT_OPTIMISTIC_ACK = False
+DEFAULT_SPECULATIVE_LLM = False
+DEFAULT_RECORD_UTTERANCES = False
+DEFAULT_FLIGHT_RECORDER_FILE = False
+DEFAULT_BLOCKING_DETECTOR = False
+DEFAULT_CHAT_PROVIDER = "modelscope"
 
 # Default Chinese-optimized prompt for Home Assistant
 DEFAULT_PROMPT = """你是一个专业的智能家居助手，运行在 Home Assistant 系统中。
@@ -68,6 +89,17 @@ DEFAULT_PROMPT = """你是一个专业的智能家居助手，运行在 Home Ass
 # ModelScope API-Inference base URL
 MODELSCOPE_API_BASE = "https://api-inference.modelscope.cn/"
 
+# Chat providers, the OpenAI-compatible local server is an optional addition
+PROVIDER_MODELSCOPE = "modelscope"  # 只用 ModelScope
+PROVIDER_LOCAL_FAILOVER = "local_failover"  # ModelScope 优先，失败时用本地服务
+PROVIDER_LOCAL_PRIMARY = "local_primary"  # 本地服务优先，失败时用 ModelScope
+
+CHAT_PROVIDERS = [
+    PROVIDER_MODELSCOPE,
+    PROVIDER_LOCAL_FAILOVER,
+    PROVIDER_LOCAL_PRIMARY,
+]
+
 # Supported models (ModelScope only)
 SUPPORTED_CHAT_MODELS = [
     "Qwen/Qwen2.5-72B-Instruct",
@@ -88,6 +120,7 @@ IMAGE_EDITING_MODELS = [
 # Recommended models
 # Note: Use pure text models for function calling, not VL (Vision-Language) models
 RECOMMENDED_CHAT_MODEL = "Qwen/Qwen2.5-72B-Instruct"  # Best for function calling
+RECOMMENDED_VISION_MODEL = "Qwen/Qwen3-VL-235B-A22B-Instruct"  # For image attachments
 RECOMMENDED_IMAGE_MODEL = "Qwen/Qwen-Image"
 
 # Task polling settings
@@ -123,10 +156,88 @@ RECOMMENDED_AI_TASK_OPTIONS = {
 }
 
 # Timeout settings
-TIMEOUT_SECONDS = 30
+TIMEOUT_SECONDS = 30  # per HTTP request
+# Default deadline of a whole turn, LLM iterations and tool calls included
+DEFAULT_CONVERSATION_TIMEOUT = 20
+DEFAULT_AI_TASK_TIMEOUT = 60
+# Max seconds for one tool call, taken from the turn's remaining time
+TOOL_CALL_TIMEOUT = 10
+# Provider failover: share of the turn timeout one request to the first provider
+# may take, so that a stalled request still leaves the second one time
+FAILOVER_ATTEMPT_SHARE = 0.4
+
+# Bulk device control: max concurrent per-entity service calls
+BULK_MAX_CONCURRENCY = 8
+
+# Layer 1 follow-up context: seconds a turn is remembered, max conversations
+CONVERSATION_CONTEXT_TTL = 300
+CONVERSATION_CONTEXT_MAX = 64
+
+# Optimistic acknowledgement: seconds to wait for the confirming state change
+ACTUATION_VERIFY_TIMEOUT = 10
+# Fired when an optimistically acknowledged call did not take effect
+EVENT_ACTUATION_FAILED = f"{DOMAIN}_actuation_failed"
+
+# Speculative LLM requests: at most this many per window (seconds), per entry
+SPECULATION_MAX_REQUESTS = 10
+SPECULATION_WINDOW = 60
+
+# Hedged chat requests: latency samples kept per model, samples needed before
+# the p95 is trusted, and the hedge delay (seconds) until then
+HEDGE_LATENCY_WINDOW = 50
+HEDGE_MIN_SAMPLES = 10
+HEDGE_DEFAULT_DELAY = 8
+# Circuit breaker: consecutive failures that mark a model degraded, for how long
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_OPEN_SECONDS = 60
+
+# Latency metrics: samples kept per stage for the p50/p95/p99
+METRICS_WINDOW = 200
+
+# Tracing: spans kept in memory, share of ordinary traces kept, and the turn
+# duration (seconds) above which a trace is always kept
+TRACE_BUFFER_SIZE = 2000
+TRACE_SAMPLE_RATE = 0.1
+TRACE_SLOW_SECONDS = 5
+
+# Flight recorder: turns kept in memory, and the size (bytes) at which the
+# optional JSONL file is rotated to a single .1 backup
+FLIGHT_RECORDER_SIZE = 500
+FLIGHT_RECORDER_FILE = "yanfeng_ai_task_flight_recorder.jsonl"
+FLIGHT_RECORDER_FILE_MAX_BYTES = 5 * 1024 * 1024
+
+# Blocking detector: loop lag (seconds) counted as blocking, stalls kept for
+# diagnostics, and frames kept per stack
+BLOCKING_THRESHOLD = 0.1
+BLOCKING_EVENTS_SIZE = 50
+BLOCKING_STACK_DEPTH = 30
+
+# Token usage: storage version, and seconds to batch saves of the totals
+USAGE_STORAGE_VERSION = 1
+USAGE_SAVE_DELAY = 60
+
+# Services
+SERVICE_EXPORT_TRACES = "export_traces"
+SERVICE_DUMP_FLIGHT_RECORDER = "dump_flight_recorder"
+SERVICE_PROFILE = "profile"
+# JSONL file in the config directory that exported spans are appended to
+TRACES_FILE = "yanfeng_ai_task_traces.jsonl"
+# Profile service: directory in the config directory for the reports, default
+# and max duration (seconds), tracemalloc frames kept, lines per report section
+PROFILES_DIR = "yanfeng_ai_task_profiles"
+PROFILE_DEFAULT_SECONDS = 60
+PROFILE_MAX_SECONDS = 3600
+PROFILE_TRACEMALLOC_FRAMES = 25
+PROFILE_REPORT_LINES = 50
+
+# Model routing: limits for a turn to go to the fast chat model
+ROUTER_FAST_MAX_LENGTH = 30  # characters of the user message
+ROUTER_FAST_MAX_ACTIONS = 1  # device actions, more means several tool calls
+ROUTER_FAST_MAX_HISTORY = 3  # user turns in the conversation so far
 
 # Error messages
 ERROR_API_KEY_REQUIRED = "API key is required"
 ERROR_MODEL_NOT_SUPPORTED = "Model not supported"
 ERROR_GETTING_RESPONSE = "Error getting response from ModelScope API"
-ERROR_INVALID_RESPONSE = "Invalid response from ModelScope API"
\ No newline at end of file
+ERROR_INVALID_RESPONSE = "Invalid response from ModelScope API"
+ERROR_TURN_TIMEOUT = "Timed out waiting for a response"
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""Per-conversation context for Layer 1 follow-up commands.
+
+Remembers what the last Layer 1 turn of a conversation controlled, so that
+"把它关掉" (pronoun), "再调高一点" (no target) and "还有卧室的" (ellipsis)
+can stay on the fast path instead of going to the LLM.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import re
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import CONVERSATION_CONTEXT_MAX, CONVERSATION_CONTEXT_TTL
+from .entity_index import EntityNameIndex, normalize_text
+from .executor import BulkCall, async_resolve_targets, find_area
+from .slot_filling import extract_numeric_slot, strip_slot_words
+
+# Pronouns that refer to the entities of the previous turn, longest first.
+# 他/她/他们 refer to people ("给他开个玩笑"), never to devices
+_PRONOUNS = ("它们", "这些", "那些", "这个", "那个", "它")
+# "还有卧室的", "卧室的也是", "卧室呢"
+_ELLIPSIS_PATTERN = re.compile(
+    r"^(?:还有|那|那么|然后|再)?(?P<target>.+?)的?(?:也是|也要|也一样|也|呢|吧)?$"
+)
+_ELLIPSIS_MARKERS = ("还有", "也", "呢")
+
+# Words that carry no target, left over in "再调高一点" or "关掉吧"
+_ACTION_WORDS = (
+    "打开", "开启", "启动", "拉开", "关闭", "关掉", "停止", "拉上", "合上", "开", "关",
+)
+_SPOKEN_ACTIONS = {
+    "turn_on": "打开", "open_cover": "打开", "turn_off": "关闭", "close_cover": "关闭",
+    "media_pause": "暂停", "media_play": "继续播放",
+}
+_FILLER_WORDS = (
+    "请", "帮我", "麻烦", "把", "将", "给我", "再", "也", "一下", "一点", "一些",
+    "吧", "了", "呢", "啊",
+)
+
+
+@dataclass(slots=True)
+class TurnContext:
+    """Entities and call of the last Layer 1 turn of a conversation."""
+
+    entity_ids: list[str]
+    domain: str
+    service: str
+    # Service data without entity_id, repeated for "卧室的也是"
+    data: dict[str, Any] = field(default_factory=dict)
+    updated: float = field(default_factory=time.monotonic)
+
+
+class ConversationContextStore:
+    """Small LRU of turn contexts keyed by conversation_id, with expiry."""
+
+    def __init__(
+        self,
+        ttl: float = CONVERSATION_CONTEXT_TTL,
+        max_size: int = CONVERSATION_CONTEXT_MAX,
+    ) -> None:
+        """Initialize the store."""
+        self._ttl = ttl
+        self._max_size = max_size
+        self._contexts: OrderedDict[str, TurnContext] = OrderedDict()
+
+    def get(self, conversation_id: str | None) -> TurnContext | None:
+        """Return the context of a conversation if it hasn't expired."""
+        if conversation_id is None or (
+            context := self._contexts.get(conversation_id)
+        ) is None:
+            return None
+
+        if time.monotonic() - context.updated > self._ttl:
+            del self._contexts[conversation_id]
+            return None
+        return context
+
+    def set(self, conversation_id: str | None, context: TurnContext) -> None:
+        """Store the context of a conversation, evicting the oldest."""
+        if conversation_id is None:
+            return
+
+        self._contexts[conversation_id] = context
+        self._contexts.move_to_end(conversation_id)
+        while len(self._contexts) > self._max_size:
+            self._contexts.popitem(last=False)
+
+
+def context_from_service_calls(
+    executed: list[dict[str, Any]],
+) -> TurnContext | None:
+    """Build the context of a turn from its executed Layer 1 service calls."""
+    entity_ids: list[str] = []
+    for service_info in executed:
+        if calls := service_info.get("bulk"):
+            entity_ids.extend(eid for call in calls for eid in call.entity_ids)
+        elif isinstance(entity_id := service_info["data"].get("entity_id"), str):
+            entity_ids.append(entity_id)
+
+    if not entity_ids:
+        return None
+
+    last = executed[-1]
+    if calls := last.get("bulk"):
+        data = dict(calls[0].data)
+    else:
+        data = {k: v for k, v in last["data"].items() if k != "entity_id"}
+
+    return TurnContext(
+        entity_ids=list(dict.fromkeys(entity_ids)),
+        domain=last["domain"],
+        service=last["service"],
+        data=data,
+    )
+
+
+def _is_action_phrase(clause: str) -> bool:
+    """Return True if a clause is an action or slot phrase and nothing else.
+
+    "关掉吧" and "再调高一点" are, "开个玩笑" and "开会的时间定了吗" are not.
+    """
+    if (slot := extract_numeric_slot(clause)) is not None:
+        clause = strip_slot_words(clause, slot)
+    elif not any(word in clause for word in _ACTION_WORDS):
+        return False
+    for word in (*_ACTION_WORDS, *_FILLER_WORDS):
+        clause = clause.replace(word, "")
+    return not normalize_text(clause)
+
+
+def follow_up_clauses(
+    clause: str, context: TurnContext, hass: HomeAssistant
+) -> list[str]:
+    """Rewrite a clause that refers to the previous turn into explicit clauses.
+
+    "把它关掉" becomes "把客厅灯关掉" and "再调高一点" becomes
+    "客厅空调再调高一点", once per entity of the previous turn. Returns an
+    empty list if the clause doesn't refer to the previous turn, i.e. unless
+    what remains without the pronoun is an action or slot phrase.
+    """
+    names = []
+    for entity_id in context.entity_ids:
+        state = hass.states.get(entity_id)
+        if state is None or not (name := state.attributes.get("friendly_name")):
+            return []
+        names.append(name)
+
+    if pronoun := next((p for p in _PRONOUNS if p in clause), None):
+        if not _is_action_phrase(clause.replace(pronoun, "", 1)):
+            return []
+        return [clause.replace(pronoun, name, 1) for name in names]
+
+    if _is_action_phrase(clause):
+        return [f"{name}{clause}" for name in names]
+
+    return []
+
+
+def extract_ellipsis_service_info(
+    clause: str,
+    context: TurnContext,
+    hass: HomeAssistant,
+    entity_index: EntityNameIndex | None = None,
+) -> dict[str, Any] | None:
+    """Repeat the previous call on a new target ("还有卧室的", "卧室的也是").
+
+    The target is looked up by name in the previous domain first, then by
+    area, in which case every entity of the domain in that area is used.
+    """
+    if not any(marker in clause for marker in _ELLIPSIS_MARKERS):
+        return None
+    if not (match := _ELLIPSIS_PATTERN.match(normalize_text(clause))):
+        return None
+
+    target = match.group("target")
+    domain = context.domain
+
+    entity_ids: list[str] = []
+    if entity_index is not None and (resolved := entity_index.resolve(domain, target)):
+        entity_ids = [resolved.entity_id]
+    elif area := find_area(hass, target):
+        entity_ids = [
+            state.entity_id
+            for state in async_resolve_targets(hass, domain, area_id=area.id)
+        ]
+
+    # Don't repeat the call on what was just controlled
+    entity_ids = [eid for eid in entity_ids if eid not in context.entity_ids]
+    if not entity_ids:
+        return None
+
+    names = []
+    for entity_id in entity_ids:
+        state = hass.states.get(entity_id)
+        names.append(
+            state.attributes.get("friendly_name", entity_id) if state else entity_id
+        )
+
+    action = _SPOKEN_ACTIONS.get(context.service, "设置好")
+    service_info: dict[str, Any] = {
+        "domain": domain,
+        "service": context.service,
+        "data": {},
+        "bulk": [BulkCall(domain, context.service, entity_ids, data=dict(context.data))],
+        "speech": f"{'、'.join(names)}也已{action}",
+    }
+    if len(entity_ids) == 1:
+        # Single targets go through the state-diff and speech paths of regular calls
+        service_info["data"] = {**context.data, "entity_id": entity_ids[0]}
+        del service_info["bulk"]
+    return service_info
@@ -2,27 +2,77 @@
 
 from __future__ import annotations
 
+import asyncio
 import re
+import time
 from typing import Any, Literal, Optional
 
 from homeassistant.components import conversation
 from homeassistant.config_entries import ConfigEntry, ConfigSubentry
 from homeassistant.const import CONF_LLM_HASS_API, MATCH_ALL
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import entity_registry, intent
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
+from .blocking import watch_turn
 from .const import (
+    CONF_OPTIMISTIC_ACK,
     CONF_PROMPT,
     CONF_RESPONSE_MODE,
+    CONF_SPECULATIVE_LLM,
+    DEFAULT_CONVERSATION_TIMEOUT,
+    DEFAULT_OPTIMISTIC_ACK,
     DEFAULT_RESPONSE_MODE,
+    DEFAULT_SPECULATIVE_LLM,
     DOMAIN,
     LOGGER,
     RESPONSE_MODE_FRIENDLY,
     RESPONSE_MODE_SILENT,
     RESPONSE_MODE_SIMPLE,
 )
+from .context import (
+    ConversationContextStore,
+    TurnContext,
+    context_from_service_calls,
+    extract_ellipsis_service_info,
+    follow_up_clauses,
+)
 from .entity import YanfengAILLMBaseEntity
+from .entity_index import EntityNameIndex, normalize_text
+from .executor import (
+    EXCLUDED_COVER_DEVICE_CLASSES,
+    BulkCall,
+    PlannedCall,
+    async_dispatch_verified,
+    async_execute_bulk,
+    async_resolve_targets,
+    cover_bulk_calls,
+    find_area,
+    is_redundant_call,
+)
+from .flight_recorder import (
+    LAYER_SERVICE_CALL,
+    LAYER_STATE_QUERY,
+    OUTCOME_ERROR,
+    note_layer,
+)
+from .media import find_active_media_player, match_media_command
+from .metrics import (
+    STAGE_LAYER1_DETECT,
+    STAGE_LAYER1_EXECUTE,
+    STAGE_LAYER1_EXTRACT,
+    STAGE_TURN,
+)
+from .profiler import profile_turn
+from .slot_filling import (
+    SlotValueError,
+    build_parameterized_service,
+    extract_numeric_slot,
+    slot_domains,
+    strip_slot_words,
+)
+from .state_query import answer_state_query, is_state_query
 
 
 def is_service_call(user_input: str) -> bool:
@@ -46,9 +96,13 @@ def is_service_call(user_input: str) -> bool:
             "select": ["选择", "下一个", "上一个", "第一个", "最后一个", "上1个", "下1个"],
             "trigger": ["触发", "调用"],
             "number": ["数字", "数值"],
+            "parameter": ["调到", "调成", "调高", "调低", "调亮", "调暗", "调大", "调小",
+                         "设为", "设置", "亮度", "温度", "风速", "%", "％", "百分之",
+                         "一半"],
             "media": ["暂停", "继续播放", "停止", "下一首", "下一曲", "下一个",
                      "切歌", "换歌", "上一首", "上一曲", "上一个", "返回上一首",
-                     "上1首", "上1曲", "上1个", "下1首", "下1曲", "下1个", "音量"]
+                     "上1首", "上1曲", "上1个", "下1首", "下1曲", "下1个", "音量",
+                     "静音", "大声", "小声"]
         }
     }
 
@@ -60,7 +114,205 @@ def is_service_call(user_input: str) -> bool:
     )
 
 
-def extract_service_info(user_input: str, hass: HomeAssistant) -> Optional[dict[str, Any]]:
+# Conjunctions and punctuation that separate independent commands, "和" and
+# "跟" also join nouns ("客厅和餐厅的灯"), see split_utterance
+_CLAUSE_SEPARATORS = re.compile(r"[，,。；;、]|然后|并且|而且|接着|同时|以及|还有|再把|和|跟")
+# Action words a clause without one can borrow from its neighbours, longest first
+_CLAUSE_ACTIONS = (
+    "打开", "开启", "启动", "拉开", "关闭", "关掉", "停止", "拉上", "合上", "开", "关",
+)
+# Nouns containing an action character, "开关" is a switch, not "开"
+_ACTION_LIKE_NOUNS = ("开关",)
+
+
+def _clause_action(clause: str) -> str | None:
+    """Return the action word of a clause, None if it has none."""
+    for noun in _ACTION_LIKE_NOUNS:
+        clause = clause.replace(noun, " ")
+    return next((action for action in _CLAUSE_ACTIONS if action in clause), None)
+
+
+def split_utterance(user_input: str) -> list[str]:
+    """Split a multi-command utterance into independently resolvable clauses.
+
+    Clauses without an action borrow one from the nearest clause, preferring
+    the previous one: "关掉客厅灯和卧室空调" becomes "关掉客厅灯" and
+    "关掉卧室空调", and "客厅灯和卧室灯调到50%" becomes "客厅灯调到50%" and
+    "卧室灯调到50%".
+
+    Modifiers coordinated in front of "X的Y" share its head and predicate:
+    "把客厅和餐厅的灯打开" becomes "把客厅的灯打开" and "餐厅的灯打开".
+    """
+    clauses = [
+        clause.strip()
+        for clause in _CLAUSE_SEPARATORS.split(user_input)
+        if clause and clause.strip()
+    ]
+    if len(clauses) < 2:
+        return [user_input]
+
+    actions = [_clause_action(clause) for clause in clauses]
+    slots = [extract_numeric_slot(clause) for clause in clauses]
+
+    # Distribute "的灯打开" of "餐厅的灯打开" to the bare modifiers before it
+    for i, clause in enumerate(clauses):
+        if actions[i] is not None or slots[i] is not None or "的" in clause:
+            continue
+        for j in range(i + 1, len(clauses)):
+            if "的" in clauses[j]:
+                modifier, _, head = clauses[j].partition("的")
+                # "客厅灯" already names its device, it only borrows below
+                if (
+                    _clause_action(modifier) is None
+                    and extract_numeric_slot(modifier) is None
+                    and not clause.endswith(head[:1])
+                ):
+                    clauses[i] = f"{clause}的{head}"
+                    actions[i], slots[i] = actions[j], slots[j]
+                break
+            if actions[j] is not None or slots[j] is not None:
+                break
+
+    result = []
+    for i, clause in enumerate(clauses):
+        if actions[i] is None and slots[i] is None:
+            neighbours = [*range(i - 1, -1, -1), *range(i + 1, len(clauses))]
+            for j in neighbours:
+                if (slot := slots[j]) is not None:
+                    # Borrow the predicate, e.g. "调到50%" from "卧室灯调到50%",
+                    # what follows the last word of the name ("餐厅的灯")
+                    predicate = clauses[j]
+                    if words := strip_slot_words(clauses[j], slot).split():
+                        end = clauses[j].find(slot.span) if slot.span else -1
+                        name_at = clauses[j].rfind(
+                            words[-1], 0, end if end >= 0 else len(clauses[j])
+                        )
+                        if name_at >= 0:
+                            predicate = clauses[j][name_at + len(words[-1]):]
+                    clause = f"{clause}{predicate}"
+                    break
+                if actions[j] is not None:
+                    clause = f"{actions[j]}{clause}"
+                    break
+        result.append(clause)
+
+    return result
+
+
+# Quantifiers that turn a command into a bulk command ("关闭所有灯")
+_BULK_QUANTIFIERS = ("所有", "全部", "全屋", "一切")
+# Domains a bulk command may target: (domain, keywords, spoken unit)
+_BULK_DOMAINS = (
+    ("light", ("灯", "light"), "灯"),
+    ("cover", ("窗帘", "卷帘", "cover"), "窗帘"),
+    ("switch", ("开关", "插座", "switch"), "开关"),
+    ("fan", ("风扇", "fan"), "风扇"),
+    ("climate", ("空调", "climate"), "空调"),
+)
+# Device classes a bulk command may name, checked before the domains:
+# (domain, keywords, device classes, spoken unit)
+_BULK_DEVICE_CLASSES = (
+    ("cover", ("车库门",), ("garage",), "车库门"),
+    ("cover", ("百叶窗", "百叶帘"), ("blind",), "百叶窗"),
+    ("cover", ("遮阳帘",), ("shade",), "遮阳帘"),
+    ("cover", ("遮阳篷",), ("awning",), "遮阳篷"),
+    ("cover", ("窗户",), ("window",), "窗户"),
+)
+
+
+def extract_bulk_service_info(
+    user_input: str, hass: HomeAssistant
+) -> Optional[dict[str, Any]]:
+    """Extract a bulk on/off command ("关闭客厅所有灯", "打开全部窗帘").
+
+    Returns a service info dict whose 'bulk' key holds the BulkCalls to run,
+    or None if the command names no known domain or matches no entities.
+    """
+    if not any(k in user_input for k in _BULK_QUANTIFIERS):
+        return None
+
+    # "开关" would otherwise read as "开"
+    action_text = user_input
+    for keywords in (
+        *(keywords for _, keywords, _ in _BULK_DOMAINS),
+        *(keywords for _, keywords, _, _ in _BULK_DEVICE_CLASSES),
+    ):
+        for keyword in keywords:
+            action_text = action_text.replace(keyword, " ")
+
+    if any(k in action_text for k in ["打开", "开启", "启动", "拉开", "开", "turn_on"]):
+        turn_on = True
+    elif any(k in action_text for k in ["关闭", "关掉", "停止", "拉上", "合上", "关", "turn_off"]):
+        turn_on = False
+    else:
+        return None
+
+    target = next(
+        (
+            (domain, device_classes, unit)
+            for domain, keywords, device_classes, unit in _BULK_DEVICE_CLASSES
+            if any(k in user_input for k in keywords)
+        ),
+        None,
+    ) or next(
+        (
+            (domain, None, unit)
+            for domain, keywords, unit in _BULK_DOMAINS
+            if any(k in user_input for k in keywords)
+        ),
+        None,
+    )
+    if target is None:
+        return None
+    domain, device_classes, unit = target
+
+    # A named device class is explicit, "打开所有车库门" may open garage doors
+    area = find_area(hass, user_input)
+    states = async_resolve_targets(
+        hass,
+        domain,
+        area_id=area.id if area else None,
+        device_classes=device_classes,
+        exclude_device_classes=(
+            EXCLUDED_COVER_DEVICE_CLASSES
+            if domain == "cover" and device_classes is None
+            else ()
+        ),
+    )
+    if not states:
+        return None
+
+    if domain == "cover":
+        calls = cover_bulk_calls(states, close=not turn_on)
+    else:
+        service = "turn_on" if turn_on else "turn_off"
+        calls = [
+            BulkCall(
+                domain,
+                service,
+                [
+                    state.entity_id for state in states
+                    if not is_redundant_call(state, service)
+                ],
+            )
+        ]
+
+    action = "打开" if turn_on else "关闭"
+    where = f"{area.name}的" if area else ""
+    return {
+        "domain": domain,
+        "service": calls[0].service,
+        "data": {},
+        "bulk": calls,
+        "speech": f"已{action}{where}{len(states)}个{unit}",
+    }
+
+
+def extract_service_info(
+    user_input: str,
+    hass: HomeAssistant,
+    entity_index: EntityNameIndex | None = None,
+) -> Optional[dict[str, Any]]:
     """Extract service call information from user input (Layer 1 extraction).
 
     Analyzes the user input to determine:
@@ -68,12 +320,45 @@ def extract_service_info(user_input: str, hass: HomeAssistant) -> Optional[dict[
     - What service to call (turn_on, turn_off, etc.)
     - What parameters to pass
 
-    Returns a dict with 'domain', 'service', 'data' keys, or None if extraction fails.
+    If an entity name index is given, entities are resolved by best-match
+    scoring (ambiguous names fall back to the LLM) with a homophone-tolerant
+    pinyin match as second chance. Without it, the first substring match wins.
+
+    Parameterized commands ("空调调到二十六度", "窗帘开一半") are handled by a
+    slot-filling stage before plain on/off detection.
+
+    Bulk commands ("关闭客厅所有灯") resolve to every matching entity, see
+    extract_bulk_service_info.
+
+    Media commands ("暂停", "下一首") without a player name go to the player
+    that is currently playing.
+
+    Returns a dict with 'domain', 'service', 'data' keys and optional
+    'speech' and 'bulk' keys, or None if extraction fails. Raises SlotValueError if a
+    parsed value is out of the target entity's range.
     """
 
     def find_entity(domain: str, text: str) -> Optional[str]:
-        """Find entity by friendly_name, entity_id, or alias."""
-        text = text.lower()
+        """Find entity by friendly_name, entity_id, alias or pinyin."""
+        text = normalize_text(text)
+        if not text:
+            return None
+
+        if entity_index is not None:
+            # Score all names at once and take the best, unambiguous match
+            if match := entity_index.resolve(domain, text):
+                LOGGER.debug(
+                    "Layer 1: Matched '%s' to %s (score %.2f)",
+                    text, match.entity_id, match.score,
+                )
+                return match.entity_id
+
+            # Second chance: homophone-tolerant pinyin match ("客厅等" -> "客厅灯")
+            if entity_id := entity_index.match(domain, text):
+                LOGGER.debug("Layer 1: Pinyin index matched '%s' to %s", text, entity_id)
+                return entity_id
+
+            return None
 
         # First pass: check friendly_name and entity_id
         for entity_id in hass.states.async_entity_ids(domain):
@@ -81,7 +366,7 @@ def extract_service_info(user_input: str, hass: HomeAssistant) -> Optional[dict[
             if not state:
                 continue
 
-            friendly_name = state.attributes.get("friendly_name", "").lower()
+            friendly_name = normalize_text(state.attributes.get("friendly_name", ""))
             entity_name = entity_id.split(".")[1].lower()
 
             if text in entity_name or text in friendly_name or \
@@ -94,13 +379,59 @@ def extract_service_info(user_input: str, hass: HomeAssistant) -> Optional[dict[
             reg_entity = ent_reg.async_get(entity_id)
             if reg_entity and hasattr(reg_entity, "aliases") and reg_entity.aliases:
                 for alias in reg_entity.aliases:
-                    if text in alias.lower() or alias.lower() in text:
+                    alias = normalize_text(alias)
+                    if text in alias or alias in text:
                         return entity_id
 
         return None
 
-    # Detect turn on/off actions
-    if any(k in user_input for k in ["打开", "开启", "启动", "开", "turn_on"]):
+    # Detect parameterized commands (temperature, brightness, position ...)
+    if (slot := extract_numeric_slot(user_input)) is not None:
+        name_text = strip_slot_words(user_input, slot)
+        for domain in slot_domains(user_input, slot):
+            entity_id = find_entity(domain, name_text)
+            if not entity_id and domain == "media_player":
+                # "音量调到30%" goes to the player that is playing
+                area = find_area(hass, user_input)
+                entity_id = find_active_media_player(hass, area.id if area else None)
+            if not entity_id or not (state := hass.states.get(entity_id)):
+                continue
+            if service_info := build_parameterized_service(state, slot):
+                return service_info
+
+        # Never fall through to on/off for "窗帘开一半" and friends
+        return None
+
+    # Detect bulk commands, which never fall through to a single entity
+    if any(k in user_input for k in _BULK_QUANTIFIERS):
+        return extract_bulk_service_info(user_input, hass)
+
+    # Detect media commands ("暂停", "下一首", "客厅音箱大声一点")
+    if (media := match_media_command(user_input)) is not None:
+        command, name_text = media
+        entity_id = find_entity("media_player", name_text)
+        if entity_id is None:
+            # No player named: the one playing in the named area, or anywhere
+            area = find_area(hass, user_input)
+            entity_id = find_active_media_player(hass, area.id if area else None)
+        if entity_id is None:
+            return None
+
+        state = hass.states.get(entity_id)
+        name = state.attributes.get("friendly_name") if state else None
+        return {
+            "domain": "media_player",
+            "service": command.service,
+            "data": {"entity_id": entity_id, **command.data},
+            "speech": command.speech.format(name=name or entity_id),
+        }
+
+    # Detect turn on/off actions, "开关" is a noun here
+    action_text = user_input
+    for noun in _ACTION_LIKE_NOUNS:
+        action_text = action_text.replace(noun, " ")
+
+    if any(k in action_text for k in ["打开", "开启", "启动", "拉开", "开", "turn_on"]):
         # Extract entity name (simplified version)
         # Try to find domain hints
         domains_to_try = []
@@ -113,6 +444,8 @@ def extract_service_info(user_input: str, hass: HomeAssistant) -> Optional[dict[
             domains_to_try.append("switch")
         if any(k in user_input for k in ["风扇", "fan"]):
             domains_to_try.append("fan")
+        if any(k in user_input for k in ["窗帘", "卷帘", "cover"]):
+            domains_to_try.append("cover")
 
         # If no domain hint, try common domains
         if not domains_to_try:
@@ -120,7 +453,7 @@ def extract_service_info(user_input: str, hass: HomeAssistant) -> Optional[dict[
 
         # Extract potential entity name (remove action keywords)
         cleaned_input = user_input
-        for keyword in ["打开", "开启", "启动", "请", "帮我", "麻烦", "把", "将", "开"]:
+        for keyword in ["打开", "开启", "启动", "拉开", "请", "帮我", "麻烦", "把", "将", "开"]:
             cleaned_input = cleaned_input.replace(keyword, " ")
         cleaned_input = cleaned_input.strip()
 
@@ -130,11 +463,11 @@ def extract_service_info(user_input: str, hass: HomeAssistant) -> Optional[dict[
             if entity_id:
                 return {
                     "domain": domain,
-                    "service": "turn_on",
+                    "service": "open_cover" if domain == "cover" else "turn_on",
                     "data": {"entity_id": entity_id}
                 }
 
-    elif any(k in user_input for k in ["关闭", "关掉", "停止", "关", "turn_off"]):
+    elif any(k in action_text for k in ["关闭", "关掉", "停止", "拉上", "合上", "关", "turn_off"]):
         # Similar logic for turn_off
         domains_to_try = []
 
@@ -146,12 +479,14 @@ def extract_service_info(user_input: str, hass: HomeAssistant) -> Optional[dict[
             domains_to_try.append("switch")
         if any(k in user_input for k in ["风扇", "fan"]):
             domains_to_try.append("fan")
+        if any(k in user_input for k in ["窗帘", "卷帘", "cover"]):
+            domains_to_try.append("cover")
 
         if not domains_to_try:
             domains_to_try = ["light", "switch", "climate", "fan", "cover"]
 
         cleaned_input = user_input
-        for keyword in ["关闭", "关掉", "停止", "请", "帮我", "麻烦", "把", "将", "关"]:
+        for keyword in ["关闭", "关掉", "停止", "拉上", "合上", "请", "帮我", "麻烦", "把", "将", "关"]:
             cleaned_input = cleaned_input.replace(keyword, " ")
         cleaned_input = cleaned_input.strip()
 
@@ -160,7 +495,7 @@ def extract_service_info(user_input: str, hass: HomeAssistant) -> Optional[dict[
             if entity_id:
                 return {
                     "domain": domain,
-                    "service": "turn_off",
+                    "service": "close_cover" if domain == "cover" else "turn_off",
                     "data": {"entity_id": entity_id}
                 }
 
@@ -193,10 +528,13 @@ class YanfengAIConversationEntity(
     """Yanfeng AI conversation agent."""
 
     _attr_supports_streaming = False  # ModelScope doesn't support streaming yet
+    _default_turn_timeout = DEFAULT_CONVERSATION_TIMEOUT
 
     def __init__(self, entry: ConfigEntry, subentry: ConfigSubentry) -> None:
         """Initialize the agent."""
         super().__init__(entry, subentry)
+        # Last Layer 1 turn per conversation, for "把它关掉" style follow-ups
+        self._contexts = ConversationContextStore()
         if self.subentry.data.get(CONF_LLM_HASS_API):
             self._attr_supported_features = (
                 conversation.ConversationEntityFeature.CONTROL
@@ -227,94 +565,443 @@ class YanfengAIConversationEntity(
         Layer 1: Quick service call detection (50-200ms)
         Layer 2/3: AI processing with LLM
         """
+        runtime_data = self.entry.runtime_data
+        with (
+            runtime_data.metrics.time(STAGE_TURN),
+            runtime_data.tracer.span(
+                "conversation_turn", conversation_id=chat_log.conversation_id
+            ),
+            runtime_data.flight_recorder.turn(
+                "conversation", chat_log.conversation_id, user_input.text
+            ) as record,
+            profile_turn(),
+            watch_turn(runtime_data.blocking),
+        ):
+            result = await self._async_handle_turn(user_input, chat_log)
+            if result.response.response_type == intent.IntentResponseType.ERROR:
+                record.outcome = OUTCOME_ERROR
+                record.error = str(result.response.error_code)
+            return result
+
+    async def _async_handle_turn(
+        self,
+        user_input: conversation.ConversationInput,
+        chat_log: conversation.ChatLog,
+    ) -> conversation.ConversationResult:
+        """Handle one turn, see _async_handle_message."""
         options = self.subentry.data
+        metrics = self.entry.runtime_data.metrics
+        tracer = self.entry.runtime_data.tracer
         user_text = user_input.text
+        conversation_id = chat_log.conversation_id
+        # Layer 1 and the LLM share the turn's time
+        deadline = self._turn_deadline()
+        turn_context = self._contexts.get(conversation_id)
+
+        with metrics.time(STAGE_LAYER1_DETECT), tracer.span("layer1_detect"):
+            answer = is_state_query(user_text) and answer_state_query(
+                user_text, self.hass, self.entry.runtime_data.entity_index
+            )
+            service_call = is_service_call(user_text)
+            follow_up = turn_context is not None and self._is_follow_up(
+                user_text, turn_context
+            )
+
+        # Layer 1: Read-only questions are answered from entity states
+        if answer:
+            note_layer(LAYER_STATE_QUERY)
+            LOGGER.debug("✅ Layer 1: Answered state query '%s': %s", user_text, answer)
+            intent_response = intent.IntentResponse(language=user_input.language or "zh")
+            intent_response.response_type = intent.IntentResponseType.QUERY_ANSWER
+            intent_response.async_set_speech(answer)
+            return conversation.ConversationResult(
+                response=intent_response,
+                conversation_id=conversation_id,
+            )
 
-        # Layer 1: Fast service call detection
-        if is_service_call(user_text):
+        # Layer 1: Fast service call detection, follow-ups ("还有卧室的") included
+        extra_system_prompt = user_input.extra_system_prompt
+        speculative: asyncio.Task[dict[str, Any]] | None = None
+        if service_call or follow_up:
             LOGGER.debug("🔍 Layer 1: Detected potential service call: %s", user_text)
-            service_info = extract_service_info(user_text, self.hass)
 
-            if service_info:
-                LOGGER.info("✅ Layer 1: Service call matched - executing %s.%s",
-                           service_info["domain"], service_info["service"])
+            # Multi-command utterances are resolved clause by clause
+            clauses = split_utterance(user_text)
+            resolved: list[tuple[str, dict[str, Any]]] = []
+            unresolved: list[str] = []
 
+            extract_start = time.monotonic()
+            for clause in clauses:
                 try:
-                    # Execute the service directly
-                    await self.hass.services.async_call(
-                        service_info["domain"],
-                        service_info["service"],
-                        service_info["data"],
-                        blocking=True,
-                    )
+                    service_infos = self._extract_clause(clause, turn_context)
+                except SlotValueError as err:
+                    LOGGER.debug("Layer 1: Invalid slot value in '%s': %s", clause, err)
+                    if len(clauses) == 1:
+                        note_layer(LAYER_SERVICE_CALL)
+                        # Out-of-range value: answer directly, the LLM can't do better
+                        self._cancel_speculation(speculative)
+                        intent_response = intent.IntentResponse(
+                            language=user_input.language or "zh"
+                        )
+                        intent_response.async_set_error(
+                            intent.IntentResponseErrorCode.NO_VALID_TARGETS, str(err)
+                        )
+                        return conversation.ConversationResult(
+                            response=intent_response,
+                            conversation_id=conversation_id,
+                        )
+                    service_infos = []
+
+                if service_infos:
+                    resolved.extend((clause, info) for info in service_infos)
+                else:
+                    unresolved.append(clause)
+            metrics.record_since(STAGE_LAYER1_EXTRACT, extract_start)
+            tracer.add_span(
+                "layer1_extract", extract_start, clauses=len(clauses), resolved=len(resolved)
+            )
 
-                    # Create success response (like HAOS built-in intents)
-                    intent_response = intent.IntentResponse(language=user_input.language or "zh")
-                    intent_response.response_type = intent.IntentResponseType.ACTION_DONE
-
-                    # Get response mode configuration
-                    response_mode = options.get(CONF_RESPONSE_MODE, DEFAULT_RESPONSE_MODE)
-
-                    # Generate response based on configured mode
-                    response_text = ""
-
-                    if response_mode == RESPONSE_MODE_SILENT:
-                        # Silent mode: no speech, just audio cue
-                        response_text = ""
-                        LOGGER.debug("Layer 1: Using silent mode - no speech")
-
-                    elif response_mode == RESPONSE_MODE_SIMPLE:
-                        # Simple mode: always return simple confirmation
-                        response_text = "完成"
-                        LOGGER.debug("Layer 1: Using simple mode - '完成'")
-
-                    elif response_mode == RESPONSE_MODE_FRIENDLY:
-                        # Friendly mode: use friendly_name if available, otherwise silent
-                        entity_id = service_info["data"].get("entity_id", "")
-                        entity_state = self.hass.states.get(entity_id)
-
-                        if entity_state:
-                            friendly_name = entity_state.attributes.get("friendly_name")
-                            if friendly_name:
-                                action_text = "已打开" if service_info["service"] == "turn_on" else "已关闭"
-                                response_text = f"{action_text}{friendly_name}"
-                                LOGGER.debug("Layer 1: Using friendly mode with name - '%s'", response_text)
-                            else:
-                                response_text = ""
-                                LOGGER.debug("Layer 1: Using friendly mode - no friendly_name, silent")
-                        else:
-                            response_text = ""
-                            LOGGER.debug("Layer 1: Using friendly mode - entity not found, silent")
-
-                    # Set speech only if we have response text
-                    if response_text:
-                        intent_response.async_set_speech(response_text)
-
-                    LOGGER.debug("Layer 1: Executed successfully in <200ms")
-                    return conversation.ConversationResult(
-                        response=intent_response,
-                        conversation_id=user_input.conversation_id,
+            if resolved:
+                note_layer(LAYER_SERVICE_CALL)
+                LOGGER.info(
+                    "✅ Layer 1: Service call matched for %d/%d clauses - executing %s",
+                    len(resolved), len(clauses),
+                    ", ".join(f"{info['domain']}.{info['service']}" for _, info in resolved),
+                )
+
+                optimistic = options.get(CONF_OPTIMISTIC_ACK, DEFAULT_OPTIMISTIC_ACK)
+                # Race the LLM against the service calls when it may still be
+                # needed: clauses left unresolved, or a match that is not literal
+                speculated_prompt: str | None = None
+                if not optimistic and (
+                    unresolved
+                    or not all(self._is_literal_match(c, info) for c, info in resolved)
+                ):
+                    speculated_prompt = self._layer1_prompt(
+                        extra_system_prompt, [info for _, info in resolved], unresolved
+                    )
+                    speculative = await self._async_speculate(
+                        user_input, chat_log, speculated_prompt
                     )
 
-                except Exception as err:
-                    LOGGER.warning("Layer 1: Service call failed: %s, falling back to LLM", err)
-                    # Fall through to LLM processing
+                execute_start = time.monotonic()
+                if optimistic:
+                    # Reply right away, failures are reported once verified
+                    for _, info in resolved:
+                        async_dispatch_verified(
+                            self.hass,
+                            self._async_execute_service_call(info),
+                            self._expected_calls(info),
+                            self._describe_service_call(info),
+                        )
+                    results = [None] * len(resolved)
+                else:
+                    # Execute all resolved service calls concurrently
+                    try:
+                        async with asyncio.timeout_at(deadline):
+                            results = await asyncio.gather(
+                                *(self._async_execute_service_call(info) for _, info in resolved),
+                                return_exceptions=True,
+                            )
+                    except TimeoutError:
+                        # No time left for the LLM either
+                        LOGGER.warning("Layer 1: Service calls exceeded the turn deadline")
+                        self._cancel_speculation(speculative)
+                        intent_response = intent.IntentResponse(
+                            language=user_input.language or "zh"
+                        )
+                        intent_response.async_set_error(
+                            intent.IntentResponseErrorCode.FAILED_TO_HANDLE, "设备响应超时"
+                        )
+                        return conversation.ConversationResult(
+                            response=intent_response,
+                            conversation_id=conversation_id,
+                        )
+
+                metrics.record_since(STAGE_LAYER1_EXECUTE, execute_start)
+                tracer.add_span("layer1_execute", execute_start, calls=len(resolved))
+
+                executed: list[dict[str, Any]] = []
+                for (clause, info), result in zip(resolved, results):
+                    if isinstance(result, Exception):
+                        LOGGER.warning(
+                            "Layer 1: Service call failed: %s, falling back to LLM", result
+                        )
+                        unresolved.append(clause)
+                    else:
+                        executed.append(info)
+
+                if executed:
+                    if context := context_from_service_calls(executed):
+                        self._contexts.set(conversation_id, context)
+
+                if executed and not unresolved:
+                    LOGGER.debug(
+                        "Layer 1: Executed successfully in %.0fms",
+                        (time.monotonic() - extract_start) * 1000,
+                    )
+                    self._cancel_speculation(speculative)
+                    return self._layer1_result(user_input, executed, conversation_id)
+
+                # Only hand the clauses Layer 1 could not resolve to the LLM
+                extra_system_prompt = self._layer1_prompt(
+                    extra_system_prompt, executed, unresolved
+                )
+                if extra_system_prompt != speculated_prompt:
+                    # The speculative request was sent with another prompt,
+                    # e.g. a service call it took as done failed
+                    self._cancel_speculation(speculative)
+                    speculative = None
             else:
                 LOGGER.debug("⚠️ Layer 1: Could not extract service info, falling back to Layer 2/3")
         else:
             LOGGER.debug("⚠️ Layer 1: Not a service call, proceeding to Layer 2/3 (AI processing)")
 
         # Layer 2/3: AI processing with LLM
+        if speculative is None:
+            try:
+                await chat_log.async_provide_llm_data(
+                    user_input.as_llm_context(DOMAIN),
+                    options.get(CONF_LLM_HASS_API),
+                    options.get(CONF_PROMPT),
+                    extra_system_prompt,
+                )
+            except conversation.ConverseError as err:
+                return err.as_conversation_result()
+        else:
+            LOGGER.debug("Layer 2/3: Using the speculative LLM request")
+
+        await self._async_handle_chat_log(
+            chat_log, speculative=speculative, deadline=deadline
+        )
+
+        return conversation.async_get_result_from_chat_log(user_input, chat_log)
+
+    def _is_literal_match(self, clause: str, service_info: dict[str, Any]) -> bool:
+        """Return True if the clause spells out the name of its target.
+
+        Bulk commands are explicit too. Partial, homophone, pronoun and
+        "playing player" matches may be wrong, so the LLM may still be needed.
+        """
+        if service_info.get("bulk") is not None:
+            return True
+        entity_id = service_info["data"].get("entity_id")
+        if not isinstance(entity_id, str):
+            return False
+
+        names = []
+        if state := self.hass.states.get(entity_id):
+            names.append(state.attributes.get("friendly_name"))
+        if entry := entity_registry.async_get(self.hass).async_get(entity_id):
+            names.extend([entry.name, *entry.aliases])
+        text = normalize_text(clause)
+        return any(name and normalize_text(name) in text for name in names)
+
+    def _layer1_prompt(
+        self,
+        extra_system_prompt: str | None,
+        executed: list[dict[str, Any]],
+        unresolved: list[str],
+    ) -> str | None:
+        """Return the extra system prompt of the LLM after Layer 1 executed calls."""
+        if not executed or not unresolved:
+            return extra_system_prompt
+
+        done = "；".join(self._describe_service_call(info) for info in executed)
+        remaining = "；".join(unresolved)
+        return "\n".join(
+            filter(None, [
+                extra_system_prompt,
+                f"以下操作已经执行完毕，不要重复执行：{done}。"
+                f"请只处理用户请求中剩余的部分：{remaining}，"
+                f"并在回复中一并告知已完成的操作。",
+            ])
+        )
+
+    async def _async_speculate(
+        self,
+        user_input: conversation.ConversationInput,
+        chat_log: conversation.ChatLog,
+        extra_system_prompt: str | None,
+    ) -> asyncio.Task[dict[str, Any]] | None:
+        """Start the LLM request while Layer 1 executes the service calls.
+
+        Only if enabled, and within the rate limit shared by the entry so that
+        speculation can't exhaust the API quota. The prompt assumes the calls
+        succeed, the request is cancelled if they don't or the LLM isn't needed.
+        """
+        options = self.subentry.data
+        if not options.get(CONF_SPECULATIVE_LLM, DEFAULT_SPECULATIVE_LLM):
+            return None
+        if not self.entry.runtime_data.speculation_limiter.try_acquire():
+            LOGGER.debug("Layer 1: Speculation rate limit reached, not racing the LLM")
+            return None
+
         try:
             await chat_log.async_provide_llm_data(
                 user_input.as_llm_context(DOMAIN),
                 options.get(CONF_LLM_HASS_API),
                 options.get(CONF_PROMPT),
-                user_input.extra_system_prompt,
+                extra_system_prompt,
+            )
+        except conversation.ConverseError:
+            # Reported again by Layer 2/3 if Layer 1 falls back
+            return None
+
+        LOGGER.debug("Layer 1: Started speculative LLM request")
+        return self._async_start_llm_request(chat_log)
+
+    @staticmethod
+    def _cancel_speculation(speculative: asyncio.Task[Any] | None) -> None:
+        """Cancel a speculative LLM request Layer 1 made unnecessary."""
+        if speculative is None:
+            return
+        if not speculative.done():
+            LOGGER.debug("Layer 1: Cancelled speculative LLM request")
+            speculative.cancel()
+        elif not speculative.cancelled():
+            # Retrieve a failure so it isn't logged as never retrieved
+            speculative.exception()
+
+    async def _async_execute_service_call(self, service_info: dict[str, Any]) -> None:
+        """Execute a Layer 1 service call, raising if nothing was done."""
+        if (calls := service_info.get("bulk")) is None:
+            entity_id = service_info["data"].get("entity_id")
+            if is_redundant_call(
+                self.hass.states.get(entity_id) if isinstance(entity_id, str) else None,
+                service_info["service"],
+                service_info["data"],
+            ):
+                LOGGER.debug(
+                    "Layer 1: %s is already in the requested state, skipping %s.%s",
+                    entity_id, service_info["domain"], service_info["service"],
+                )
+                return
+
+            await self.hass.services.async_call(
+                service_info["domain"],
+                service_info["service"],
+                service_info["data"],
+                blocking=True,
             )
-        except conversation.ConverseError as err:
-            return err.as_conversation_result()
+            return
+
+        # Bulk commands only fail as a whole if no entity could be controlled
+        result = await async_execute_bulk(self.hass, calls)
+        if result.all_failed:
+            raise HomeAssistantError(f"All bulk calls failed: {result.failed}")
+        if result.failed:
+            service_info["speech"] += f"，但有 {len(result.failed)} 个设备失败"
+
+    def _is_follow_up(self, user_text: str, turn_context: TurnContext) -> bool:
+        """Return True if a clause refers to the previous turn ("把它关掉", "卧室的也是")."""
+        entity_index = self.entry.runtime_data.entity_index
+        return any(
+            follow_up_clauses(clause, turn_context, self.hass)
+            or extract_ellipsis_service_info(clause, turn_context, self.hass, entity_index)
+            for clause in split_utterance(user_text)
+        )
 
-        await self._async_handle_chat_log(chat_log)
+    def _extract_clause(
+        self, clause: str, turn_context: TurnContext | None
+    ) -> list[dict[str, Any]]:
+        """Resolve one clause, using the previous turn for follow-ups."""
+        entity_index = self.entry.runtime_data.entity_index
+
+        if turn_context is not None and (
+            rewritten := follow_up_clauses(clause, turn_context, self.hass)
+        ):
+            # "把它关掉" -> "把客厅灯关掉", all or nothing
+            LOGGER.debug("Layer 1: Follow-up '%s' rewritten to %s", clause, rewritten)
+            service_infos = [
+                extract_service_info(text, self.hass, entity_index) for text in rewritten
+            ]
+            return service_infos if all(service_infos) else []
+
+        if service_info := extract_service_info(clause, self.hass, entity_index):
+            return [service_info]
+
+        if turn_context is not None and (
+            service_info := extract_ellipsis_service_info(
+                clause, turn_context, self.hass, entity_index
+            )
+        ):
+            return [service_info]
+
+        return []
+
+    @staticmethod
+    def _expected_calls(service_info: dict[str, Any]) -> list[PlannedCall]:
+        """Return the calls whose outcome verifies an optimistic service call."""
+        if (calls := service_info.get("bulk")) is None:
+            return [
+                PlannedCall(
+                    service_info["domain"], service_info["service"], service_info["data"]
+                )
+            ]
+        return [
+            PlannedCall(call.domain, call.service, {**call.data, "entity_id": call.entity_ids})
+            for call in calls
+        ]
+
+    def _describe_service_call(self, service_info: dict[str, Any]) -> str:
+        """Describe an executed Layer 1 service call in one short sentence."""
+        if service_info.get("speech"):
+            return service_info["speech"]
+
+        entity_id = service_info["data"].get("entity_id", "")
+        entity_state = self.hass.states.get(entity_id)
+        name = entity_state.attributes.get("friendly_name") if entity_state else None
+        action_text = (
+            "已打开" if service_info["service"] in ("turn_on", "open_cover") else "已关闭"
+        )
+        return f"{action_text}{name or entity_id}"
 
-        return conversation.async_get_result_from_chat_log(user_input, chat_log)
+    def _layer1_result(
+        self,
+        user_input: conversation.ConversationInput,
+        executed: list[dict[str, Any]],
+        conversation_id: str,
+    ) -> conversation.ConversationResult:
+        """Create the response for service calls executed by Layer 1."""
+        # Create success response (like HAOS built-in intents)
+        intent_response = intent.IntentResponse(language=user_input.language or "zh")
+        intent_response.response_type = intent.IntentResponseType.ACTION_DONE
+
+        # Get response mode configuration
+        response_mode = self.subentry.data.get(CONF_RESPONSE_MODE, DEFAULT_RESPONSE_MODE)
+
+        # Generate response based on configured mode
+        response_text = ""
+
+        if response_mode == RESPONSE_MODE_SILENT:
+            # Silent mode: no speech, just audio cue
+            LOGGER.debug("Layer 1: Using silent mode - no speech")
+
+        elif response_mode == RESPONSE_MODE_SIMPLE:
+            # Simple mode: always return simple confirmation
+            response_text = "完成"
+            LOGGER.debug("Layer 1: Using simple mode - '完成'")
+
+        elif response_mode == RESPONSE_MODE_FRIENDLY:
+            # Friendly mode: describe calls on named entities, otherwise silent
+            parts = []
+            for service_info in executed:
+                entity_state = self.hass.states.get(
+                    service_info["data"].get("entity_id", "")
+                )
+                if service_info.get("speech") or (
+                    entity_state and entity_state.attributes.get("friendly_name")
+                ):
+                    parts.append(self._describe_service_call(service_info))
+            response_text = "，".join(parts)
+            LOGGER.debug("Layer 1: Using friendly mode - '%s'", response_text)
+
+        # Set speech only if we have response text
+        if response_text:
+            intent_response.async_set_speech(response_text)
+
+        return conversation.ConversationResult(
+            response=intent_response,
+            conversation_id=conversation_id,
+        )
@@ -0,0 +1,43 @@
+"""Diagnostics support for the Yanfeng AI Task integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import HomeAssistant
+
+from . import YanfengAIConfigEntry
+from .const import CONF_LOCAL_API_KEY, CONF_RECORDER_KEY
+
+# Spans included in the download, the export_traces service writes them all
+DIAGNOSTICS_MAX_SPANS = 200
+
+TO_REDACT = {CONF_API_KEY, CONF_LOCAL_API_KEY, CONF_RECORDER_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: YanfengAIConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    runtime_data = entry.runtime_data
+    return {
+        "data": async_redact_data(dict(entry.data), TO_REDACT),
+        "options": async_redact_data(dict(entry.options), TO_REDACT),
+        "subentries": {
+            subentry_id: {
+                "subentry_type": subentry.subentry_type,
+                "title": subentry.title,
+                "data": async_redact_data(dict(subentry.data), TO_REDACT),
+            }
+            for subentry_id, subentry in entry.subentries.items()
+        },
+        "latency": runtime_data.metrics.as_dict(),
+        "model_health": runtime_data.model_health.as_dict(),
+        "recent_spans": runtime_data.tracer.spans()[-DIAGNOSTICS_MAX_SPANS:],
+        "flight_recorder": runtime_data.flight_recorder.turns(),
+        "token_usage": runtime_data.usage.as_dict(),
+        "chaos": runtime_data.chaos.as_dict() if runtime_data.chaos else None,
+        "blocking": runtime_data.blocking.as_dict() if runtime_data.blocking else None,
+    }
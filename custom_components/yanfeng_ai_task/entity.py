@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 from abc import abstractmethod
-from typing import Any
+import asyncio
+import time
+from typing import Any, NamedTuple
 
 import aiohttp
 import voluptuous as vol
@@ -12,32 +14,112 @@ from voluptuous_openapi import convert
 from homeassistant.components import conversation
 from homeassistant.config_entries import ConfigEntry, ConfigSubentry
 from homeassistant.const import CONF_API_KEY
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry as dr, llm
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import EntityPlatform
 
 from .const import (
     CONF_CHAT_MODEL,
+    CONF_CHAT_PROVIDER,
     CONF_CUSTOM_CHAT_MODEL,
+    CONF_FALLBACK_CHAT_MODEL,
+    CONF_FAST_CHAT_MODEL,
+    CONF_LOCAL_API_KEY,
+    CONF_LOCAL_BASE_URL,
+    CONF_LOCAL_MODEL,
     CONF_MAX_TOKENS,
     CONF_PROMPT,
     CONF_TEMPERATURE,
     CONF_TOP_P,
+    CONF_TURN_TIMEOUT,
+    CONF_VISION_CHAT_MODEL,
+    DEFAULT_AI_TASK_TIMEOUT,
+    DEFAULT_CHAT_PROVIDER,
     DEFAULT_MAX_TOKENS,
     DEFAULT_PROMPT,
     DEFAULT_TEMPERATURE,
     DEFAULT_TOP_P,
     DOMAIN,
+    ERROR_TURN_TIMEOUT,
+    FAILOVER_ATTEMPT_SHARE,
     LOGGER,
+    PROVIDER_LOCAL_PRIMARY,
+    PROVIDER_MODELSCOPE,
     RECOMMENDED_CHAT_MODEL,
+    RECOMMENDED_VISION_MODEL,
+    ROUTER_FAST_MAX_ACTIONS,
+    ROUTER_FAST_MAX_HISTORY,
+    ROUTER_FAST_MAX_LENGTH,
+    TOOL_CALL_TIMEOUT,
 )
-from .helpers import ModelScopeAPIClient, format_messages_for_modelscope
+from .helpers import (
+    ChatProvider,
+    FailoverClient,
+    ModelScopeAPIClient,
+    OpenAICompatibleClient,
+    format_messages_for_modelscope,
+)
+from .flight_recorder import LAYER_LLM, note_layer, note_response
+from .metrics import STAGE_LLM_ITERATION, STAGE_MESSAGE_PREP, STAGE_TOOL_CALL
 
 ERROR_GETTING_RESPONSE = "Error getting response from ModelScope"
 
 # Max number of tool iterations to prevent infinite loops
 MAX_TOOL_ITERATIONS = 10
 
+# Words hinting that a turn will call a device control tool
+_ACTION_HINTS = (
+    "打开", "关闭", "关掉", "开启", "启动", "停止", "调", "设置", "设为",
+    "播放", "暂停", "拉开", "拉上", "turn on", "turn off", "set ",
+)
+
+
+class TurnFeatures(NamedTuple):
+    """Cheap local features of a turn, used to pick its chat model."""
+
+    text_length: int
+    attachments: int
+    # User turns in the conversation, the current one included
+    history_depth: int
+    # Device actions asked for, 0 if no tools are available
+    actions: int
+    structured: bool
+
+
+def _turn_features(
+    chat_log: conversation.ChatLog,
+    tools: list[dict[str, Any]] | None,
+    structure: Any | None,
+) -> TurnFeatures:
+    """Extract the routing features of the current turn of a chat log."""
+    user_turns = [
+        content
+        for content in chat_log.content
+        if isinstance(content, conversation.UserContent)
+    ]
+    last = user_turns[-1] if user_turns else None
+    text = (last.content or "") if last else ""
+
+    actions = 0
+    if tools:
+        # "空调" is a device, not the verb "调"
+        hint_text = text.lower().replace("空调", "")
+        actions = sum(hint_text.count(hint) for hint in _ACTION_HINTS)
+
+    return TurnFeatures(
+        text_length=len(text),
+        attachments=len(last.attachments or ()) if last else 0,
+        history_depth=len(user_turns),
+        actions=actions,
+        structured=structure is not None,
+    )
+
+
+def _is_vision_model(model: str) -> bool:
+    """Return True for vision-language models, such as Qwen3-VL."""
+    return "VL" in model
+
 
 def _format_tool(tool: llm.Tool, custom_serializer: Any | None) -> dict[str, Any]:
     """Format HA tool to OpenAI/ModelScope compatible format."""
@@ -70,6 +152,9 @@ def _format_tool(tool: llm.Tool, custom_serializer: Any | None) -> dict[str, Any
 class YanfengAIBaseEntity:
     """Base entity for Yanfeng AI Task."""
 
+    # Seconds a turn may take unless the subentry sets turn_timeout
+    _default_turn_timeout = DEFAULT_AI_TASK_TIMEOUT
+
     def __init__(self, entry: ConfigEntry, subentry: ConfigSubentry) -> None:
         """Initialize the entity."""
         self.entry = entry
@@ -93,7 +178,7 @@ class YanfengAIBaseEntity:
     @property
     def session(self) -> aiohttp.ClientSession:
         """Return the HTTP session."""
-        return self.entry.runtime_data
+        return self.entry.runtime_data.session
 
     @property
     def api_key(self) -> str:
@@ -103,7 +188,39 @@ class YanfengAIBaseEntity:
     @property
     def client(self) -> ModelScopeAPIClient:
         """Return the ModelScope API client."""
-        return ModelScopeAPIClient(self.session, self.api_key)
+        return ModelScopeAPIClient(
+            self.session,
+            self.api_key,
+            self.entry.runtime_data.model_health,
+            metrics=self.entry.runtime_data.metrics,
+            tracer=self.entry.runtime_data.tracer,
+            chaos=self.entry.runtime_data.chaos,
+        )
+
+    @property
+    def chat_client(self) -> ChatProvider:
+        """Return the chat provider, with failover to the local server if set."""
+        provider = self._get_option(CONF_CHAT_PROVIDER, DEFAULT_CHAT_PROVIDER)
+        base_url = (self._get_option(CONF_LOCAL_BASE_URL) or "").strip()
+        if provider == PROVIDER_MODELSCOPE or not base_url:
+            return self.client
+
+        local = OpenAICompatibleClient(
+            self.session,
+            base_url,
+            api_key=self._get_option(CONF_LOCAL_API_KEY),
+            model=(self._get_option(CONF_LOCAL_MODEL) or "").strip() or None,
+            health=self.entry.runtime_data.model_health,
+            metrics=self.entry.runtime_data.metrics,
+        )
+        # Shorter than the turn's deadline, which would cancel the request
+        # before it fails over (and without recording a failure)
+        attempt_timeout = self._get_option(
+            CONF_TURN_TIMEOUT, self._default_turn_timeout
+        ) * FAILOVER_ATTEMPT_SHARE
+        if provider == PROVIDER_LOCAL_PRIMARY:
+            return FailoverClient(local, self.client, attempt_timeout)
+        return FailoverClient(self.client, local, attempt_timeout)
 
     def _get_option(self, key: str, default: Any = None) -> Any:
         """Get option from subentry data."""
@@ -113,59 +230,198 @@ class YanfengAIBaseEntity:
 class YanfengAILLMBaseEntity(YanfengAIBaseEntity):
     """Base entity for LLM-based entities."""
 
+    def _chat_model(self) -> str:
+        """Return the chat model to use."""
+        # Priority: custom_chat_model > chat_model > default
+        custom_model = self._get_option(CONF_CUSTOM_CHAT_MODEL)
+        if custom_model and custom_model.strip():
+            return custom_model.strip()
+        return self._get_option(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
+
+    def _chat_tools(
+        self, chat_log: conversation.ChatLog
+    ) -> tuple[list[dict[str, Any]] | None, Any]:
+        """Return the tools of the chat log's LLM API and its serializer."""
+        if not chat_log.llm_api:
+            return None, llm.selector_serializer
+
+        tools = [
+            _format_tool(tool, chat_log.llm_api.custom_serializer)
+            for tool in chat_log.llm_api.tools
+        ]
+        return tools, chat_log.llm_api.custom_serializer
+
+    def _route_chat_model(
+        self,
+        chat_log: conversation.ChatLog,
+        tools: list[dict[str, Any]] | None,
+        structure: Any | None = None,
+    ) -> str:
+        """Pick the chat model for a turn from its local features.
+
+        Image attachments go to the vision model, device control to a text
+        model, and short, simple turns to the fast model if one is set.
+        """
+        features = _turn_features(chat_log, tools, structure)
+        model = self._chat_model()
+        fast_model = (self._get_option(CONF_FAST_CHAT_MODEL) or "").strip()
+
+        if features.attachments:
+            reason = "attachments"
+            if not _is_vision_model(model):
+                model = (
+                    self._get_option(CONF_VISION_CHAT_MODEL) or ""
+                ).strip() or RECOMMENDED_VISION_MODEL
+        elif features.actions and _is_vision_model(model):
+            # VL models don't fully support function calling
+            reason = "tool calls"
+            model = RECOMMENDED_CHAT_MODEL
+        elif (
+            fast_model
+            and not features.structured
+            and features.text_length <= ROUTER_FAST_MAX_LENGTH
+            and features.actions <= ROUTER_FAST_MAX_ACTIONS
+            and features.history_depth <= ROUTER_FAST_MAX_HISTORY
+        ):
+            reason = "simple turn"
+            model = fast_model
+        else:
+            reason = "default"
+
+        LOGGER.debug("Routing turn to %s (%s): %s", model, reason, features)
+        return model
+
+    async def _async_generate(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+    ) -> dict[str, Any]:
+        """Send one chat completion request with the configured settings."""
+        with self.entry.runtime_data.tracer.span(
+            "llm_request", model=model, messages=len(messages), tools=len(tools or ())
+        ) as span:
+            start = time.monotonic()
+            response = await self.chat_client.generate_text(
+                model=model,
+                messages=messages,
+                temperature=self._get_option(CONF_TEMPERATURE, DEFAULT_TEMPERATURE),
+                top_p=self._get_option(CONF_TOP_P, DEFAULT_TOP_P),
+                max_tokens=self._get_option(CONF_MAX_TOKENS, DEFAULT_MAX_TOKENS),
+                tools=tools,
+                fallback_model=(self._get_option(CONF_FALLBACK_CHAT_MODEL) or "").strip() or None,
+            )
+            usage = response.get("usage")
+            if usage:
+                span.set_attribute("usage", usage)
+            response_model = response.get("model") or model
+            note_response(response_model, usage)
+            self.entry.runtime_data.usage.record(
+                self.subentry.subentry_id,
+                response_model,
+                usage,
+                time.monotonic() - start,
+            )
+            return response
+
+    def _async_start_llm_request(
+        self, chat_log: conversation.ChatLog
+    ) -> asyncio.Task[dict[str, Any]]:
+        """Send the first request of a turn before it is known to be needed.
+
+        The task must either be passed to _async_handle_chat_log as
+        speculative, with the chat log unchanged, or be cancelled.
+        """
+        tools, custom_serializer = self._chat_tools(chat_log)
+        prompt = self._get_option(CONF_PROMPT, DEFAULT_PROMPT)
+        messages = self._prepare_messages_from_chat_log(
+            chat_log, prompt, None, custom_serializer
+        )
+        model = self._route_chat_model(chat_log, tools)
+        task = self.hass.async_create_background_task(
+            self._async_generate(model, messages, tools),
+            f"{DOMAIN} speculative LLM request",
+        )
+        # Don't outlive the turn, e.g. when the voice pipeline gives up
+        if (turn := asyncio.current_task()) is not None:
+            turn.add_done_callback(lambda _: task.cancel())
+        return task
+
+    def _turn_deadline(self) -> float:
+        """Return the event loop time by which a turn starting now must end."""
+        return self.hass.loop.time() + self._get_option(
+            CONF_TURN_TIMEOUT, self._default_turn_timeout
+        )
+
     async def _async_handle_chat_log(
         self,
         chat_log: conversation.ChatLog,
         structure: dict[str, Any] | None = None,
+        speculative: asyncio.Task[dict[str, Any]] | None = None,
+        deadline: float | None = None,
     ) -> None:
-        """Handle a chat log by calling the ModelScope API with function calling support."""
+        """Handle a chat log, within the deadline of the turn.
 
-        # Get configuration
-        # Priority: custom_chat_model > chat_model > default
-        custom_model = self._get_option(CONF_CUSTOM_CHAT_MODEL)
-        if custom_model and custom_model.strip():
-            model = custom_model.strip()
-            LOGGER.debug("Using custom chat model: %s", model)
-        else:
-            model = self._get_option(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
-            LOGGER.debug("Using predefined chat model: %s", model)
+        LLM iterations and tool calls share the time left until deadline, an
+        event loop time (see _turn_deadline). When it passes, or the caller is
+        cancelled, outstanding requests and tool calls are cancelled.
+        """
+        if deadline is None:
+            deadline = self._turn_deadline()
 
-        temperature = self._get_option(CONF_TEMPERATURE, DEFAULT_TEMPERATURE)
-        top_p = self._get_option(CONF_TOP_P, DEFAULT_TOP_P)
-        max_tokens = self._get_option(CONF_MAX_TOKENS, DEFAULT_MAX_TOKENS)
+        note_layer(LAYER_LLM)
+        try:
+            async with asyncio.timeout_at(deadline):
+                await self._async_process_chat_log(chat_log, structure, speculative)
+        except TimeoutError as err:
+            LOGGER.warning("Turn exceeded its deadline, outstanding work was cancelled")
+            raise HomeAssistantError(ERROR_TURN_TIMEOUT) from err
+
+    async def _async_process_chat_log(
+        self,
+        chat_log: conversation.ChatLog,
+        structure: dict[str, Any] | None = None,
+        speculative: asyncio.Task[dict[str, Any]] | None = None,
+    ) -> None:
+        """Handle a chat log by calling the ModelScope API with function calling support.
+
+        speculative is a task from _async_start_llm_request for the same chat
+        log, used as the response of the first iteration.
+        """
+
+        # Get configuration
         prompt = self._get_option(CONF_PROMPT, DEFAULT_PROMPT)
 
         # Extract tools from chat_log if available
-        tools = None
-        custom_serializer = llm.selector_serializer
-        if chat_log.llm_api:
-            tools = [
-                _format_tool(tool, chat_log.llm_api.custom_serializer)
-                for tool in chat_log.llm_api.tools
-            ]
-            custom_serializer = chat_log.llm_api.custom_serializer
+        tools, custom_serializer = self._chat_tools(chat_log)
+        if tools is not None:
             LOGGER.info("Extracted %d tools from chat_log.llm_api", len(tools))
 
+        # The whole turn stays on one model, tool iterations included. A
+        # speculative request was routed the same way, from the same chat log
+        model = self._route_chat_model(chat_log, tools, structure)
+        metrics = self.entry.runtime_data.metrics
+        tracer = self.entry.runtime_data.tracer
+
         # Iterate up to MAX_TOOL_ITERATIONS to handle tool calls
         for iteration in range(MAX_TOOL_ITERATIONS):
             LOGGER.debug("Tool calling iteration %d/%d", iteration + 1, MAX_TOOL_ITERATIONS)
+            iteration_start = time.monotonic()
 
             # Prepare messages from chat_log
-            messages = self._prepare_messages_from_chat_log(chat_log, prompt, structure, custom_serializer)
+            with metrics.time(STAGE_MESSAGE_PREP):
+                messages = self._prepare_messages_from_chat_log(chat_log, prompt, structure, custom_serializer)
 
             LOGGER.debug("Sending %d messages to ModelScope (iteration %d)", len(messages), iteration + 1)
             LOGGER.debug("Message roles: %s", [msg.get("role") for msg in messages])
 
             try:
-                # Call ModelScope API with tools
-                response = await self.client.generate_text(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    top_p=top_p,
-                    max_tokens=max_tokens,
-                    tools=tools,
-                )
+                if iteration == 0 and speculative is not None:
+                    # Already sent while Layer 1 was running
+                    response = await speculative
+                else:
+                    # Call ModelScope API with tools
+                    response = await self._async_generate(model, messages, tools)
 
                 LOGGER.debug("Received ModelScope response (iteration %d): %s", iteration + 1, response)
 
@@ -239,8 +495,12 @@ class YanfengAILLMBaseEntity(YanfengAIBaseEntity):
                                 # Get the tool_call_id from the original response
                                 tool_call_id = tool_calls[i].get("id", f"call_{i}")
 
-                                # Execute the tool
-                                tool_result = await chat_log.llm_api.async_call_tool(tool_call_input)
+                                # Execute the tool, bounded so one hung tool can't use up the turn
+                                async with asyncio.timeout(TOOL_CALL_TIMEOUT):
+                                    with metrics.time(STAGE_TOOL_CALL), tracer.span(
+                                        "tool_call", tool=tool_call_input.tool_name
+                                    ):
+                                        tool_result = await chat_log.llm_api.async_call_tool(tool_call_input)
 
                                 # Add tool result to chat_log with required parameters
                                 tool_result_content = conversation.ToolResultContent(
@@ -261,11 +521,12 @@ class YanfengAILLMBaseEntity(YanfengAIBaseEntity):
                                     agent_id=self.entry.entry_id,
                                     tool_call_id=tool_call_id,
                                     tool_name=tool_call_input.tool_name,
-                                    tool_result={"error": str(err)},
+                                    tool_result={"error": str(err) or type(err).__name__},
                                 )
                                 chat_log.content.append(error_result)
 
                     # Continue loop to send tool results back to model
+                    metrics.record_since(STAGE_LLM_ITERATION, iteration_start)
                     continue
 
                 else:
@@ -281,6 +542,7 @@ class YanfengAILLMBaseEntity(YanfengAIBaseEntity):
                         LOGGER.warning("Empty content in final response")
 
                     # Done, exit loop
+                    metrics.record_since(STAGE_LLM_ITERATION, iteration_start)
                     break
 
             except conversation.ConverseError:
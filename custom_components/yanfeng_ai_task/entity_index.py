@@ -0,0 +1,519 @@
+"""Entity name index for Layer 1 entity resolution.
+
+Voice STT output for Chinese often contains homophones ("客厅等" for "客厅灯",
+"窗连" for "窗帘") and sometimes traditional characters, which defeats plain
+substring matching, while short names like "灯" match whichever light comes
+first. This index keeps two structures per domain:
+
+- a char-bigram sparse matrix (one row per name, posting lists of row ids per
+  bigram) used to score all candidates at once and rank them deterministically
+- a toneless, fuzzy pinyin key for every name and alias, used as a second
+  chance for homophones before falling back to the LLM
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from collections.abc import Iterable
+import heapq
+from typing import Any, NamedTuple
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry
+from homeassistant.helpers.debounce import Debouncer
+
+from .const import LOGGER
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # pragma: no cover - pypinyin is listed in manifest.json
+    lazy_pinyin = None
+    Style = None
+
+# Traditional -> simplified characters that show up in device and room names.
+# A full OpenCC table is overkill here; STT engines and users only mix in a
+# handful of traditional characters for household vocabulary.
+_TRADITIONAL_TO_SIMPLIFIED = str.maketrans(
+    "燈廳臥廚門簾開關調溫風濕氣電視機頻聲響燒熱鍋爐櫃臺陽書兒廁衛"
+    "樓層間廣車庫園淨掃濾備設動啟樂幾個兩暫進離顏壓鎖區觀劇喚捲顯頭",
+    "灯厅卧厨门帘开关调温风湿气电视机频声响烧热锅炉柜台阳书儿厕卫"
+    "楼层间广车库园净扫滤备设动启乐几个两暂进离颜压锁区观剧唤卷显头",
+)
+
+# Characters stripped before matching (whitespace and common punctuation).
+_STRIP_CHARS = str.maketrans(
+    "", "", " \t\r\n,.!?;:，。！？；：、\"'“”‘’()（）[]【】"
+)
+
+# Fuzzy initials commonly confused by Mandarin STT and southern accents.
+_FUZZY_INITIALS = (
+    ("zh", "z"),
+    ("ch", "c"),
+    ("sh", "s"),
+    ("n", "l"),
+    ("f", "h"),
+)
+
+# Sub-sequences shorter than this are too ambiguous to be useful.
+_MIN_PARTIAL_SYLLABLES = 2
+# Names longer than this are indexed by full key only.
+_MAX_PARTIAL_SYLLABLES = 12
+
+# Bigram scoring: best matches below this score are not trusted at all, and a
+# runner-up within this margin of the best match makes the result ambiguous.
+MIN_MATCH_SCORE = 0.5
+AMBIGUITY_MARGIN = 0.1
+# A lone candidate ("空调" with a single "客厅空调") needs less evidence.
+MIN_SOLE_MATCH_SCORE = 0.3
+# Weight of name coverage vs. Dice similarity in the bigram score.
+_COVERAGE_WEIGHT = 0.75
+# Compact a matrix once this many rows are tombstoned.
+_COMPACT_THRESHOLD = 1024
+# Renames and new entities are reindexed in batches, at most this often
+# (seconds), since a restore or an integration reload changes many at once.
+REINDEX_COOLDOWN = 1.0
+
+
+class EntityMatch(NamedTuple):
+    """A scored entity candidate."""
+
+    entity_id: str
+    score: float
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, convert traditional characters and strip punctuation."""
+    return text.lower().translate(_TRADITIONAL_TO_SIMPLIFIED).translate(_STRIP_CHARS)
+
+
+def _fuzzy_syllable(syllable: str) -> str:
+    """Collapse a toneless pinyin syllable onto its fuzzy form."""
+    for full, short in _FUZZY_INITIALS:
+        if syllable.startswith(full):
+            syllable = short + syllable[len(full):]
+            break
+
+    # an/ang, en/eng, in/ing, ian/iang, uan/uang
+    if syllable.endswith("ng") and not syllable.endswith("ong") and len(syllable) > 2:
+        syllable = syllable[:-1]
+
+    return syllable
+
+
+def to_fuzzy_pinyin(text: str) -> tuple[str, ...]:
+    """Return the fuzzy, toneless pinyin syllables of a normalized text.
+
+    Returns an empty tuple if pypinyin is not available.
+    """
+    if lazy_pinyin is None or not text:
+        return ()
+
+    return tuple(
+        _fuzzy_syllable(syllable)
+        for syllable in lazy_pinyin(text, style=Style.NORMAL)
+        if syllable
+    )
+
+
+def char_bigrams(text: str) -> frozenset[str]:
+    """Return the boundary-padded character bigrams of a normalized text."""
+    padded = f"^{text}$"
+    return frozenset(padded[i : i + 2] for i in range(len(padded) - 1))
+
+
+def _build_bigrams(names: Iterable[str]) -> list[frozenset[str]]:
+    """Build one bigram row per distinct normalized name."""
+    return [
+        char_bigrams(name)
+        for name in dict.fromkeys(normalize_text(name) for name in names)
+        if name
+    ]
+
+
+def _build_keys(names: Iterable[str]) -> tuple[set[str], set[str]]:
+    """Build full and partial pinyin keys for a list of names."""
+    full_keys: set[str] = set()
+    partial_keys: set[str] = set()
+
+    if lazy_pinyin is None:
+        return full_keys, partial_keys
+
+    for name in names:
+        syllables = to_fuzzy_pinyin(normalize_text(name))
+        if not syllables:
+            continue
+
+        full_keys.add(" ".join(syllables))
+
+        if len(syllables) > _MAX_PARTIAL_SYLLABLES:
+            continue
+
+        for start in range(len(syllables)):
+            for end in range(start + _MIN_PARTIAL_SYLLABLES, len(syllables) + 1):
+                if end - start < len(syllables):
+                    partial_keys.add(" ".join(syllables[start:end]))
+
+    return full_keys, partial_keys - full_keys
+
+
+class _EntityEntry(NamedTuple):
+    """Precomputed index data of a single entity."""
+
+    bigrams: list[frozenset[str]]
+    full_keys: set[str]
+    partial_keys: set[str]
+
+
+def _build_entry(names: list[str]) -> _EntityEntry:
+    """Build all index data of an entity from its names."""
+    return _EntityEntry(_build_bigrams(names), *_build_keys(names))
+
+
+class _BigramMatrix:
+    """Sparse name x bigram matrix of a single domain.
+
+    Stored column-wise: every bigram maps to a compact array of the row ids
+    containing it, so scoring a query only touches the columns of its own
+    bigrams instead of every entity.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty matrix."""
+        self._row_entity: list[str | None] = []
+        self._row_size = array("H")
+        self._columns: dict[str, array] = {}
+        self._entity_rows: dict[str, tuple[list[int], list[frozenset[str]]]] = {}
+        self._dead_rows = 0
+
+    def __bool__(self) -> bool:
+        """Return True if the matrix has any live rows."""
+        return bool(self._entity_rows)
+
+    def add(self, entity_id: str, rows: list[frozenset[str]]) -> None:
+        """Append the name rows of an entity."""
+        row_ids: list[int] = []
+        self._entity_rows[entity_id] = (row_ids, rows)
+        for bigrams in rows:
+            row = len(self._row_entity)
+            row_ids.append(row)
+            self._row_entity.append(entity_id)
+            self._row_size.append(min(len(bigrams), 0xFFFF))
+            for bigram in bigrams:
+                if (column := self._columns.get(bigram)) is None:
+                    column = self._columns[bigram] = array("I")
+                column.append(row)
+
+    def remove(self, entity_id: str) -> None:
+        """Tombstone the rows of an entity, compacting when worthwhile."""
+        if (entity_rows := self._entity_rows.pop(entity_id, None)) is None:
+            return
+
+        for row in entity_rows[0]:
+            self._row_entity[row] = None
+        self._dead_rows += len(entity_rows[0])
+
+        if self._dead_rows >= _COMPACT_THRESHOLD and (
+            self._dead_rows * 4 >= len(self._row_entity)
+        ):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rebuild the matrix without tombstoned rows."""
+        entity_rows = self._entity_rows
+        self._row_entity = []
+        self._row_size = array("H")
+        self._columns = {}
+        self._entity_rows = {}
+        self._dead_rows = 0
+        for entity_id, (_, rows) in entity_rows.items():
+            self.add(entity_id, rows)
+
+    def score(self, query: frozenset[str]) -> dict[str, float]:
+        """Score every entity sharing a bigram with the query.
+
+        The sparse matrix-vector product is done with Counter updates over
+        the posting arrays of the query bigrams, which run in C.
+        """
+        counts: Counter[int] = Counter()
+        for bigram in query:
+            if (column := self._columns.get(bigram)) is not None:
+                counts.update(column)
+
+        query_size = len(query)
+        row_entity = self._row_entity
+        row_size = self._row_size
+        best: dict[str, float] = {}
+
+        for row, overlap in counts.items():
+            if (entity_id := row_entity[row]) is None:
+                continue
+            size = row_size[row]
+            # How much of the name is in the query, plus a Dice term that
+            # prefers names that do not leave much of the query unexplained
+            score = _COVERAGE_WEIGHT * overlap / size + (
+                1 - _COVERAGE_WEIGHT
+            ) * (2 * overlap / (size + query_size))
+            if score > best.get(entity_id, 0.0):
+                best[entity_id] = score
+
+        return best
+
+
+class EntityNameIndex:
+    """Precomputed bigram and pinyin index of entity names and aliases."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the index."""
+        self.hass = hass
+        self._matrices: dict[str, _BigramMatrix] = {}
+        self._full: dict[str, set[str]] = {}
+        self._partial: dict[str, set[str]] = {}
+        self._entries: dict[str, _EntityEntry] = {}
+        self._unsub: list[CALLBACK_TYPE] = []
+        self._pending: set[str] = set()
+        self._reindex_debouncer: Debouncer[Any] = Debouncer(
+            hass,
+            LOGGER,
+            cooldown=REINDEX_COOLDOWN,
+            immediate=False,
+            function=self._async_reindex_pending,
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return True if pinyin matching is possible."""
+        return lazy_pinyin is not None
+
+    def __len__(self) -> int:
+        """Return the number of indexed entities."""
+        return len(self._entries)
+
+    async def async_setup(self) -> None:
+        """Build the index and start tracking registry and state changes."""
+        if not self.available:
+            LOGGER.warning(
+                "pypinyin is not installed, homophone-tolerant matching is disabled"
+            )
+
+        names = {
+            entity_id: self._collect_names(entity_id)
+            for entity_id in self.hass.states.async_entity_ids()
+        }
+        # pypinyin lookups are CPU bound, keep them off the event loop
+        entries = await self.hass.async_add_executor_job(
+            lambda: {entity_id: _build_entry(n) for entity_id, n in names.items()}
+        )
+        for entity_id, entry in entries.items():
+            self._add(entity_id, entry)
+
+        LOGGER.debug("Built entity name index for %d entities", len(self._entries))
+
+        self._unsub.append(
+            self.hass.bus.async_listen(
+                entity_registry.EVENT_ENTITY_REGISTRY_UPDATED,
+                self._async_registry_updated,
+            )
+        )
+        self._unsub.append(
+            self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED,
+                self._async_state_changed,
+                event_filter=_state_event_filter,
+            )
+        )
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop tracking changes."""
+        while self._unsub:
+            self._unsub.pop()()
+        self._reindex_debouncer.async_cancel()
+        self._pending.clear()
+
+    def rank(self, domain: str, text: str, limit: int = 5) -> list[EntityMatch]:
+        """Return the best scoring entities of a domain for a text.
+
+        Ties are broken by entity_id so results never depend on state
+        iteration order.
+        """
+        matrix = self._matrices.get(domain)
+        text = normalize_text(text)
+        if not matrix or not text:
+            return []
+
+        scores = matrix.score(char_bigrams(text))
+        ranked = heapq.nsmallest(
+            limit, scores.items(), key=lambda item: (-item[1], item[0])
+        )
+        return [EntityMatch(entity_id, score) for entity_id, score in ranked]
+
+    def resolve(self, domain: str, text: str) -> EntityMatch | None:
+        """Return the best match of a domain, or None if weak or ambiguous."""
+        ranked = self.rank(domain, text, limit=2)
+        if not ranked:
+            return None
+
+        if len(ranked) == 1:
+            return ranked[0] if ranked[0].score >= MIN_SOLE_MATCH_SCORE else None
+
+        if ranked[0].score < MIN_MATCH_SCORE:
+            return None
+
+        if ranked[0].score - ranked[1].score < AMBIGUITY_MARGIN:
+            LOGGER.debug(
+                "Ambiguous match for '%s': %s, deferring to LLM", text, ranked
+            )
+            return None
+
+        return ranked[0]
+
+    def match(self, domain: str, text: str) -> str | None:
+        """Return the entity of a domain whose name sounds like the text.
+
+        Names fully contained in the text win over partial matches and longer
+        names win over shorter ones. Returns None when the best match is
+        ambiguous.
+        """
+        syllables = to_fuzzy_pinyin(normalize_text(text))
+        if not syllables:
+            return None
+
+        prefix = f"{domain}."
+        for table in (self._full, self._partial):
+            best_length = 0
+            best: set[str] = set()
+
+            for start in range(len(syllables)):
+                for end in range(len(syllables), start, -1):
+                    length = end - start
+                    if length < best_length:
+                        break
+                    candidates = table.get(" ".join(syllables[start:end]))
+                    if not candidates:
+                        continue
+                    candidates = {c for c in candidates if c.startswith(prefix)}
+                    if not candidates:
+                        continue
+                    if length > best_length:
+                        best_length = length
+                        best = set(candidates)
+                    else:
+                        best |= candidates
+
+            if len(best) == 1:
+                return next(iter(best))
+            if best:
+                LOGGER.debug("Ambiguous pinyin match for '%s': %s", text, sorted(best))
+                return None
+
+        return None
+
+    def _collect_names(self, entity_id: str) -> list[str]:
+        """Collect friendly name, object id, registry name and aliases."""
+        names: list[str] = [entity_id.split(".", 1)[1]]
+
+        if state := self.hass.states.get(entity_id):
+            if friendly_name := state.attributes.get("friendly_name"):
+                names.append(friendly_name)
+
+        ent_reg = entity_registry.async_get(self.hass)
+        if reg_entity := ent_reg.async_get(entity_id):
+            if reg_entity.name:
+                names.append(reg_entity.name)
+            if reg_entity.aliases:
+                names.extend(reg_entity.aliases)
+
+        return names
+
+    def _add(self, entity_id: str, entry: _EntityEntry) -> None:
+        """Add precomputed data of an entity to the lookup tables."""
+        if not entry.bigrams:
+            return
+
+        self._entries[entity_id] = entry
+        domain = entity_id.split(".", 1)[0]
+        if (matrix := self._matrices.get(domain)) is None:
+            matrix = self._matrices[domain] = _BigramMatrix()
+        matrix.add(entity_id, entry.bigrams)
+
+        for key in entry.full_keys:
+            self._full.setdefault(key, set()).add(entity_id)
+        for key in entry.partial_keys:
+            self._partial.setdefault(key, set()).add(entity_id)
+
+    def _remove(self, entity_id: str) -> None:
+        """Remove an entity from the lookup tables."""
+        if (entry := self._entries.pop(entity_id, None)) is None:
+            return
+
+        if matrix := self._matrices.get(entity_id.split(".", 1)[0]):
+            matrix.remove(entity_id)
+
+        for table, entity_keys in (
+            (self._full, entry.full_keys),
+            (self._partial, entry.partial_keys),
+        ):
+            for key in entity_keys:
+                if bucket := table.get(key):
+                    bucket.discard(entity_id)
+                    if not bucket:
+                        del table[key]
+
+    @callback
+    def _async_reindex(self, entity_id: str) -> None:
+        """Queue an entity to have its keys rebuilt with the next batch."""
+        self._pending.add(entity_id)
+        self._reindex_debouncer.async_schedule_call()
+
+    async def _async_reindex_pending(self) -> None:
+        """Rebuild the keys of the queued entities."""
+        pending, self._pending = self._pending, set()
+        ent_reg = entity_registry.async_get(self.hass)
+        names: dict[str, list[str]] = {}
+        for entity_id in pending:
+            if self.hass.states.get(entity_id) is None and (
+                ent_reg.async_get(entity_id) is None
+            ):
+                self._remove(entity_id)
+            else:
+                names[entity_id] = self._collect_names(entity_id)
+        if not names:
+            return
+
+        # Same as the initial build, pypinyin stays off the event loop
+        entries = await self.hass.async_add_executor_job(
+            lambda: {entity_id: _build_entry(n) for entity_id, n in names.items()}
+        )
+        for entity_id, entry in entries.items():
+            self._remove(entity_id)
+            self._add(entity_id, entry)
+
+    @callback
+    def _async_registry_updated(self, event: Event[Any]) -> None:
+        """Update the index when an entity is renamed or gets new aliases."""
+        data = event.data
+        if old_entity_id := data.get("old_entity_id"):
+            self._remove(old_entity_id)
+        if data["action"] == "remove":
+            self._remove(data["entity_id"])
+        else:
+            self._async_reindex(data["entity_id"])
+
+    @callback
+    def _async_state_changed(self, event: Event[Any]) -> None:
+        """Update the index when an entity appears, disappears or is renamed."""
+        self._async_reindex(event.data["entity_id"])
+
+
+@callback
+def _state_event_filter(event_data: dict[str, Any]) -> bool:
+    """Only let through state changes that can affect entity names."""
+    old_state = event_data["old_state"]
+    new_state = event_data["new_state"]
+    if old_state is None or new_state is None:
+        return True
+    return old_state.attributes.get("friendly_name") != new_state.attributes.get(
+        "friendly_name"
+    )
@@ -0,0 +1,519 @@
+"""Service call execution for Layer 1 and intent handlers.
+
+Calls are diffed against the current entity state first: a light that is
+already on is not turned on again, and an air conditioner that is off gets a
+single set_temperature call carrying the hvac_mode instead of turn_on,
+set_hvac_mode and set_temperature in a row. Every skipped call saves a round
+trip, which is 0.5-2 s for cloud integrations.
+
+With optimistic acknowledgement enabled, calls are dispatched in the
+background and the reply goes out immediately. The expected state_changed
+events are then awaited with a timeout, and failures are reported afterwards
+through a persistent notification and an event.
+
+Bulk commands ("打开所有窗帘", "关闭客厅所有灯") are executed as one
+multi-entity call per service where possible. Only if that call fails are the
+entities retried individually, concurrently and with a bounded limit, so a few
+slow or broken devices don't serialize the whole command.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Iterable
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+from homeassistant.const import STATE_OFF, STATE_ON, STATE_UNAVAILABLE
+from homeassistant.components import persistent_notification
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant, State, callback
+from homeassistant.helpers import area_registry, device_registry, entity_registry
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import (
+    ACTUATION_VERIFY_TIMEOUT,
+    BULK_MAX_CONCURRENCY,
+    DOMAIN,
+    EVENT_ACTUATION_FAILED,
+    LOGGER,
+)
+from .entity_index import normalize_text
+
+# Cover device classes that "所有窗帘" must never open or close
+EXCLUDED_COVER_DEVICE_CLASSES = ("garage", "door", "gate")
+
+# CoverEntityFeature flags, kept local to avoid importing the cover platform
+_COVER_OPEN = 1
+_COVER_CLOSE = 2
+_COVER_OPEN_TILT = 16
+_COVER_CLOSE_TILT = 32
+
+# States an entity is already in after a plain on/off call
+_TARGET_STATES = {
+    "turn_on": (STATE_ON,),
+    "turn_off": (STATE_OFF,),
+    "open_cover": ("open", "opening"),
+    "close_cover": ("closed", "closing"),
+    "media_play": ("playing",),
+    "media_pause": ("paused",),
+}
+# Service data keys compared against state attributes: key -> (attribute, scale),
+# a None attribute compares against the state itself
+_TARGET_ATTRIBUTES: dict[tuple[str, str], dict[str, tuple[str | None, float]]] = {
+    ("climate", "set_temperature"): {"temperature": ("temperature", 1), "hvac_mode": (None, 1)},
+    ("climate", "set_hvac_mode"): {"hvac_mode": (None, 1)},
+    ("climate", "set_fan_mode"): {"fan_mode": ("fan_mode", 1)},
+    ("climate", "set_swing_mode"): {"swing_mode": ("swing_mode", 1)},
+    ("climate", "set_humidity"): {"humidity": ("humidity", 1)},
+    ("cover", "set_cover_position"): {"position": ("current_position", 1)},
+    ("fan", "set_percentage"): {"percentage": ("percentage", 1)},
+    ("media_player", "volume_set"): {"volume_level": ("volume_level", 1)},
+    ("light", "turn_on"): {"brightness_pct": ("brightness", 100 / 255)},
+}
+
+
+class PlannedCall(NamedTuple):
+    """A single service call planned by diffing desired and current state."""
+
+    domain: str
+    service: str
+    data: dict[str, Any]
+    # Failure is ignored, e.g. climate.turn_on on units without it
+    optional: bool = False
+
+
+@callback
+def is_redundant_call(
+    state: State | None, service: str, data: dict[str, Any] | None = None
+) -> bool:
+    """Return True if the entity is already in the state the call would set."""
+    if state is None or state.state == STATE_UNAVAILABLE:
+        return False
+
+    params = {k: v for k, v in (data or {}).items() if k != "entity_id"}
+    domain = state.domain
+
+    if not params:
+        if domain == "climate" and service == "turn_on":
+            return state.state != STATE_OFF
+        return state.state in _TARGET_STATES.get(service, ())
+
+    targets = _TARGET_ATTRIBUTES.get((domain, service))
+    if targets is None or not params.keys() <= targets.keys():
+        return False
+    if domain == "light" and state.state != STATE_ON:
+        return False
+    if service == "set_temperature" and "hvac_mode" not in params and state.state == STATE_OFF:
+        return False
+
+    for key, value in params.items():
+        attribute, scale = targets[key]
+        current = state.state if attribute is None else state.attributes.get(attribute)
+        if current is None or not _same_value(current, value, scale):
+            return False
+    return True
+
+
+@callback
+def is_comparable_call(call: PlannedCall) -> bool:
+    """Return True if the state shows whether the call took effect.
+
+    Plain on/off calls and data listed in _TARGET_ATTRIBUTES can be compared,
+    brightness_step_pct or a color cannot.
+    """
+    params = call.data.keys() - {"entity_id"}
+    if not params:
+        return call.service in _TARGET_STATES
+    targets = _TARGET_ATTRIBUTES.get((call.domain, call.service))
+    return targets is not None and params <= targets.keys()
+
+
+def _same_value(current: Any, value: Any, scale: float) -> bool:
+    """Compare a state attribute with a service data value."""
+    try:
+        if scale != 1:
+            # Scaled attributes (brightness 0-255) only match to the percent
+            return round(float(current) * scale) == round(float(value))
+        return round(float(current), 2) == round(float(value), 2)
+    except (TypeError, ValueError):
+        return current == value
+
+
+@callback
+def plan_climate_calls(
+    state: State,
+    temperature: float | None = None,
+    hvac_mode: str | None = None,
+    turn_on: bool = True,
+    turn_on_optional: bool = True,
+) -> list[PlannedCall]:
+    """Plan the fewest calls that bring a climate entity to the desired state.
+
+    A mode change and a temperature change are merged into one set_temperature
+    call, and setting a mode turns the unit on, so turn_on is only needed when
+    the unit is off and no mode is given. turn_on is optional unless
+    turn_on_optional is False, for callers where turning on is the whole action.
+    """
+    entity_id = state.entity_id
+    mode_change = hvac_mode is not None and state.state != hvac_mode
+
+    current = state.attributes.get("temperature")
+    temperature_change = temperature is not None and (
+        current is None or float(current) != float(temperature)
+    )
+
+    if temperature_change:
+        data: dict[str, Any] = {"entity_id": entity_id, "temperature": temperature}
+        if mode_change:
+            data["hvac_mode"] = hvac_mode
+        calls = [PlannedCall("climate", "set_temperature", data)]
+    elif mode_change:
+        calls = [
+            PlannedCall(
+                "climate", "set_hvac_mode",
+                {"entity_id": entity_id, "hvac_mode": hvac_mode},
+            )
+        ]
+    else:
+        calls = []
+
+    if turn_on and state.state == STATE_OFF and not mode_change:
+        calls.insert(
+            0,
+            PlannedCall(
+                "climate", "turn_on", {"entity_id": entity_id},
+                optional=turn_on_optional,
+            ),
+        )
+
+    return calls
+
+
+async def async_execute_planned(
+    hass: HomeAssistant, calls: Iterable[PlannedCall]
+) -> int:
+    """Execute planned calls in order and return how many were issued."""
+    issued = 0
+    for call in calls:
+        try:
+            await hass.services.async_call(
+                call.domain, call.service, call.data, blocking=True
+            )
+        except Exception as err:
+            if not call.optional:
+                raise
+            LOGGER.debug("Optional %s.%s failed: %s", call.domain, call.service, err)
+        issued += 1
+    return issued
+
+
+@callback
+def async_dispatch_verified(
+    hass: HomeAssistant,
+    job: Awaitable[Any],
+    expected: Iterable[PlannedCall],
+    description: str,
+    timeout: float = ACTUATION_VERIFY_TIMEOUT,
+) -> None:
+    """Run a service call job in the background and verify its outcome.
+
+    The caller replies right away. Entities targeted by the expected calls
+    are watched until they reach the state the calls set, and a failing job
+    or a timeout is reported through a notification and an event.
+    """
+    hass.async_create_background_task(
+        _async_verify(hass, job, list(expected), description, timeout),
+        f"{DOMAIN} verify {description}",
+    )
+
+
+async def _async_verify(
+    hass: HomeAssistant,
+    job: Awaitable[Any],
+    expected: list[PlannedCall],
+    description: str,
+    timeout: float,
+) -> None:
+    """Await the job, then wait for the expected state changes."""
+    # Later calls for the same entity supersede earlier ones (turn_on, then set_temperature),
+    # None waits for any change, the call's data cannot be compared with the state
+    pending: dict[str, PlannedCall | None] = {}
+    for call in expected:
+        if (call.domain, call.service) not in _TARGET_ATTRIBUTES and (
+            call.service not in _TARGET_STATES
+        ):
+            # Nothing to compare against, e.g. volume_up or media_next_track
+            continue
+        entity_ids = call.data.get("entity_id", [])
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        for entity_id in entity_ids:
+            pending[entity_id] = call if is_comparable_call(call) else None
+
+    updated = {
+        entity_id: state.last_updated
+        for entity_id in pending
+        if (state := hass.states.get(entity_id)) is not None
+    }
+    reached = asyncio.Event()
+
+    @callback
+    def _async_state_changed(event: Event[EventStateChangedData]) -> None:
+        """Drop entities from pending once they reach the expected state."""
+        entity_id = event.data["entity_id"]
+        if entity_id not in pending:
+            return
+        call = pending[entity_id]
+        if call is None or is_redundant_call(
+            event.data["new_state"], call.service, call.data
+        ):
+            del pending[entity_id]
+            if not pending:
+                reached.set()
+
+    unsub = async_track_state_change_event(hass, list(pending), _async_state_changed)
+    try:
+        try:
+            await job
+        except Exception as err:
+            _async_report_failure(hass, description, list(pending), str(err))
+            return
+
+        # Fast devices may have reported before the job returned
+        for entity_id, call in list(pending.items()):
+            state = hass.states.get(entity_id)
+            if call is None:
+                if state is not None and state.last_updated != updated.get(entity_id):
+                    del pending[entity_id]
+            elif is_redundant_call(state, call.service, call.data):
+                del pending[entity_id]
+
+        if not pending:
+            return
+        try:
+            async with asyncio.timeout(timeout):
+                await reached.wait()
+        except TimeoutError:
+            _async_report_failure(
+                hass, description, list(pending), f"{timeout}秒内设备状态未改变"
+            )
+    finally:
+        unsub()
+
+
+@callback
+def _async_report_failure(
+    hass: HomeAssistant, description: str, entity_ids: list[str], reason: str
+) -> None:
+    """Report an optimistically acknowledged call that did not take effect."""
+    LOGGER.warning(
+        "Optimistic call '%s' not confirmed for %s: %s", description, entity_ids, reason
+    )
+    hass.bus.async_fire(
+        EVENT_ACTUATION_FAILED,
+        {"description": description, "entity_ids": entity_ids, "reason": reason},
+    )
+    persistent_notification.async_create(
+        hass,
+        f"「{description}」可能没有成功：{reason}",
+        title="Yanfeng AI Task",
+        notification_id=f"{DOMAIN}_actuation_failed",
+    )
+
+
+@dataclass(slots=True)
+class BulkCall:
+    """A service call targeting several entities at once."""
+
+    domain: str
+    service: str
+    entity_ids: list[str]
+    data: dict[str, Any] = field(default_factory=dict)
+    # Service retried per entity if the primary service fails for it
+    fallback_service: str | None = None
+
+
+@dataclass(slots=True)
+class BulkResult:
+    """Per-entity outcome of a bulk execution."""
+
+    succeeded: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def all_failed(self) -> bool:
+        """Return True if something failed and nothing succeeded."""
+        return bool(self.failed) and not self.succeeded
+
+
+async def async_execute_bulk(
+    hass: HomeAssistant,
+    calls: Iterable[BulkCall],
+    max_concurrency: int = BULK_MAX_CONCURRENCY,
+) -> BulkResult:
+    """Execute bulk calls concurrently and collect per-entity outcomes."""
+    result = BulkResult()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    await asyncio.gather(
+        *(
+            _async_execute_group(hass, call, semaphore, result)
+            for call in calls
+            if call.entity_ids
+        )
+    )
+
+    if result.failed:
+        LOGGER.warning(
+            "Bulk control: %d succeeded, %d failed: %s",
+            len(result.succeeded), len(result.failed), result.failed,
+        )
+    return result
+
+
+async def _async_execute_group(
+    hass: HomeAssistant,
+    call: BulkCall,
+    semaphore: asyncio.Semaphore,
+    result: BulkResult,
+) -> None:
+    """Run one multi-entity call, retrying entities individually on failure."""
+    try:
+        await hass.services.async_call(
+            call.domain,
+            call.service,
+            {**call.data, "entity_id": call.entity_ids},
+            blocking=True,
+        )
+    except Exception as err:
+        LOGGER.debug(
+            "Bulk %s.%s failed for %d entities (%s), retrying individually",
+            call.domain, call.service, len(call.entity_ids), err,
+        )
+        error = err
+    else:
+        result.succeeded.extend(call.entity_ids)
+        return
+
+    # A single entity already failed the primary service, only the fallback is left
+    retry_services = [] if len(call.entity_ids) == 1 else [call.service]
+    if call.fallback_service:
+        retry_services.append(call.fallback_service)
+    if not retry_services:
+        result.failed[call.entity_ids[0]] = str(error)
+        return
+
+    async def _async_execute_single(entity_id: str) -> None:
+        """Retry one entity with the primary and fallback services."""
+        async with semaphore:
+            last_error: Exception = error
+            for service in retry_services:
+                try:
+                    await hass.services.async_call(
+                        call.domain,
+                        service,
+                        {**call.data, "entity_id": entity_id},
+                        blocking=True,
+                    )
+                except Exception as err:
+                    last_error = err
+                    continue
+                result.succeeded.append(entity_id)
+                return
+
+            result.failed[entity_id] = str(last_error)
+
+    await asyncio.gather(*(_async_execute_single(e) for e in call.entity_ids))
+
+
+@callback
+def cover_bulk_calls(states: Iterable[State], close: bool) -> list[BulkCall]:
+    """Group covers by the service they support for opening or closing."""
+    service = "close_cover" if close else "open_cover"
+    tilt_service = "close_cover_tilt" if close else "open_cover_tilt"
+    move_flag = _COVER_CLOSE if close else _COVER_OPEN
+    tilt_flag = _COVER_CLOSE_TILT if close else _COVER_OPEN_TILT
+
+    movable: list[str] = []
+    tilt_only: list[str] = []
+    for state in states:
+        if is_redundant_call(state, service):
+            continue
+        features = state.attributes.get("supported_features", 0) or 0
+        if features & tilt_flag and not features & move_flag:
+            tilt_only.append(state.entity_id)
+        else:
+            movable.append(state.entity_id)
+
+    return [
+        BulkCall("cover", service, movable, fallback_service=tilt_service),
+        BulkCall("cover", tilt_service, tilt_only),
+    ]
+
+
+@callback
+def find_area(hass: HomeAssistant, text: str) -> area_registry.AreaEntry | None:
+    """Return the area whose name or alias appears in the text, longest first."""
+    text = normalize_text(text)
+    best: area_registry.AreaEntry | None = None
+    best_length = 0
+
+    for area in area_registry.async_get(hass).async_list_areas():
+        for name in (area.name, *area.aliases):
+            name = normalize_text(name)
+            if name and name in text and len(name) > best_length:
+                best, best_length = area, len(name)
+
+    return best
+
+
+@callback
+def async_resolve_targets(
+    hass: HomeAssistant,
+    domain: str,
+    area_id: str | None = None,
+    device_classes: Iterable[str] | None = None,
+    exclude_device_classes: Iterable[str] = (),
+) -> list[State]:
+    """Return available states of a domain, optionally scoped to an area.
+
+    Entities inherit the area of their device unless they have their own.
+    """
+    ent_reg = entity_registry.async_get(hass)
+    device_classes = set(device_classes) if device_classes is not None else None
+    excluded = set(exclude_device_classes)
+
+    area_entity_ids: set[str] | None = None
+    if area_id is not None:
+        area_entity_ids = {
+            entry.entity_id
+            for entry in entity_registry.async_entries_for_area(ent_reg, area_id)
+        }
+        dev_reg = device_registry.async_get(hass)
+        for device in device_registry.async_entries_for_area(dev_reg, area_id):
+            area_entity_ids.update(
+                entry.entity_id
+                for entry in entity_registry.async_entries_for_device(
+                    ent_reg, device.id
+                )
+                if entry.area_id is None
+            )
+
+    targets = []
+    for state in hass.states.async_all(domain):
+        if state.state == STATE_UNAVAILABLE:
+            continue
+        if area_entity_ids is not None and state.entity_id not in area_entity_ids:
+            continue
+
+        device_class = state.attributes.get("device_class")
+        if device_class is None and (entry := ent_reg.async_get(state.entity_id)):
+            device_class = entry.device_class or entry.original_device_class
+        if device_class in excluded:
+            continue
+        if device_classes is not None and device_class not in device_classes:
+            continue
+
+        targets.append(state)
+
+    return sorted(targets, key=lambda state: state.entity_id)
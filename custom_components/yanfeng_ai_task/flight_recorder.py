@@ -0,0 +1,184 @@
+"""Flight recorder of recent turns for the Yanfeng AI Task integration.
+
+Keeps the last FLIGHT_RECORDER_SIZE turns of a config entry: which layer
+handled them, the model, token usage, per-stage timings and the outcome, so
+that "it was slow at 7 am" can be looked at afterwards. Utterances are kept
+as an HMAC-SHA256 under a random key of the install, so repeats can be spotted
+without the hash giving away the text, unless the entry allows recording text.
+
+Entries are available in diagnostics and through the dump_flight_recorder
+service, and can also be appended to a rotating JSONL file.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import FLIGHT_RECORDER_FILE_MAX_BYTES, FLIGHT_RECORDER_SIZE, LOGGER
+
+# Layers that can handle (part of) a turn
+LAYER_STATE_QUERY = "state_query"
+LAYER_SERVICE_CALL = "service_call"
+LAYER_LLM = "llm"
+LAYER_IMAGE = "image"
+
+OUTCOME_SUCCESS = "success"
+OUTCOME_ERROR = "error"
+OUTCOME_CANCELLED = "cancelled"
+
+
+@dataclass(slots=True)
+class TurnRecord:
+    """What happened in one turn."""
+
+    timestamp: str
+    kind: str
+    conversation_id: str | None
+    utterance_hash: str | None
+    utterance: str | None = None
+    layers: list[str] = field(default_factory=list)
+    model: str | None = None
+    requests: int = 0
+    usage: dict[str, int] = field(default_factory=dict)
+    # Milliseconds per stage, summed when a stage runs more than once
+    timings_ms: dict[str, float] = field(default_factory=dict)
+    duration_ms: float | None = None
+    outcome: str = OUTCOME_SUCCESS
+    error: str | None = None
+
+
+_current_turn: ContextVar[TurnRecord | None] = ContextVar(
+    "yanfeng_ai_task_current_turn", default=None
+)
+
+
+def hash_utterance(text: str, key: bytes) -> str:
+    """Return a short keyed hash of an utterance, to spot repeats.
+
+    A plain hash of a short command is reversed by hashing likely commands,
+    the key kept with the config entry prevents that.
+    """
+    return hmac.new(key, text.strip().encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def note_layer(layer: str) -> None:
+    """Record that a layer handled (part of) the current turn."""
+    if (turn := _current_turn.get()) is not None and layer not in turn.layers:
+        turn.layers.append(layer)
+
+
+def note_stage(stage: str, seconds: float) -> None:
+    """Add the time spent in a stage to the current turn."""
+    if (turn := _current_turn.get()) is not None:
+        turn.timings_ms[stage] = round(
+            turn.timings_ms.get(stage, 0) + seconds * 1000, 1
+        )
+
+
+def note_response(model: str, usage: dict[str, Any] | None) -> None:
+    """Add an LLM response of the current turn, with its token usage."""
+    if (turn := _current_turn.get()) is None:
+        return
+    turn.model = model
+    turn.requests += 1
+    for key, value in (usage or {}).items():
+        if isinstance(value, int):
+            turn.usage[key] = turn.usage.get(key, 0) + value
+
+
+class FlightRecorder:
+    """Ring buffer of the last turns of a config entry."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant | None = None,
+        path: str | None = None,
+        record_text: bool = False,
+        hash_key: bytes | None = None,
+        max_turns: int = FLIGHT_RECORDER_SIZE,
+    ) -> None:
+        """Initialize the recorder, also writing to path if both are set.
+
+        Without hash_key no utterance hash is kept.
+        """
+        self._hass = hass
+        self._path = path
+        self._record_text = record_text
+        self._hash_key = hash_key
+        self._turns: deque[TurnRecord] = deque(maxlen=max_turns)
+        self._file_lock = threading.Lock()
+
+    @contextmanager
+    def turn(
+        self, kind: str, conversation_id: str | None, utterance: str | None
+    ) -> Iterator[TurnRecord]:
+        """Record the body of a with block as a turn.
+
+        Exceptions mark the turn as failed and are re-raised.
+        """
+        record = TurnRecord(
+            timestamp=dt_util.utcnow().isoformat(),
+            kind=kind,
+            conversation_id=conversation_id,
+            utterance_hash=(
+                hash_utterance(utterance, self._hash_key)
+                if utterance and self._hash_key
+                else None
+            ),
+            utterance=utterance if self._record_text else None,
+        )
+        token = _current_turn.set(record)
+        start = time.monotonic()
+        try:
+            yield record
+        except asyncio.CancelledError:
+            record.outcome = OUTCOME_CANCELLED
+            raise
+        except Exception as err:
+            record.outcome = OUTCOME_ERROR
+            record.error = type(err).__name__
+            raise
+        finally:
+            record.duration_ms = round((time.monotonic() - start) * 1000, 1)
+            _current_turn.reset(token)
+            self._add(record)
+
+    def _add(self, record: TurnRecord) -> None:
+        """Keep a finished turn, and append it to the file if enabled."""
+        self._turns.append(record)
+        if self._hass is not None and self._path is not None:
+            self._hass.async_add_executor_job(self._write, asdict(record))
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        """Append an entry to the file, rotating it when it gets too big."""
+        assert self._path is not None
+        with self._file_lock:
+            try:
+                if (
+                    os.path.exists(self._path)
+                    and os.path.getsize(self._path) > FLIGHT_RECORDER_FILE_MAX_BYTES
+                ):
+                    os.replace(self._path, f"{self._path}.1")
+                with open(self._path, "a", encoding="utf-8") as file:
+                    file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as err:
+                LOGGER.warning("Failed to write flight recorder file %s: %s", self._path, err)
+
+    def turns(self) -> list[dict[str, Any]]:
+        """Return the recorded turns, oldest first."""
+        return [asdict(record) for record in self._turns]
@@ -6,28 +6,204 @@ import aiohttp
 import asyncio
 import json
 import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Awaitable, Callable
+from functools import partial
 from typing import Any
 
 from homeassistant.exceptions import HomeAssistantError
 
 from .const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN_SECONDS,
     ERROR_GETTING_RESPONSE,
     ERROR_INVALID_RESPONSE,
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_LATENCY_WINDOW,
+    HEDGE_MIN_SAMPLES,
     LOGGER,
     MODELSCOPE_API_BASE,
     TASK_MAX_WAIT_TIME,
     TASK_POLL_INTERVAL,
 )
+from .chaos import CHAOS_CHAT, CHAOS_ERROR_TEXT, CHAOS_IMAGE, CHAOS_POLL, ChaosInjector
+from .metrics import STAGE_HTTP_FIRST_BYTE, STAGE_HTTP_TOTAL, LatencyMetrics
+from .tracing import Tracer
 
 
-class ModelScopeAPIClient:
+class ChatProvider(ABC):
+    """An OpenAI-compatible chat completions backend."""
+
+    # Identifies the backend in ModelHealth, models of two backends may share a name
+    name: str
+
+    @abstractmethod
+    async def generate_text(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        max_tokens: int = 2048,
+        stream: bool = False,
+        tools: list[dict[str, Any]] | None = None,
+        tool_choice: str = "auto",
+        fallback_model: str | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Generate a chat completion with optional function calling.
+
+        Returns the response in OpenAI format. fallback_model is used for
+        hedged requests, see async_hedged_chat. timeout bounds each request,
+        raising TimeoutError.
+        """
+
+
+async def async_hedged_chat(
+    health: ModelHealth | None,
+    provider: str,
+    model: str,
+    fallback_model: str | None,
+    send: Callable[[str], Awaitable[dict[str, Any]]],
+    timeout: float | None = None,
+) -> dict[str, Any]:
+    """Send a chat request with send(model), hedged to a fallback model.
+
+    With a fallback_model and model health tracking, a request slower than
+    the model's rolling p95 is hedged: the same request is sent to the
+    fallback model and the first response wins. A model whose circuit is
+    open is skipped in favour of the other.
+
+    Failures, timeouts and requests cancelled after the model's p95 (the
+    turn deadline passed) count against the model's circuit at provider.
+    """
+    # Requests cancelled because the other model answered first
+    losers: set[str] = set()
+
+    async def timed(model: str) -> dict[str, Any]:
+        """Send a request, recording its latency or failure."""
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout(timeout):
+                result = await send(model)
+        except (HomeAssistantError, TimeoutError):
+            if health is not None:
+                health.record_failure(provider, model)
+            raise
+        except asyncio.CancelledError:
+            # A quick cancel is the caller's choice, e.g. Layer 1 succeeded
+            if (
+                health is not None
+                and model not in losers
+                and time.monotonic() - start >= health.hedge_delay(provider, model)
+            ):
+                health.record_failure(provider, model)
+            raise
+        if health is not None:
+            health.record_success(provider, model, time.monotonic() - start)
+        return result
+
+    if health is None or not fallback_model or fallback_model == model:
+        return await timed(model)
+
+    if health.is_degraded(provider, model) and not health.is_degraded(
+        provider, fallback_model
+    ):
+        LOGGER.info("Chat model %s is degraded, using %s", model, fallback_model)
+        return await timed(fallback_model)
+
+    primary = asyncio.create_task(timed(model))
+    tasks = {primary: model}
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(
+            pending, timeout=health.hedge_delay(provider, model)
+        )
+        if done and primary.exception() is None:
+            return primary.result()
+
+        if health.is_degraded(provider, fallback_model):
+            return await primary
+
+        if done:
+            LOGGER.info("Chat model %s failed, retrying with %s", model, fallback_model)
+        else:
+            LOGGER.info(
+                "Chat model %s exceeded %.1fs, hedging with %s",
+                model, health.hedge_delay(provider, model), fallback_model,
+            )
+        hedge = asyncio.create_task(timed(fallback_model))
+        tasks[hedge] = fallback_model
+        pending.add(hedge)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge and not primary.done():
+                        # The primary lost the race, count it as a stall
+                        health.record_failure(provider, model)
+                    losers.update(tasks[other] for other in pending)
+                    return task.result()
+
+        # Both failed, report the primary model's error
+        raise primary.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class RateLimiter:
+    """Token bucket limiting optional requests, such as speculative ones."""
+
+    def __init__(self, max_requests: int, window: float) -> None:
+        """Allow max_requests per window seconds, refilled continuously."""
+        self._capacity = float(max_requests)
+        self._rate = max_requests / window
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting."""
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class ModelScopeAPIClient(ChatProvider):
     """Client for ModelScope API-Inference."""
 
-    def __init__(self, session: aiohttp.ClientSession, api_key: str) -> None:
+    name = "modelscope"
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        api_key: str,
+        health: ModelHealth | None = None,
+        base_url: str = MODELSCOPE_API_BASE,
+        metrics: LatencyMetrics | None = None,
+        tracer: Tracer | None = None,
+        chaos: ChaosInjector | None = None,
+    ) -> None:
         """Initialize the client."""
         self.session = session
         self.api_key = api_key
-        self.modelscope_base_url = MODELSCOPE_API_BASE
+        # Shared across clients of a config entry, see ModelHealth
+        self.health = health
+        self.metrics = metrics
+        self.tracer = tracer
+        # Fault injection for resilience testing, off unless a profile is set
+        self.chaos = chaos
+        self.modelscope_base_url = base_url
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
@@ -43,8 +219,40 @@ class ModelScopeAPIClient:
         stream: bool = False,
         tools: list[dict[str, Any]] | None = None,
         tool_choice: str = "auto",
+        fallback_model: str | None = None,
+        timeout: float | None = None,
     ) -> dict[str, Any]:
         """Generate text using ModelScope API-Inference with optional function calling."""
+        return await async_hedged_chat(
+            self.health,
+            self.name,
+            model,
+            fallback_model,
+            partial(
+                self._async_chat_completion,
+                messages=messages,
+                temperature=temperature,
+                top_p=top_p,
+                max_tokens=max_tokens,
+                stream=stream,
+                tools=tools,
+                tool_choice=tool_choice,
+            ),
+            timeout,
+        )
+
+    async def _async_chat_completion(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float,
+        top_p: float,
+        max_tokens: int,
+        stream: bool,
+        tools: list[dict[str, Any]] | None,
+        tool_choice: str,
+    ) -> dict[str, Any]:
+        """Send one chat completion request to ModelScope."""
 
         payload = {
             "model": model,
@@ -74,11 +282,18 @@ class ModelScopeAPIClient:
             
             LOGGER.debug("Sending ModelScope request to %s with payload: %s", url, payload)
             
+            start = time.monotonic()
+            if self.chaos is not None and (status := await self.chaos.async_inject(CHAOS_CHAT)):
+                LOGGER.error("ModelScope API error: %s - %s", status, CHAOS_ERROR_TEXT)
+                raise HomeAssistantError(f"ModelScope API error: {status}")
+
             async with self.session.post(
                 url,
                 headers=headers,
                 json=payload,
             ) as response:
+                if self.metrics is not None:
+                    self.metrics.record_since(STAGE_HTTP_FIRST_BYTE, start)
                 if response.status != 200:
                     error_text = await response.text()
                     LOGGER.error(
@@ -86,7 +301,9 @@ class ModelScopeAPIClient:
                     )
                     raise HomeAssistantError(f"ModelScope API error: {response.status}")
 
-                result = await response.json()
+                result = await self._async_read_json(response, CHAOS_CHAT)
+                if self.metrics is not None:
+                    self.metrics.record_since(STAGE_HTTP_TOTAL, start)
                 LOGGER.debug("Received ModelScope response: %s", result)
                 
                 # Convert ModelScope response to OpenAI format for compatibility
@@ -113,6 +330,14 @@ class ModelScopeAPIClient:
             LOGGER.error("Failed to decode ModelScope JSON response: %s", err)
             raise HomeAssistantError(ERROR_INVALID_RESPONSE) from err
 
+    async def _async_read_json(
+        self, response: aiohttp.ClientResponse, endpoint: str
+    ) -> Any:
+        """Return the JSON body of a response, corrupted if the chaos profile says so."""
+        if self.chaos is None:
+            return await response.json()
+        return json.loads(self.chaos.corrupt(endpoint, await response.text()))
+
     async def upload_file(
         self,
         file_path: str,
@@ -225,6 +450,10 @@ class ModelScopeAPIClient:
             LOGGER.debug("Submitting ModelScope image task to %s with payload keys: %s",
                         url, list(payload.keys()))
 
+            if self.chaos is not None and (status := await self.chaos.async_inject(CHAOS_IMAGE)):
+                LOGGER.error("ModelScope Image API error: %s - %s", status, CHAOS_ERROR_TEXT)
+                raise HomeAssistantError(f"ModelScope Image API error: {status}")
+
             async with self.session.post(
                 url,
                 headers=headers,
@@ -237,7 +466,7 @@ class ModelScopeAPIClient:
                     )
                     raise HomeAssistantError(f"ModelScope Image API error: {response.status}")
 
-                result = await response.json()
+                result = await self._async_read_json(response, CHAOS_IMAGE)
                 LOGGER.debug("Received ModelScope task response: %s", result)
 
                 if "task_id" not in result:
@@ -270,6 +499,12 @@ class ModelScopeAPIClient:
             try:
                 url = f"{self.modelscope_base_url}v1/tasks/{task_id}"
                 LOGGER.debug("Polling ModelScope task: %s", url)
+                poll_start = time.monotonic()
+                if self.chaos is not None and (
+                    status := await self.chaos.async_inject(CHAOS_POLL)
+                ):
+                    LOGGER.error("ModelScope task polling error: %s - %s", status, CHAOS_ERROR_TEXT)
+                    raise HomeAssistantError(f"ModelScope task polling error: {status}")
                 
                 async with self.session.get(url, headers=headers) as response:
                     if response.status != 200:
@@ -279,10 +514,16 @@ class ModelScopeAPIClient:
                         )
                         raise HomeAssistantError(f"ModelScope task polling error: {response.status}")
 
-                    result = await response.json()
+                    result = await self._async_read_json(response, CHAOS_POLL)
+                    if self.chaos is not None and self.chaos.is_stuck(task_id):
+                        result = {**result, "task_status": "RUNNING"}
                     LOGGER.debug("Task status response: %s", result)
                     
                     task_status = result.get("task_status")
+                    if self.tracer is not None:
+                        self.tracer.add_span(
+                            "image_poll", poll_start, task_id=task_id, task_status=task_status
+                        )
                     
                     if task_status == "SUCCEED":
                         # Convert to OpenAI format for compatibility
@@ -323,6 +564,152 @@ class ModelScopeAPIClient:
                 raise HomeAssistantError(ERROR_INVALID_RESPONSE) from err
 
 
+class OpenAICompatibleClient(ChatProvider):
+    """Client for a generic OpenAI-compatible server, such as llama.cpp or vLLM."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        base_url: str,
+        api_key: str | None = None,
+        model: str | None = None,
+        health: ModelHealth | None = None,
+        metrics: LatencyMetrics | None = None,
+    ) -> None:
+        """Initialize the client.
+
+        base_url includes the API version, e.g. http://192.168.1.10:8080/v1.
+        model replaces the requested model, for servers with a single model.
+        """
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.name = self.base_url
+        self.model = model
+        self.health = health
+        self.metrics = metrics
+        self.headers = {"Content-Type": "application/json"}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+    async def generate_text(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        max_tokens: int = 2048,
+        stream: bool = False,
+        tools: list[dict[str, Any]] | None = None,
+        tool_choice: str = "auto",
+        fallback_model: str | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Generate text using the server's chat completions endpoint."""
+        if self.model:
+            # The server's model answers for the whole turn, hedging included
+            model, fallback_model = self.model, None
+
+        payload: dict[str, Any] = {
+            "messages": messages,
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_tokens": max_tokens,
+        }
+        if tools:
+            payload["tools"] = tools
+            payload["tool_choice"] = tool_choice
+
+        return await async_hedged_chat(
+            self.health,
+            self.name,
+            model,
+            fallback_model,
+            lambda model: self._async_chat_completion({**payload, "model": model}),
+            timeout,
+        )
+
+    async def _async_chat_completion(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Send one chat completion request to the server."""
+        url = f"{self.base_url}/chat/completions"
+        LOGGER.debug("Sending chat request to %s for model %s", url, payload["model"])
+
+        start = time.monotonic()
+        try:
+            async with self.session.post(
+                url, headers=self.headers, json=payload
+            ) as response:
+                if self.metrics is not None:
+                    self.metrics.record_since(STAGE_HTTP_FIRST_BYTE, start)
+                if response.status != 200:
+                    error_text = await response.text()
+                    LOGGER.error(
+                        "Chat server error at %s: %s - %s",
+                        url, response.status, error_text,
+                    )
+                    raise HomeAssistantError(f"Chat server error: {response.status}")
+
+                result = await response.json()
+                if self.metrics is not None:
+                    self.metrics.record_since(STAGE_HTTP_TOTAL, start)
+                if "choices" not in result:
+                    LOGGER.error("Invalid chat server response format: %s", result)
+                    raise HomeAssistantError(f"Invalid response from {self.base_url}")
+                return result
+
+        except aiohttp.ClientError as err:
+            LOGGER.error("Network error calling chat server %s: %s", url, err)
+            raise HomeAssistantError(f"Error getting response from {self.base_url}") from err
+        except json.JSONDecodeError as err:
+            LOGGER.error("Failed to decode chat server JSON response: %s", err)
+            raise HomeAssistantError(f"Invalid response from {self.base_url}") from err
+
+
+class FailoverClient(ChatProvider):
+    """Chat provider that falls back to a second provider when the first fails."""
+
+    def __init__(
+        self,
+        primary: ChatProvider,
+        secondary: ChatProvider,
+        attempt_timeout: float | None = None,
+    ) -> None:
+        """Initialize the client.
+
+        attempt_timeout bounds each request to the first provider tried, it
+        must leave the second one time within the turn's deadline.
+        """
+        self.primary = primary
+        self.secondary = secondary
+        self.name = f"{primary.name}+{secondary.name}"
+        self.attempt_timeout = attempt_timeout
+
+    async def generate_text(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """Generate text with the primary provider, or the secondary if it fails.
+
+        Failed and timed out requests open the primary's circuit breaker, so a
+        slow or down primary is skipped until it recovers.
+        """
+        primary, secondary = self.primary, self.secondary
+        health = getattr(primary, "health", None)
+        primary_model = getattr(primary, "model", None) or model
+        if health is not None and health.is_degraded(primary.name, primary_model):
+            LOGGER.debug("Primary chat provider is degraded, using the secondary")
+            primary, secondary = secondary, primary
+
+        try:
+            return await primary.generate_text(
+                model, messages, **kwargs, timeout=self.attempt_timeout
+            )
+        except (HomeAssistantError, TimeoutError) as err:
+            LOGGER.warning("Chat provider failed (%s), failing over", err)
+            return await secondary.generate_text(model, messages, **kwargs)
+
+
 def format_messages_for_modelscope(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Format messages for ModelScope API."""
     formatted = []
@@ -344,5 +731,65 @@ def format_messages_for_modelscope(messages: list[dict[str, Any]]) -> list[dict[
                 "role": role,
                 "content": str(content)
             })
-    
-    return formatted
\ No newline at end of file
+
+    return formatted
+
+
+class ModelHealth:
+    """Rolling latency and circuit breaker state per provider and chat model.
+
+    A local server without a model name of its own is sent the ModelScope
+    model id, so state is kept per (provider, model), never per model.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty state."""
+        self._latencies: dict[tuple[str, str], deque[float]] = {}
+        self._failures: dict[tuple[str, str], int] = {}
+        self._open_until: dict[tuple[str, str], float] = {}
+
+    def hedge_delay(self, provider: str, model: str) -> float:
+        """Return the rolling p95 latency of a model, after which to hedge."""
+        latencies = self._latencies.get((provider, model))
+        if latencies is None or len(latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def is_degraded(self, provider: str, model: str) -> bool:
+        """Return True while the circuit of a model is open."""
+        return time.monotonic() < self._open_until.get((provider, model), 0)
+
+    def record_success(self, provider: str, model: str, latency: float) -> None:
+        """Record a successful request, closing the circuit."""
+        key = (provider, model)
+        self._latencies.setdefault(key, deque(maxlen=HEDGE_LATENCY_WINDOW)).append(
+            latency
+        )
+        self._failures.pop(key, None)
+        self._open_until.pop(key, None)
+
+    def as_dict(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """Return the hedge delay and circuit state of each model seen, by provider."""
+        result: dict[str, dict[str, dict[str, Any]]] = {}
+        for provider, model in sorted({*self._latencies, *self._failures}):
+            result.setdefault(provider, {})[model] = {
+                "hedge_delay": round(self.hedge_delay(provider, model), 3),
+                "samples": len(self._latencies.get((provider, model), ())),
+                "consecutive_failures": self._failures.get((provider, model), 0),
+                "degraded": self.is_degraded(provider, model),
+            }
+        return result
+
+    def record_failure(self, provider: str, model: str) -> None:
+        """Record a failed or stalled request, opening the circuit if repeated."""
+        key = (provider, model)
+        failures = self._failures.get(key, 0) + 1
+        self._failures[key] = failures
+        if failures >= CIRCUIT_FAILURE_THRESHOLD:
+            # Re-opens after each failed trial request once the period is over
+            LOGGER.warning(
+                "Chat model %s at %s failed %d times in a row, skipping it for %ds",
+                model, provider, failures, CIRCUIT_OPEN_SECONDS,
+            )
+            self._open_until[key] = time.monotonic() + CIRCUIT_OPEN_SECONDS
@@ -21,7 +21,18 @@ from homeassistant.const import (
     STATE_OFF,
 )
 
-from .const import DOMAIN, LOGGER
+from .const import CONF_OPTIMISTIC_ACK, DEFAULT_OPTIMISTIC_ACK, DOMAIN, LOGGER
+from .executor import (
+    EXCLUDED_COVER_DEVICE_CLASSES,
+    PlannedCall,
+    async_dispatch_verified,
+    async_execute_bulk,
+    async_execute_planned,
+    async_resolve_targets,
+    cover_bulk_calls,
+    is_redundant_call,
+    plan_climate_calls,
+)
 
 # 缓存 YAML 配置
 _YAML_CACHE = {}
@@ -98,6 +109,37 @@ class BaseIntent(intent.IntentHandler):
             self.config = config.get(self.intent_type, {})
             self._config_loaded = True
 
+    def _optimistic_ack(self, intent_obj: intent.Intent) -> bool:
+        """Return the optimistic_ack option of the conversation agent handling the intent.
+
+        The option is set per conversation subentry, so intents handled by
+        another agent use the default.
+        """
+        agent_id = intent_obj.conversation_agent_id
+        registry_entry = (
+            entity_registry.async_get(self.hass).async_get(agent_id) if agent_id else None
+        )
+        if registry_entry is None or registry_entry.platform != DOMAIN:
+            return DEFAULT_OPTIMISTIC_ACK
+
+        entry = self.hass.config_entries.async_get_entry(registry_entry.config_entry_id)
+        subentry = entry and entry.subentries.get(registry_entry.config_subentry_id)
+        if not subentry:
+            return DEFAULT_OPTIMISTIC_ACK
+        return subentry.data.get(CONF_OPTIMISTIC_ACK, DEFAULT_OPTIMISTIC_ACK)
+
+    async def _async_execute(
+        self, intent_obj: intent.Intent, calls: list[PlannedCall], description: str
+    ) -> None:
+        """Execute calls, or only dispatch them if the agent acknowledges optimistically."""
+        if self._optimistic_ack(intent_obj):
+            # Reply right away, failures are reported once verified
+            async_dispatch_verified(
+                self.hass, async_execute_planned(self.hass, calls), calls, description
+            )
+            return
+        await async_execute_planned(self.hass, calls)
+
     def get_slot_value(self, slot_data):
         """Extract value from slot data."""
         if not slot_data:
@@ -155,9 +197,6 @@ class ClimateSetTemperatureIntent(BaseIntent):
                 response, ERROR_NO_ENTITY, f"找不到名为 {name} 的空调设备"
             )
 
-        # Ensure entity is on
-        await self.ensure_entity_on(state.entity_id)
-
         # Get temperature range
         min_temp = float(state.attributes.get('min_temp', 16))
         max_temp = float(state.attributes.get('max_temp', 30))
@@ -169,34 +208,27 @@ class ClimateSetTemperatureIntent(BaseIntent):
             )
 
         # Smart mode detection: auto set cooling/heating based on current temperature
+        hvac_mode = None
         current_temp = state.attributes.get('current_temperature')
         if current_temp is not None:
             if current_temp > temperature:
                 # Too hot, need cooling
-                await self.hass.services.async_call(
-                    "climate", "set_hvac_mode",
-                    {"entity_id": state.entity_id, "hvac_mode": "cool"},
-                    blocking=True
-                )
+                hvac_mode = "cool"
                 mode_text = "制冷"
             elif current_temp < temperature:
                 # Too cold, need heating
-                await self.hass.services.async_call(
-                    "climate", "set_hvac_mode",
-                    {"entity_id": state.entity_id, "hvac_mode": "heat"},
-                    blocking=True
-                )
+                hvac_mode = "heat"
                 mode_text = "制热"
             else:
                 mode_text = "当前"
         else:
             mode_text = ""
 
-        # Set temperature
-        await self.hass.services.async_call(
-            "climate", "set_temperature",
-            {"entity_id": state.entity_id, "temperature": temperature},
-            blocking=True
+        # Only issue the calls that change something, mode and temperature in one
+        await self._async_execute(
+            intent_obj,
+            plan_climate_calls(state, temperature=temperature, hvac_mode=hvac_mode),
+            f"将{name}设置为{temperature}度",
         )
 
         return self._set_speech_response(
@@ -204,17 +236,6 @@ class ClimateSetTemperatureIntent(BaseIntent):
             f"已将{name}设置为{mode_text}模式，温度{temperature}度"
         )
 
-    async def ensure_entity_on(self, entity_id: str):
-        """Ensure climate entity is turned on."""
-        try:
-            await self.hass.services.async_call(
-                "climate", "turn_on",
-                {"entity_id": entity_id},
-                blocking=True
-            )
-        except Exception:
-            pass  # Entity might not support turn_on
-
 
 class ClimateSetModeIntent(BaseIntent):
     """Handle climate mode setting intent."""
@@ -267,11 +288,10 @@ class ClimateSetModeIntent(BaseIntent):
                 response, ERROR_INVALID_MODE, f"不支持的模式: {mode}"
             )
 
-        # Set mode
-        await self.hass.services.async_call(
-            "climate", "set_hvac_mode",
-            {"entity_id": state.entity_id, "hvac_mode": target_mode},
-            blocking=True
+        # Set mode, skipped if the unit is already in it
+        await self._async_execute(
+            intent_obj,
+            plan_climate_calls(state, hvac_mode=target_mode), f"将{name}设置为{mode}模式"
         )
 
         return self._set_speech_response(
@@ -329,10 +349,13 @@ class ClimateSetFanModeIntent(BaseIntent):
             )
 
         # Set fan mode
-        await self.hass.services.async_call(
-            "climate", "set_fan_mode",
-            {"entity_id": state.entity_id, "fan_mode": target_fan_mode},
-            blocking=True
+        await self._async_execute(
+            intent_obj,
+            [PlannedCall(
+                "climate", "set_fan_mode",
+                {"entity_id": state.entity_id, "fan_mode": target_fan_mode},
+            )],
+            f"将{name}的风速设置为{fan_mode}",
         )
 
         return self._set_speech_response(
@@ -366,10 +389,13 @@ class ClimateSetHumidityIntent(BaseIntent):
             )
 
         # Set humidity
-        await self.hass.services.async_call(
-            "climate", "set_humidity",
-            {"entity_id": state.entity_id, "humidity": humidity},
-            blocking=True
+        await self._async_execute(
+            intent_obj,
+            [PlannedCall(
+                "climate", "set_humidity",
+                {"entity_id": state.entity_id, "humidity": humidity},
+            )],
+            f"将{name}的湿度设置为{humidity}%",
         )
 
         return self._set_speech_response(
@@ -427,10 +453,13 @@ class ClimateSetSwingModeIntent(BaseIntent):
             )
 
         # Set swing mode
-        await self.hass.services.async_call(
-            "climate", "set_swing_mode",
-            {"entity_id": state.entity_id, "swing_mode": target_swing_mode},
-            blocking=True
+        await self._async_execute(
+            intent_obj,
+            [PlannedCall(
+                "climate", "set_swing_mode",
+                {"entity_id": state.entity_id, "swing_mode": target_swing_mode},
+            )],
+            f"将{name}的摆风设置为{swing_mode}",
         )
 
         return self._set_speech_response(
@@ -454,12 +483,14 @@ class CoverControlAllIntent(BaseIntent):
 
         response = intent.IntentResponse(intent=intent_obj, language="zh-cn")
 
-        # Find all cover entities
+        # Find all cover entities, never garage doors or gates
         covers = [
-            state.entity_id
-            for state in self.hass.states.async_all()
-            if state.entity_id.startswith("cover.")
-            and not any(x in state.entity_id.lower() for x in ["garage", "车库"])
+            state
+            for state in async_resolve_targets(
+                self.hass, "cover",
+                exclude_device_classes=EXCLUDED_COVER_DEVICE_CLASSES,
+            )
+            if not any(x in state.entity_id.lower() for x in ["garage", "车库"])
         ]
 
         if not covers:
@@ -469,38 +500,22 @@ class CoverControlAllIntent(BaseIntent):
 
         # Determine action
         is_close = any(x in action for x in ["关", "close"])
-        service = "close_cover" if is_close else "open_cover"
 
-        # Execute batch operation
-        success_count = 0
-        failed_entities = []
-
-        for entity_id in covers:
-            try:
-                await self.hass.services.async_call(
-                    "cover", service,
-                    {"entity_id": entity_id},
-                    blocking=True
-                )
-                success_count += 1
-            except Exception:
-                try:
-                    # Try tilt service for some covers
-                    tilt_service = "close_cover_tilt" if is_close else "open_cover_tilt"
-                    await self.hass.services.async_call(
-                        "cover", tilt_service,
-                        {"entity_id": entity_id},
-                        blocking=True
-                    )
-                    success_count += 1
-                except Exception:
-                    failed_entities.append(entity_id)
+        # Execute batch operation, tilt-only covers get the tilt service
+        # and covers already in the requested state are skipped
+        result = await async_execute_bulk(
+            self.hass, cover_bulk_calls(covers, is_close)
+        )
+        success_count = len(result.succeeded)
+        failed_entities = list(result.failed)
 
         # Generate response message
-        if success_count == 0:
+        action_text = "关闭" if is_close else "打开"
+        if not success_count and not failed_entities:
+            message = f"所有窗帘都已经{action_text}"
+        elif success_count == 0:
             message = "所有设备操作都失败了"
         else:
-            action_text = "关闭" if is_close else "打开"
             message = f"已{action_text} {success_count} 个窗帘"
             if failed_entities:
                 message += f"，但有 {len(failed_entities)} 个设备失败"
@@ -562,10 +577,9 @@ class HassLightSetAllIntent(BaseIntent):
             pass
 
         # Turn on light with parameters
-        await self.hass.services.async_call(
-            "light", "turn_on",
-            service_data,
-            blocking=True
+        await self._async_execute(
+            intent_obj,
+            [PlannedCall("light", "turn_on", service_data)], f"设置{name}的参数"
         )
 
         return self._set_speech_response(
@@ -679,33 +693,31 @@ class HassSetStateIntent(BaseIntent):
 
         # Special handling for climate entities
         if domain == "climate" and is_turn_on:
-            # For climate, also set a reasonable mode
+            # For climate, also set a reasonable mode; skipped if already on
+            hvac_modes = found_entity.attributes.get('hvac_modes', [])
             try:
-                await self.hass.services.async_call(
-                    domain, service,
-                    {"entity_id": found_entity.entity_id},
-                    blocking=True
-                )
-                # Try to set to auto mode if available
-                hvac_modes = found_entity.attributes.get('hvac_modes', [])
-                if 'heat_cool' in hvac_modes:
-                    await self.hass.services.async_call(
-                        "climate", "set_hvac_mode",
-                        {"entity_id": found_entity.entity_id, "hvac_mode": "heat_cool"},
-                        blocking=True
+                if found_entity.state == STATE_OFF:
+                    await self._async_execute(
+                        intent_obj,
+                        plan_climate_calls(
+                            found_entity,
+                            hvac_mode="heat_cool" if "heat_cool" in hvac_modes else None,
+                            turn_on_optional=False,
+                        ),
+                        f"打开{name}",
                     )
             except Exception as err:
                 LOGGER.error("Failed to turn on climate: %s", err)
                 return self._set_error_response(
                     response, ERROR_SERVICE_CALL, f"无法操作{name}"
                 )
-        else:
+        elif not is_redundant_call(found_entity, service):
             # For other entities, just call turn_on/turn_off
             try:
-                await self.hass.services.async_call(
-                    domain, service,
-                    {"entity_id": found_entity.entity_id},
-                    blocking=True
+                await self._async_execute(
+                    intent_obj,
+                    [PlannedCall(domain, service, {"entity_id": found_entity.entity_id})],
+                    f"{'打开' if is_turn_on else '关闭'}{name}",
                 )
             except Exception as err:
                 LOGGER.error("Failed to %s %s: %s", service, name, err)
@@ -0,0 +1,85 @@
+"""Media player commands for Layer 1.
+
+Maps the media keywords Layer 1 detects ("暂停", "下一首", "音量调大") to
+media_player services. Without a player name, the command goes to the player
+in the named area, or to the one that is currently playing.
+"""
+
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+
+from .executor import async_resolve_targets
+
+
+class MediaCommand(NamedTuple):
+    """A media player service and the words that trigger it."""
+
+    words: tuple[str, ...]
+    service: str
+    data: dict[str, Any]
+    # Speech template, {name} is the player
+    speech: str
+
+
+# Checked in order, so "取消静音" wins over "静音" and "停止播放" over "播放"
+MEDIA_COMMANDS = (
+    MediaCommand(("取消静音",), "volume_mute", {"is_volume_muted": False}, "已取消{name}的静音"),
+    MediaCommand(("静音",), "volume_mute", {"is_volume_muted": True}, "已将{name}静音"),
+    MediaCommand(("停止播放",), "media_stop", {}, "已停止{name}"),
+    MediaCommand(("暂停",), "media_pause", {}, "已暂停{name}"),
+    MediaCommand(("继续播放", "恢复播放", "接着放", "继续放"), "media_play", {}, "已继续播放{name}"),
+    MediaCommand(
+        ("下一首", "下一曲", "下1首", "下1曲", "切歌", "换歌", "换一首"),
+        "media_next_track", {}, "已切换到下一首",
+    ),
+    MediaCommand(
+        ("上一首", "上一曲", "返回上一首", "上1首", "上1曲"),
+        "media_previous_track", {}, "已切换到上一首",
+    ),
+    MediaCommand(
+        ("音量调大", "音量大", "声音大", "大声", "音量调高", "音量加"),
+        "volume_up", {}, "已将{name}的音量调大",
+    ),
+    MediaCommand(
+        ("音量调小", "音量小", "声音小", "小声", "音量调低", "音量减"),
+        "volume_down", {}, "已将{name}的音量调小",
+    ),
+)
+
+# Words stripped from a media command before the rest is used as player name
+_FILLER_WORDS = ("请", "帮我", "麻烦", "把", "将", "给我", "一下", "一点", "的", "再")
+
+
+def match_media_command(user_input: str) -> tuple[MediaCommand, str] | None:
+    """Return the media command in an utterance and the text left for the name."""
+    for command in MEDIA_COMMANDS:
+        for word in command.words:
+            if word in user_input:
+                name_text = user_input.replace(word, " ")
+                for filler in _FILLER_WORDS:
+                    name_text = name_text.replace(filler, " ")
+                return command, name_text.strip()
+    return None
+
+
+@callback
+def find_active_media_player(
+    hass: HomeAssistant, area_id: str | None = None
+) -> str | None:
+    """Return the player a command without a name is meant for.
+
+    Prefers a playing player, then a paused one, most recently changed first.
+    A lone player is used whatever its state.
+    """
+    states = async_resolve_targets(hass, "media_player", area_id=area_id)
+    candidates = (
+        [state for state in states if state.state == "playing"]
+        or [state for state in states if state.state == "paused"]
+        or (states if len(states) == 1 else [])
+    )
+    if not candidates:
+        return None
+    return max(candidates, key=lambda state: state.last_changed).entity_id
@@ -0,0 +1,106 @@
+"""Per-stage latency metrics for the Yanfeng AI Task integration.
+
+Rolling latency samples per stage of a turn (Layer 1, message preparation,
+HTTP, tool calls, LLM iterations), summarised as p50/p95/p99 for the
+diagnostics download and the optional latency sensors.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+import time
+from typing import Any
+
+from .const import METRICS_WINDOW
+from .flight_recorder import note_stage
+
+# Stages of a turn, in the order they usually happen
+STAGE_TURN = "turn"
+STAGE_LAYER1_DETECT = "layer1_detect"
+STAGE_LAYER1_EXTRACT = "layer1_extract"
+STAGE_LAYER1_EXECUTE = "layer1_execute"
+STAGE_MESSAGE_PREP = "message_prep"
+STAGE_HTTP_FIRST_BYTE = "http_first_byte"
+STAGE_HTTP_TOTAL = "http_total"
+STAGE_TOOL_CALL = "tool_call"
+STAGE_LLM_ITERATION = "llm_iteration"
+
+STAGES = (
+    STAGE_TURN,
+    STAGE_LAYER1_DETECT,
+    STAGE_LAYER1_EXTRACT,
+    STAGE_LAYER1_EXECUTE,
+    STAGE_MESSAGE_PREP,
+    STAGE_HTTP_FIRST_BYTE,
+    STAGE_HTTP_TOTAL,
+    STAGE_TOOL_CALL,
+    STAGE_LLM_ITERATION,
+)
+
+
+class LatencyHistogram:
+    """The last METRICS_WINDOW latency samples of one stage, in seconds."""
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        """Initialize the histogram."""
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        """Add a sample."""
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, percent: float) -> float | None:
+        """Return a percentile of the rolling window, None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the count and percentiles in milliseconds."""
+        summary: dict[str, Any] = {"count": self.count}
+        for percent in (50, 95, 99):
+            value = self.percentile(percent)
+            summary[f"p{percent}_ms"] = None if value is None else round(value * 1000, 1)
+        return summary
+
+
+class LatencyMetrics:
+    """Latency histograms of a config entry, keyed by stage."""
+
+    def __init__(self) -> None:
+        """Initialize empty histograms."""
+        self._histograms = {stage: LatencyHistogram() for stage in STAGES}
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record the latency of a stage, also in the current flight recorder turn."""
+        self._histograms.setdefault(stage, LatencyHistogram()).add(seconds)
+        note_stage(stage, seconds)
+
+    def record_since(self, stage: str, start: float) -> None:
+        """Record the latency of a stage that started at time.monotonic() start."""
+        self.record(stage, time.monotonic() - start)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Record how long the body of a with block takes, even if it raises."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record_since(stage, start)
+
+    def get(self, stage: str) -> LatencyHistogram | None:
+        """Return the histogram of a stage."""
+        return self._histograms.get(stage)
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the percentiles of all stages."""
+        return {
+            stage: histogram.as_dict()
+            for stage, histogram in self._histograms.items()
+        }
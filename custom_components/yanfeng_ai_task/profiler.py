@@ -0,0 +1,241 @@
+"""On-demand CPU and memory profiling of the Yanfeng AI Task integration.
+
+The profile service runs a profiling session for a number of seconds or
+turns. cProfile is enabled only while one of the integration's turns is in
+progress. It still records whatever else the event loop runs while a turn
+awaits, so the own time section includes interleaved work of Home
+Assistant and other integrations; the cumulative section filtered to this
+integration is the one to read first. tracemalloc records the allocations
+made on the integration's call paths. The results are written to the
+config directory:
+
+- <name>.pstats      raw cProfile data, for snakeviz or pstats
+- <name>.cpu.txt     the integration's functions by cumulative time, and
+                     all functions by own time while a turn ran
+- <name>.memory.txt  allocation sites still holding memory at the end
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    LOGGER,
+    PROFILE_REPORT_LINES,
+    PROFILE_TRACEMALLOC_FRAMES,
+    PROFILES_DIR,
+)
+
+# Matches the integration's files in pstats and tracemalloc output
+_INTEGRATION_PATTERN = f"*{os.sep}{DOMAIN}{os.sep}*"
+
+# The running session, at most one since cProfile is process wide
+_active: ProfilingSession | None = None
+
+
+class ProfilingSession:
+    """One run of the profile service."""
+
+    def __init__(self, turns: int | None) -> None:
+        """Initialize the session, ending after turns turns if given."""
+        self._profile = cProfile.Profile()
+        self._turns = turns
+        self._turns_running = 0
+        self.turns_done = 0
+        self._enough_turns = asyncio.Event()
+        self._stop_tracemalloc = False
+        self._snapshot_before: tracemalloc.Snapshot | None = None
+
+    def check_cpu(self) -> None:
+        """Fail early if another profiler, e.g. the profiler integration, is active."""
+        probe = cProfile.Profile()
+        try:
+            probe.enable()
+        except ValueError as err:
+            raise HomeAssistantError(f"Another profiler is running: {err}") from err
+        probe.disable()
+
+    def start_memory(self) -> None:
+        """Start tracing allocations (blocking, takes a snapshot)."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            self._stop_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._snapshot_before = tracemalloc.take_snapshot()
+
+    @contextmanager
+    def turn(self) -> Iterator[None]:
+        """Profile the CPU time of a turn, overlapping turns included."""
+        if self._turns_running == 0:
+            self._profile.enable()
+        self._turns_running += 1
+        try:
+            yield
+        finally:
+            self._turns_running -= 1
+            if self._turns_running == 0:
+                self._profile.disable()
+            self.turns_done += 1
+            if self._turns is not None and self.turns_done >= self._turns:
+                self._enough_turns.set()
+
+    async def async_wait(self, seconds: float) -> None:
+        """Wait until enough turns ran or seconds have passed."""
+        try:
+            async with asyncio.timeout(seconds):
+                await self._enough_turns.wait()
+        except TimeoutError:
+            pass
+
+    def stop_cpu(self) -> None:
+        """Stop cProfile, on the event loop thread like the turns."""
+        if self._turns_running:
+            self._profile.disable()
+
+    def stop_memory(self) -> tuple[tracemalloc.Snapshot, int]:
+        """Stop tracing, return the final snapshot and the peak traced bytes."""
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._stop_tracemalloc:
+            tracemalloc.stop()
+        return snapshot, peak
+
+    def write_reports(
+        self, base_path: str, snapshot: tracemalloc.Snapshot, peak: int
+    ) -> dict[str, str]:
+        """Write the pstats, CPU and memory reports (blocking)."""
+        os.makedirs(os.path.dirname(base_path), exist_ok=True)
+        paths = {
+            "pstats": f"{base_path}.pstats",
+            "cpu_report": f"{base_path}.cpu.txt",
+            "memory_report": f"{base_path}.memory.txt",
+        }
+
+        self._profile.dump_stats(paths["pstats"])
+        with open(paths["cpu_report"], "w", encoding="utf-8") as file:
+            file.write(self._cpu_report())
+        with open(paths["memory_report"], "w", encoding="utf-8") as file:
+            file.write(self._memory_report(snapshot, peak))
+        return paths
+
+    def _cpu_report(self) -> str:
+        """Return the CPU report text."""
+        stream = io.StringIO()
+        stream.write(f"Turns profiled: {self.turns_done}\n\n")
+        try:
+            stats = pstats.Stats(self._profile, stream=stream)
+        except TypeError:
+            # No turn ran, nothing was recorded
+            stream.write("No profile data.\n")
+            return stream.getvalue()
+
+        stream.write(f"=== {DOMAIN} functions by cumulative time ===\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+            DOMAIN, PROFILE_REPORT_LINES
+        )
+        stream.write(
+            "=== All functions by own time during the turns ===\n"
+            "(includes event loop work of other integrations interleaved with the turns)\n"
+        )
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(PROFILE_REPORT_LINES)
+        return stream.getvalue()
+
+    def _memory_report(self, snapshot: tracemalloc.Snapshot, peak: int) -> str:
+        """Return the memory report text."""
+        lines = [
+            f"Peak traced memory (all of Home Assistant): {peak / 1024 / 1024:.1f} MiB",
+            "",
+        ]
+        integration = [
+            tracemalloc.Filter(True, _INTEGRATION_PATTERN, all_frames=True),
+            # Not the session's own bookkeeping
+            tracemalloc.Filter(False, __file__),
+        ]
+        after = snapshot.filter_traces(integration)
+        before = (
+            self._snapshot_before.filter_traces(integration)
+            if self._snapshot_before is not None
+            else None
+        )
+
+        by_line = after.compare_to(before, "lineno") if before else after.statistics("lineno")
+        lines.append(
+            f"=== Allocation sites on {DOMAIN} call paths, still held at the end ==="
+        )
+        lines.extend(str(stat) for stat in by_line[:PROFILE_REPORT_LINES])
+
+        lines.extend(["", "=== Largest allocating call paths ==="])
+        by_traceback = (
+            after.compare_to(before, "traceback") if before else after.statistics("traceback")
+        )
+        for stat in by_traceback[:10]:
+            lines.append("")
+            lines.append(str(stat))
+            lines.extend(f"    {line}" for line in stat.traceback.format(most_recent_first=True))
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profile_turn() -> Iterator[None]:
+    """Include a turn in the running profiling session, if any."""
+    if _active is None:
+        yield
+        return
+    with _active.turn():
+        yield
+
+
+async def async_profile(
+    hass: HomeAssistant, seconds: float, turns: int | None
+) -> dict[str, Any]:
+    """Profile the integration for seconds or turns, return the report paths."""
+    global _active  # noqa: PLW0603
+
+    if _active is not None:
+        raise HomeAssistantError("A profiling session is already running")
+
+    session = ProfilingSession(turns)
+    session.check_cpu()
+    # cProfile waits for the first turn
+    _active = session
+    start = time.monotonic()
+    LOGGER.info(
+        "Profiling %s for %ss%s", DOMAIN, seconds, f" or {turns} turns" if turns else ""
+    )
+    try:
+        await hass.async_add_executor_job(session.start_memory)
+        await session.async_wait(seconds)
+    finally:
+        _active = None
+        session.stop_cpu()
+        snapshot, peak = await hass.async_add_executor_job(session.stop_memory)
+
+    name = f"profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}"
+    base_path = hass.config.path(PROFILES_DIR, name)
+    try:
+        paths = await hass.async_add_executor_job(
+            session.write_reports, base_path, snapshot, peak
+        )
+    except OSError as err:
+        raise HomeAssistantError(f"Failed to write profile to {base_path}: {err}") from err
+
+    LOGGER.info("Profile of %d turns written to %s.*", session.turns_done, base_path)
+    return {
+        **paths,
+        "turns": session.turns_done,
+        "seconds": round(time.monotonic() - start, 1),
+    }
@@ -0,0 +1,145 @@
+"""Latency and token usage sensors for the Yanfeng AI Task integration.
+
+Latency: one sensor per stage of a turn, with the p95 of the rolling window
+as state. They are diagnostic and disabled by default.
+
+Token usage: requests, prompt and completion tokens and throughput of each
+subentry, with the per-model breakdown as attributes.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry, ConfigSubentry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+
+from .const import DEFAULT_TITLE, DOMAIN
+from .metrics import (
+    STAGE_HTTP_FIRST_BYTE,
+    STAGE_HTTP_TOTAL,
+    STAGE_LAYER1_DETECT,
+    STAGE_LAYER1_EXECUTE,
+    STAGE_LAYER1_EXTRACT,
+    STAGE_LLM_ITERATION,
+    STAGE_MESSAGE_PREP,
+    STAGE_TOOL_CALL,
+    STAGE_TURN,
+    STAGES,
+)
+from .usage import UsageCounter
+
+# The metrics are in memory, polling them is cheap
+SCAN_INTERVAL = timedelta(seconds=30)
+
+_STAGE_NAMES = {
+    STAGE_TURN: "Turn",
+    STAGE_LAYER1_DETECT: "Layer 1 detect",
+    STAGE_LAYER1_EXTRACT: "Layer 1 extract",
+    STAGE_LAYER1_EXECUTE: "Layer 1 execute",
+    STAGE_MESSAGE_PREP: "Message preparation",
+    STAGE_HTTP_FIRST_BYTE: "HTTP first byte",
+    STAGE_HTTP_TOTAL: "HTTP total",
+    STAGE_TOOL_CALL: "Tool call",
+    STAGE_LLM_ITERATION: "LLM iteration",
+}
+
+# Token usage sensors: name, unit, state class
+_USAGE_SENSORS: dict[str, tuple[str, str, SensorStateClass]] = {
+    "requests": ("LLM requests", "requests", SensorStateClass.TOTAL_INCREASING),
+    "prompt_tokens": ("Prompt tokens", "tokens", SensorStateClass.TOTAL_INCREASING),
+    "completion_tokens": (
+        "Completion tokens", "tokens", SensorStateClass.TOTAL_INCREASING
+    ),
+    "tokens_per_second": ("Tokens per second", "tokens/s", SensorStateClass.MEASUREMENT),
+}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up latency and token usage sensors."""
+    async_add_entities(
+        YanfengAILatencySensor(config_entry, stage) for stage in STAGES
+    )
+
+    for subentry in config_entry.subentries.values():
+        async_add_entities(
+            [
+                YanfengAITokenUsageSensor(config_entry, subentry, kind)
+                for kind in _USAGE_SENSORS
+            ],
+            config_subentry_id=subentry.subentry_id,
+        )
+
+
+class YanfengAILatencySensor(SensorEntity):
+    """p95 latency of one stage of a turn."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, entry: ConfigEntry, stage: str) -> None:
+        """Initialize the sensor."""
+        self.entry = entry
+        self.stage = stage
+        self._attr_name = f"{DEFAULT_TITLE} {_STAGE_NAMES[stage]} latency"
+        self._attr_unique_id = f"{entry.entry_id}_{stage}_latency"
+
+    async def async_update(self) -> None:
+        """Read the p95 and the other percentiles from the metrics."""
+        histogram = self.entry.runtime_data.metrics.get(self.stage)
+        summary: dict[str, Any] = histogram.as_dict() if histogram else {}
+        self._attr_native_value = summary.get("p95_ms")
+        self._attr_extra_state_attributes = summary
+
+
+class YanfengAITokenUsageSensor(SensorEntity):
+    """Token usage total of a subentry, across its models."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, entry: ConfigEntry, subentry: ConfigSubentry, kind: str) -> None:
+        """Initialize the sensor."""
+        self.entry = entry
+        self.subentry = subentry
+        self.kind = kind
+        name, unit, state_class = _USAGE_SENSORS[kind]
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+        self._attr_unique_id = f"{subentry.subentry_id}_{kind}"
+        # Same device as the subentry's conversation or AI task entity
+        self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, subentry.subentry_id)})
+
+    async def async_update(self) -> None:
+        """Read the totals of the subentry and of each of its models."""
+        usage = self.entry.runtime_data.usage
+        self._attr_native_value = _usage_value(
+            usage.subentry_total(self.subentry.subentry_id), self.kind
+        )
+        self._attr_extra_state_attributes = {
+            model: _usage_value(counter, self.kind)
+            for model, counter in usage.subentry_models(self.subentry.subentry_id).items()
+        }
+
+
+def _usage_value(counter: UsageCounter, kind: str) -> float | int | None:
+    """Return one value of a usage counter."""
+    if kind == "tokens_per_second":
+        return counter.tokens_per_second
+    return getattr(counter, kind)
@@ -0,0 +1,443 @@
+"""Slot filling for parameterized Layer 1 commands.
+
+Parses Arabic and Chinese numerals, percentages, relative changes and named
+levels out of utterances like "空调调到二十六度", "灯亮度50%", "窗帘开一半" or
+"调高两度", and turns them into service data for climate, light, cover, fan
+and media_player entities.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import re
+from typing import Any, Literal
+
+from homeassistant.core import State
+
+UNIT_DEGREE = "degree"
+UNIT_PERCENT = "percent"
+# Fan speed levels ("三档"), mapped through the entity's percentage_step
+UNIT_LEVEL = "level"
+
+# Default step for relative changes without a number ("调高一点")
+DEFAULT_TEMPERATURE_STEP = 1
+DEFAULT_PERCENT_STEP = 10
+
+_CHINESE_DIGITS = {
+    "零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+    "五": 5, "六": 6, "七": 7, "八": 8, "九": 9,
+}
+_CHINESE_UNITS = {"十": 10, "百": 100}
+
+_NUMBER = r"\d+(?:\.\d+)?|[零〇一二两三四五六七八九十百]+(?:点[零〇一二三四五六七八九]+)?"
+
+# Words that point at a target value ("调到26度") or a direction ("调高2度").
+# A number is only relative after a verb: "制冷26度" is a mode and a target.
+_ABSOLUTE_VERBS = "到成为至"
+_UP_WORDS = ("调高", "升高", "提高", "调大", "开大", "调亮", "增加", "加大", "加")
+_DOWN_WORDS = ("调低", "降低", "调小", "关小", "调暗", "减少", "减小", "减")
+# Directions of "调亮一点", "大一点", where no number follows
+_UP_CHARS = "高大亮升加增提"
+_DOWN_CHARS = "低小暗降减"
+
+_NUMBER_PATTERN = re.compile(
+    rf"(?P<percent_prefix>百分之)?"
+    rf"(?P<number>{_NUMBER})"
+    rf"\s*(?P<unit>度|℃|°|%|％|档|级)?"
+)
+_RELATIVE_WITHOUT_NUMBER = re.compile(
+    rf"调?(?P<verb>[{_UP_CHARS}{_DOWN_CHARS}])(?:一点|一些|点儿|点|些)"
+)
+# "一点", "一些", "一下" and "一半" are not numbers
+_NOT_A_NUMBER = re.compile(r"一(?:点(?![零〇一二三四五六七八九\d])|些|下|个|会|半)")
+
+# HVAC modes named together with a temperature ("制冷26度")
+_HVAC_MODES = (
+    ("制冷", "cool"),
+    ("制热", "heat"),
+    ("除湿", "dry"),
+    ("抽湿", "dry"),
+    ("送风", "fan_only"),
+    ("自动模式", "auto"),
+)
+
+# Named levels, checked in order: (words, value, unit)
+_NAMED_LEVELS: tuple[tuple[tuple[str, ...], float, str], ...] = (
+    (("最亮", "最大", "最高", "全开", "开满"), 100, UNIT_PERCENT),
+    (("最暗", "最小", "最低"), 1, UNIT_PERCENT),
+    (("一半", "中等", "中速", "中档", "中风"), 50, UNIT_PERCENT),
+    (("低速", "低档", "低风", "小风"), 33, UNIT_PERCENT),
+    (("高速", "高档", "高风", "大风"), 100, UNIT_PERCENT),
+)
+
+# Words that hint at the target domain of a parameterized command
+DOMAIN_HINTS: dict[str, tuple[str, ...]] = {
+    "climate": ("空调", "温度", "暖气", "地暖", "climate"),
+    "light": ("灯", "亮度", "亮", "暗", "light"),
+    "cover": ("窗帘", "卷帘", "百叶", "遮阳", "cover"),
+    "fan": ("风扇", "风速", "fan"),
+    "media_player": ("音量", "声音", "音箱", "电视", "播放器", "media"),
+}
+
+# Words stripped from an utterance before the remainder is used as entity name
+_COMMAND_WORDS = (
+    "请", "帮我", "麻烦", "把", "将", "给我", "再", "稍微", "一点", "一些",
+    "设置为", "设置成", "设置到", "设置", "设为", "设成", "调整到", "调整为", "调整",
+    "调到", "调成", "调为", "调至", "调高", "调低", "调亮", "调暗", "调大", "调小",
+    "升高", "降低", "提高", "增加", "减少", "打开", "开到", "关到", "拉到",
+    "亮度", "温度", "音量", "声音", "位置", "风速", "模式", "的",
+    *(word for word, _ in _HVAC_MODES),
+)
+# Device words that contain a command word ("空调" and "调到" in "空调到26度")
+_PROTECTED_WORDS = ("空调",)
+# One alternation, longest first, so the leftmost and longest word wins
+_COMMAND_PATTERN = re.compile(
+    "|".join(
+        re.escape(word)
+        for word in sorted((*_COMMAND_WORDS, *_PROTECTED_WORDS), key=len, reverse=True)
+    )
+)
+# Single action characters left over at the edges ("窗帘开一半" -> "窗帘开")
+_EDGE_ACTION_CHARS = " 开拉到"
+
+
+class SlotValueError(ValueError):
+    """Raised when a parsed value is outside of what the entity accepts."""
+
+
+@dataclass(slots=True)
+class NumericSlot:
+    """A numeric value parsed from an utterance."""
+
+    value: float | None
+    unit: str | None = None
+    # +1 for "调高", -1 for "调低", 0 for an absolute target
+    direction: Literal[-1, 0, 1] = 0
+    # Text span of the slot, stripped before entity name matching
+    span: str = ""
+    # HVAC mode named with a temperature ("制冷26度")
+    hvac_mode: str | None = None
+
+    @property
+    def relative(self) -> bool:
+        """Return True if the slot is a relative change."""
+        return self.direction != 0
+
+
+def parse_chinese_number(text: str) -> float | None:
+    """Parse Arabic or Chinese numerals ("26", "二十六", "二十六点五")."""
+    if not text:
+        return None
+
+    try:
+        return float(text)
+    except ValueError:
+        pass
+
+    integer_part, _, decimal_part = text.partition("点")
+    total = 0
+    current = None
+    for char in integer_part:
+        if char in _CHINESE_DIGITS:
+            current = _CHINESE_DIGITS[char]
+        elif char in _CHINESE_UNITS:
+            # "十五" means 15, a bare unit counts as one
+            total += (1 if current is None else current) * _CHINESE_UNITS[char]
+            current = None
+        else:
+            return None
+    if current is not None:
+        total += current
+
+    if decimal_part:
+        digits = "".join(str(_CHINESE_DIGITS.get(char, "")) for char in decimal_part)
+        if len(digits) != len(decimal_part):
+            return None
+        return float(f"{total}.{digits}")
+
+    return float(total)
+
+
+def extract_numeric_slot(text: str) -> NumericSlot | None:
+    """Extract a numeric slot from an utterance.
+
+    A number only counts as a slot if it carries a unit or follows a verb
+    that sets ("到", "成") or changes ("高", "低") a value, so names like
+    "二楼灯" are left alone.
+    """
+    cleaned = _NOT_A_NUMBER.sub(lambda m: "#" * len(m.group(0)), text)
+    hvac_mode = next((mode for word, mode in _HVAC_MODES if word in text), None)
+
+    for match in _NUMBER_PATTERN.finditer(cleaned):
+        value = parse_chinese_number(match.group("number"))
+        if value is None:
+            continue
+
+        start = match.start()
+        before = cleaned[:start]
+        unit_text = match.group("unit")
+        percent = bool(match.group("percent_prefix")) or unit_text in ("%", "％")
+
+        direction = 0
+        verb = ""
+        if up := next((word for word in _UP_WORDS if before.endswith(word)), None):
+            direction, verb = 1, up
+        elif down := next((word for word in _DOWN_WORDS if before.endswith(word)), None):
+            direction, verb = -1, down
+
+        if not (unit_text or percent or direction or before[-1:] in _ABSOLUTE_VERBS):
+            continue
+
+        unit = None
+        if percent:
+            unit = UNIT_PERCENT
+        elif unit_text in ("度", "℃", "°"):
+            unit = UNIT_DEGREE
+        elif unit_text in ("档", "级"):
+            unit = UNIT_LEVEL
+
+        return NumericSlot(
+            value=value,
+            unit=unit,
+            direction=direction,
+            # The direction verb goes with the slot, "加" is not in the name
+            span=text[start - len(verb):match.end()],
+            hvac_mode=hvac_mode,
+        )
+
+    for words, value, unit in _NAMED_LEVELS:
+        for word in words:
+            if word in text:
+                return NumericSlot(value=value, unit=unit, span=word)
+
+    if match := _RELATIVE_WITHOUT_NUMBER.search(text):
+        return NumericSlot(
+            value=None,
+            direction=1 if match.group("verb") in _UP_CHARS else -1,
+            span=match.group(0),
+        )
+
+    return None
+
+
+def slot_domains(text: str, slot: NumericSlot) -> list[str]:
+    """Return the domains a parameterized command may target, best first."""
+    domains = [
+        domain for domain, hints in DOMAIN_HINTS.items()
+        if any(hint in text for hint in hints)
+    ]
+    if domains:
+        return domains
+
+    if slot.unit == UNIT_DEGREE:
+        return ["climate"]
+    return ["light", "cover", "fan", "media_player"]
+
+
+def strip_slot_words(text: str, slot: NumericSlot) -> str:
+    """Remove the slot and command words, leaving the entity name."""
+    if slot.span:
+        text = text.replace(slot.span, " ")
+    text = _COMMAND_PATTERN.sub(
+        lambda m: m.group(0) if m.group(0) in _PROTECTED_WORDS else " ", text
+    )
+    return text.strip(_EDGE_ACTION_CHARS)
+
+
+def _percent(value: float, what: str) -> float:
+    """Validate a percentage."""
+    if not 0 <= value <= 100:
+        raise SlotValueError(f"{what}必须在0到100之间")
+    return value
+
+
+def _clamp_percent(value: float) -> float:
+    """Clamp a relative percentage result into 0-100."""
+    return max(0.0, min(100.0, value))
+
+
+def _number(value: float) -> int | float:
+    """Return integral floats as int for cleaner service data and speech."""
+    return int(value) if float(value).is_integer() else round(value, 1)
+
+
+def _fan_level_service(state: State, slot: NumericSlot) -> dict[str, Any]:
+    """Build the service call of a fan speed level ("三档", "调高一档")."""
+    entity_id = state.entity_id
+    name = state.attributes.get("friendly_name", entity_id)
+    levels = int(slot.value)
+    if levels != slot.value or levels < 0:
+        raise SlotValueError("风速档位必须是整数")
+
+    # percentage_step is 100 / speed_count, the percentage of one level
+    step = state.attributes.get("percentage_step")
+    if slot.relative:
+        data: dict[str, Any] = {"entity_id": entity_id}
+        if levels != 1:
+            if not step:
+                raise SlotValueError(f"{name}不支持按档位调节")
+            data["percentage_step"] = _number(min(100.0, levels * step))
+        return {
+            "domain": "fan",
+            "service": "increase_speed" if slot.direction > 0 else "decrease_speed",
+            "data": data,
+            "speech": f"已将{name}调{'高' if slot.direction > 0 else '低'}{levels}档",
+        }
+
+    if not step:
+        raise SlotValueError(f"{name}不支持按档位调节")
+    speed_count = round(100 / step)
+    if levels > speed_count:
+        raise SlotValueError(f"{name}只有{speed_count}档")
+    # Rounded down, Home Assistant rounds the percentage up to a level
+    percentage = 100 if levels == speed_count else int(levels * step + 1e-9)
+    return {
+        "domain": "fan",
+        "service": "set_percentage",
+        "data": {"entity_id": entity_id, "percentage": percentage},
+        "speech": f"已将{name}调到{levels}档",
+    }
+
+
+def build_parameterized_service(
+    state: State, slot: NumericSlot
+) -> dict[str, Any] | None:
+    """Build a service call that applies a numeric slot to an entity.
+
+    Returns None if the entity cannot take the value (e.g. a cover without
+    position support), and raises SlotValueError if the value is out of the
+    entity's range.
+    """
+    domain = state.domain
+    attributes = state.attributes
+    entity_id = state.entity_id
+    name = attributes.get("friendly_name", entity_id)
+
+    if domain == "climate":
+        if slot.unit in (UNIT_PERCENT, UNIT_LEVEL):
+            return None
+
+        if slot.relative:
+            base = attributes.get("temperature")
+            if base is None:
+                base = attributes.get("current_temperature")
+            if base is None:
+                return None
+            step = slot.value
+            if step is None:
+                step = attributes.get("target_temp_step") or DEFAULT_TEMPERATURE_STEP
+            temperature = float(base) + slot.direction * step
+        else:
+            temperature = slot.value
+
+        min_temp = float(attributes.get("min_temp", 16))
+        max_temp = float(attributes.get("max_temp", 30))
+        if temperature < min_temp or temperature > max_temp:
+            raise SlotValueError(f"温度必须在{min_temp}度到{max_temp}度之间")
+
+        temperature = _number(temperature)
+        climate_data: dict[str, Any] = {"entity_id": entity_id, "temperature": temperature}
+        if slot.hvac_mode is not None:
+            if slot.hvac_mode not in attributes.get("hvac_modes", (slot.hvac_mode,)):
+                raise SlotValueError(f"{name}不支持这个模式")
+            climate_data["hvac_mode"] = slot.hvac_mode
+        return {
+            "domain": "climate",
+            "service": "set_temperature",
+            "data": climate_data,
+            "speech": f"已将{name}调到{temperature}度",
+        }
+
+    if slot.unit == UNIT_DEGREE or (slot.unit == UNIT_LEVEL and domain != "fan"):
+        return None
+
+    if domain == "light":
+        if slot.relative:
+            step = _number(slot.value or DEFAULT_PERCENT_STEP)
+            return {
+                "domain": "light",
+                "service": "turn_on",
+                "data": {
+                    "entity_id": entity_id,
+                    "brightness_step_pct": slot.direction * step,
+                },
+                "speech": f"已将{name}调{'亮' if slot.direction > 0 else '暗'}",
+            }
+
+        brightness = _number(_percent(slot.value, "亮度"))
+        return {
+            "domain": "light",
+            "service": "turn_on",
+            "data": {"entity_id": entity_id, "brightness_pct": brightness},
+            "speech": f"已将{name}的亮度调到{brightness}%",
+        }
+
+    if domain == "cover":
+        current = attributes.get("current_position")
+        if current is None:
+            return None
+
+        if slot.relative:
+            position = _clamp_percent(
+                current + slot.direction * (slot.value or DEFAULT_PERCENT_STEP)
+            )
+        else:
+            position = _percent(slot.value, "位置")
+
+        position = _number(position)
+        return {
+            "domain": "cover",
+            "service": "set_cover_position",
+            "data": {"entity_id": entity_id, "position": position},
+            "speech": f"已将{name}开到{position}%",
+        }
+
+    if domain == "fan" and slot.unit == UNIT_LEVEL:
+        return _fan_level_service(state, slot)
+
+    if domain == "fan":
+        if slot.relative:
+            data: dict[str, Any] = {"entity_id": entity_id}
+            if slot.value is not None:
+                data["percentage_step"] = _number(_percent(slot.value, "风速"))
+            return {
+                "domain": "fan",
+                "service": "increase_speed" if slot.direction > 0 else "decrease_speed",
+                "data": data,
+                "speech": f"已将{name}调{'高' if slot.direction > 0 else '低'}",
+            }
+
+        percentage = _number(_percent(slot.value, "风速"))
+        return {
+            "domain": "fan",
+            "service": "set_percentage",
+            "data": {"entity_id": entity_id, "percentage": percentage},
+            "speech": f"已将{name}的风速调到{percentage}%",
+        }
+
+    if domain == "media_player":
+        if slot.relative and slot.value is None:
+            return {
+                "domain": "media_player",
+                "service": "volume_up" if slot.direction > 0 else "volume_down",
+                "data": {"entity_id": entity_id},
+                "speech": f"已将{name}的音量调{'大' if slot.direction > 0 else '小'}",
+            }
+
+        if slot.relative:
+            current = attributes.get("volume_level")
+            if current is None:
+                return None
+            volume = _clamp_percent(current * 100 + slot.direction * slot.value)
+        else:
+            volume = _percent(slot.value, "音量")
+
+        volume = _number(volume)
+        return {
+            "domain": "media_player",
+            "service": "volume_set",
+            "data": {"entity_id": entity_id, "volume_level": round(volume / 100, 2)},
+            "speech": f"已将{name}的音量调到{volume}%",
+        }
+
+    return None
@@ -0,0 +1,382 @@
+"""Read-only state queries for Layer 1.
+
+Answers questions like "客厅温度多少", "空调开着吗" or "门锁了吗" straight
+from entity states and attributes, without an LLM round trip.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import NamedTuple
+
+from homeassistant.const import STATE_OFF, STATE_ON, STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant, State
+
+from .const import LOGGER
+from .entity_index import MIN_SOLE_MATCH_SCORE, EntityNameIndex, normalize_text
+from .executor import async_resolve_targets, find_area
+
+# A query needs a question marker and no control verb ("能帮我打开灯吗" is a command)
+_QUESTION_PATTERN = re.compile(r"吗|什么|多少|几度|是否|有没有|状态|[?？]")
+# How-to and why questions ("锁坏了怎么办", "电视为什么没声音") go to the LLM
+_NOT_STATE_WORDS = ("怎么", "为什么", "如何")
+# Phrases asking for the state itself, needed to answer with a domain's only entity
+_STATE_PHRASES = (
+    "开着", "关着", "亮着", "锁着", "开了吗", "关了吗", "锁了吗", "关好了吗",
+    "锁好了吗", "状态",
+)
+_CONTROL_VERBS = (
+    "打开", "开启", "启动", "关闭", "关掉", "调到", "调成", "调高", "调低", "调亮",
+    "调暗", "调大", "调小", "设置", "设为", "拉开", "拉上", "合上", "暂停", "播放",
+    "切换", "帮我开", "帮我关",
+)
+
+# Words stripped from a question before the rest is used as entity name
+_QUESTION_WORDS = (
+    "请问", "告诉我", "查一下", "查询", "看看", "帮我", "现在", "当前", "目前",
+    "是多少", "多少", "几度", "是否", "有没有", "什么状态", "什么模式", "状态",
+    "开着吗", "关着吗", "亮着吗", "开了吗", "关了吗", "好了吗",
+    "吗", "么", "呢", "了", "着", "的", "是", "?", "？",
+)
+
+
+class AttributeQuery(NamedTuple):
+    """A question about one measurement ("温度", "湿度", "电量")."""
+
+    words: tuple[str, ...]
+    label: str
+    # Sensor device classes that answer the question
+    device_classes: tuple[str, ...]
+    # Attributes of other domains that answer the question: domain -> attribute
+    attributes: dict[str, str]
+
+
+# Checked in order, so "设定温度" wins over "温度"
+_ATTRIBUTE_QUERIES = (
+    AttributeQuery(("设定温度", "目标温度"), "设定温度", (), {"climate": "temperature"}),
+    AttributeQuery(
+        ("温度", "几度", "多热", "多冷"), "温度", ("temperature",),
+        {"climate": "current_temperature"},
+    ),
+    AttributeQuery(
+        ("湿度",), "湿度", ("humidity",),
+        {"climate": "current_humidity", "humidifier": "current_humidity"},
+    ),
+    AttributeQuery(("亮度",), "亮度", ("illuminance",), {"light": "brightness"}),
+    AttributeQuery(("音量",), "音量", (), {"media_player": "volume_level"}),
+    AttributeQuery(("电量", "电池"), "电量", ("battery",), {}),
+    AttributeQuery(("功率",), "功率", ("power",), {}),
+    AttributeQuery(("用电量", "耗电", "能耗"), "用电量", ("energy",), {}),
+    AttributeQuery(("二氧化碳",), "二氧化碳浓度", ("carbon_dioxide",), {}),
+    AttributeQuery(("PM2.5", "pm2.5", "PM25", "pm25"), "PM2.5", ("pm25",), {}),
+    AttributeQuery(("光照",), "光照", ("illuminance",), {}),
+    AttributeQuery(("开了多少", "位置"), "位置", (), {"cover": "current_position"}),
+)
+
+# Domains for "开着吗" style questions, the longest matching hint first and
+# ties in this order, so "门锁" is a lock and "窗帘" a cover, not a sensor
+_STATE_DOMAIN_HINTS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("lock", ("锁",)),
+    ("climate", ("空调", "暖气", "地暖")),
+    ("light", ("灯",)),
+    ("cover", ("窗帘", "卷帘", "百叶", "车库门")),
+    ("fan", ("风扇",)),
+    ("media_player", ("电视", "音箱", "播放器", "音乐")),
+    ("vacuum", ("扫地机", "扫地机器人")),
+    ("binary_sensor", ("门", "窗", "有人", "漏水", "烟")),
+    ("switch", ("开关", "插座")),
+)
+_STATE_DOMAINS = (
+    "light", "switch", "climate", "fan", "cover", "lock", "media_player",
+    "binary_sensor", "vacuum",
+)
+
+_HVAC_MODES = {
+    "cool": "制冷", "heat": "制热", "heat_cool": "自动", "auto": "自动",
+    "dry": "除湿", "fan_only": "送风",
+}
+_BINARY_SENSOR_STATES: dict[str, tuple[str, str]] = {
+    "door": ("开着", "关着"),
+    "garage_door": ("开着", "关着"),
+    "window": ("开着", "关着"),
+    "opening": ("开着", "关着"),
+    "motion": ("有人", "没人"),
+    "occupancy": ("有人", "没人"),
+    "presence": ("有人", "没人"),
+    "moisture": ("检测到漏水", "没有漏水"),
+    "smoke": ("检测到烟雾", "正常"),
+    "gas": ("检测到燃气泄漏", "正常"),
+    "lock": ("未上锁", "已上锁"),
+}
+
+
+def is_state_query(user_input: str) -> bool:
+    """Check if user input is a read-only question about a device."""
+    if not user_input or not _QUESTION_PATTERN.search(user_input):
+        return False
+    return not any(
+        word in user_input for word in (*_CONTROL_VERBS, *_NOT_STATE_WORDS)
+    )
+
+
+def _format_number(value: float) -> str:
+    """Format a number without a trailing .0."""
+    value = round(float(value), 1)
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def _name(state: State) -> str:
+    """Return the spoken name of an entity."""
+    return state.attributes.get("friendly_name") or state.entity_id
+
+
+def _strip_question(text: str, extra: tuple[str, ...] = ()) -> str:
+    """Remove question and measurement words, leaving the entity name."""
+    for word in (*extra, *_QUESTION_WORDS):
+        text = text.replace(word, "")
+    return normalize_text(text)
+
+
+def answer_state_query(
+    user_input: str,
+    hass: HomeAssistant,
+    entity_index: EntityNameIndex | None = None,
+) -> str | None:
+    """Answer a read-only question from entity states.
+
+    Returns the spoken answer, or None if the question can't be answered
+    without the LLM.
+    """
+    for query in _ATTRIBUTE_QUERIES:
+        if any(word in user_input for word in query.words):
+            return _answer_attribute_query(user_input, hass, entity_index, query)
+
+    return _answer_state_question(user_input, hass, entity_index)
+
+
+def _resolve(
+    hass: HomeAssistant,
+    entity_index: EntityNameIndex | None,
+    domain: str,
+    text: str,
+) -> State | None:
+    """Resolve an entity of a domain by name through the entity name index."""
+    if not text or entity_index is None:
+        return None
+    if match := entity_index.resolve(domain, text):
+        return hass.states.get(match.entity_id)
+    if entity_id := entity_index.match(domain, text):
+        return hass.states.get(entity_id)
+    return None
+
+
+def _answer_attribute_query(
+    user_input: str,
+    hass: HomeAssistant,
+    entity_index: EntityNameIndex | None,
+    query: AttributeQuery,
+) -> str | None:
+    """Answer "客厅温度多少" from a sensor or a device attribute."""
+    name_text = _strip_question(user_input, query.words)
+
+    if query.device_classes:
+        if state := _find_sensor(user_input, name_text, hass, entity_index, query):
+            return _render_sensor(state, query)
+
+    for domain, attribute in query.attributes.items():
+        state = _resolve(hass, entity_index, domain, name_text)
+        if state is None and (area := find_area(hass, user_input)):
+            # "客厅温度" without a sensor: fall back to the area's only device
+            candidates = async_resolve_targets(hass, domain, area_id=area.id)
+            state = candidates[0] if len(candidates) == 1 else None
+        if state is None:
+            continue
+
+        value = state.attributes.get(attribute)
+        if value is None:
+            if state.state == STATE_OFF:
+                return f"{_name(state)}关着"
+            continue
+        return _render_attribute(hass, state, attribute, value, query)
+
+    return None
+
+
+def _find_sensor(
+    user_input: str,
+    name_text: str,
+    hass: HomeAssistant,
+    entity_index: EntityNameIndex | None,
+    query: AttributeQuery,
+) -> State | None:
+    """Find the sensor measuring a quantity, by area or by name."""
+    device_classes = set(query.device_classes)
+
+    allowed: set[str] | None = None
+    if area := find_area(hass, user_input):
+        candidates = async_resolve_targets(
+            hass, "sensor", area_id=area.id, device_classes=device_classes
+        )
+        if len(candidates) == 1:
+            return candidates[0]
+        if candidates:
+            # Several sensors in the area, let the name decide
+            allowed = {state.entity_id for state in candidates}
+
+    if entity_index is None:
+        return None
+
+    # Sensors are often named after the quantity ("客厅温度"), keep it in the query
+    for match in entity_index.rank("sensor", normalize_text(user_input), limit=10):
+        if allowed is not None and match.entity_id not in allowed:
+            continue
+        state = hass.states.get(match.entity_id)
+        if state and state.attributes.get("device_class") in device_classes:
+            if match.score >= MIN_SOLE_MATCH_SCORE or allowed is not None:
+                return state
+
+    LOGGER.debug("State query: no %s sensor found for '%s'", query.label, name_text)
+    return None
+
+
+def _render_sensor(state: State, query: AttributeQuery) -> str:
+    """Render a sensor reading, e.g. "客厅温度是24.5°C"."""
+    name = _name(state)
+    if state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+        return f"{name}当前不可用"
+
+    try:
+        value = _format_number(float(state.state))
+    except ValueError:
+        value = state.state
+    unit = state.attributes.get("unit_of_measurement") or ""
+
+    subject = name if query.label in name else f"{name}的{query.label}"
+    return f"{subject}是{value}{unit}"
+
+
+def _render_attribute(
+    hass: HomeAssistant,
+    state: State,
+    attribute: str,
+    value: float,
+    query: AttributeQuery,
+) -> str:
+    """Render a device attribute, e.g. "卧室空调当前温度26度"."""
+    name = _name(state)
+
+    if attribute == "brightness":
+        return f"{name}的亮度是{round(float(value) * 100 / 255)}%"
+    if attribute == "volume_level":
+        return f"{name}的音量是{round(float(value) * 100)}%"
+    if attribute == "current_position":
+        return f"{name}开了{_format_number(value)}%"
+    if attribute == "current_humidity":
+        return f"{name}的湿度是{_format_number(value)}%"
+
+    # Temperatures use the configured unit system
+    unit = hass.config.units.temperature_unit
+    return f"{name}的{query.label}是{_format_number(value)}{unit}"
+
+
+def state_domain_hints(user_input: str) -> list[str]:
+    """Return the domains hinted at by the question, the most specific first."""
+    ranked = sorted(
+        (-len(hint), order, domain)
+        for order, (domain, hints) in enumerate(_STATE_DOMAIN_HINTS)
+        for hint in hints
+        if hint in user_input
+    )
+    return list(dict.fromkeys(domain for *_, domain in ranked))
+
+
+def _answer_state_question(
+    user_input: str,
+    hass: HomeAssistant,
+    entity_index: EntityNameIndex | None,
+) -> str | None:
+    """Answer "空调开着吗" or "门锁了吗" from the entity state."""
+    name_text = _strip_question(user_input)
+    hinted = state_domain_hints(user_input)
+    domains = hinted or list(_STATE_DOMAINS)
+
+    for domain in domains:
+        if state := _resolve(hass, entity_index, domain, name_text):
+            return render_state(state)
+
+    # "门锁了吗" with a single lock in the house, only when asked for the state
+    if (
+        hinted
+        and any(phrase in user_input for phrase in _STATE_PHRASES)
+        and len(states := hass.states.async_all(hinted[0])) == 1
+    ):
+        return render_state(states[0])
+
+    return None
+
+
+def render_state(state: State) -> str:
+    """Render the state of an entity as a short Chinese sentence."""
+    name = _name(state)
+    domain = state.domain
+    attributes = state.attributes
+
+    if state.state == STATE_UNAVAILABLE:
+        return f"{name}当前不可用"
+    if state.state == STATE_UNKNOWN:
+        return f"{name}的状态未知"
+
+    if domain == "lock":
+        return {
+            "locked": f"{name}已上锁",
+            "unlocked": f"{name}未上锁",
+            "jammed": f"{name}卡住了",
+            "locking": f"{name}正在上锁",
+            "unlocking": f"{name}正在开锁",
+        }.get(state.state, f"{name}的状态是{state.state}")
+
+    if domain == "binary_sensor":
+        on_text, off_text = _BINARY_SENSOR_STATES.get(
+            attributes.get("device_class"), ("已触发", "未触发")
+        )
+        return f"{name}{on_text if state.state == STATE_ON else off_text}"
+
+    if domain == "climate":
+        if state.state == STATE_OFF:
+            return f"{name}关着"
+        parts = [f"{name}开着"]
+        if mode := _HVAC_MODES.get(state.state):
+            parts.append(f"{mode}模式")
+        if (target := attributes.get("temperature")) is not None:
+            parts.append(f"设定温度{_format_number(target)}度")
+        if (current := attributes.get("current_temperature")) is not None:
+            parts.append(f"当前{_format_number(current)}度")
+        return "，".join(parts)
+
+    if domain == "cover":
+        text = {
+            "open": "开着", "closed": "关着", "opening": "正在打开", "closing": "正在关闭",
+        }.get(state.state, state.state)
+        position = attributes.get("current_position")
+        if state.state == "open" and position is not None and position < 100:
+            return f"{name}开着，开了{_format_number(position)}%"
+        return f"{name}{text}"
+
+    if domain == "light" and state.state == STATE_ON:
+        if (brightness := attributes.get("brightness")) is not None:
+            return f"{name}开着，亮度{round(brightness * 100 / 255)}%"
+
+    if domain == "media_player":
+        if state.state == "playing":
+            title = attributes.get("media_title")
+            return f"{name}正在播放{title}" if title else f"{name}正在播放"
+        if state.state == "paused":
+            return f"{name}已暂停"
+        if state.state in ("idle", "standby"):
+            return f"{name}空闲中"
+
+    if state.state == STATE_ON:
+        return f"{name}开着"
+    if state.state == STATE_OFF:
+        return f"{name}关着"
+    return f"{name}的状态是{state.state}"
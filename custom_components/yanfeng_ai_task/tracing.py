@@ -0,0 +1,186 @@
+"""Lightweight span tracing for the Yanfeng AI Task integration.
+
+Spans cover a turn, Layer 1, each LLM request, each tool call and image
+polling. The current span is kept in a context variable, so spans opened in
+tasks started by a turn (speculative or hedged requests) join its trace.
+
+Traces are sampled once they finish: slow and failed ones are always kept,
+others at TRACE_SAMPLE_RATE. Kept spans go to a bounded ring buffer that the
+export_traces service writes to a JSONL file. Spans of tasks that outlive the
+turn, such as cancelled hedge losers, go there directly when they end, if their
+trace was kept or they failed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import json
+import random
+import time
+from typing import Any
+import uuid
+
+from .const import TRACE_BUFFER_SIZE, TRACE_SAMPLE_RATE, TRACE_SLOW_SECONDS
+
+
+@dataclass(slots=True)
+class _Trace:
+    """Finished spans of a trace, shared by all its spans until it is sampled."""
+
+    spans: list[Span] = field(default_factory=list)
+    # Set once the root span has ended and the trace was sampled
+    finished: bool = False
+    kept: bool = False
+
+
+@dataclass(slots=True)
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    conversation_id: str | None
+    # Wall clock start, seconds since the epoch
+    start: float
+    duration: float | None = None
+    status: str = "ok"
+    attributes: dict[str, Any] = field(default_factory=dict)
+    trace: _Trace = field(default_factory=_Trace, repr=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute of the span."""
+        self.attributes[key] = value
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the span as a JSON-serializable dict."""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "conversation_id": self.conversation_id,
+            "start": self.start,
+            "duration_ms": (
+                None if self.duration is None else round(self.duration * 1000, 2)
+            ),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar(
+    "yanfeng_ai_task_current_span", default=None
+)
+
+
+class Tracer:
+    """Creates spans and keeps the sampled ones in a ring buffer."""
+
+    def __init__(
+        self,
+        sample_rate: float = TRACE_SAMPLE_RATE,
+        max_spans: int = TRACE_BUFFER_SIZE,
+        slow_seconds: float = TRACE_SLOW_SECONDS,
+    ) -> None:
+        """Initialize the tracer."""
+        self._sample_rate = sample_rate
+        self._slow_seconds = slow_seconds
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+
+    @contextmanager
+    def span(
+        self, name: str, conversation_id: str | None = None, **attributes: Any
+    ) -> Iterator[Span]:
+        """Time the body of a with block as a span of the current trace.
+
+        Without a current span, a new trace is started. Exceptions mark the
+        span as failed and are re-raised.
+        """
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            conversation_id=conversation_id
+            or (parent.conversation_id if parent else None),
+            start=time.time(),
+            attributes=attributes,
+            trace=parent.trace if parent else _Trace(),
+        )
+        token = _current_span.set(span)
+        start = time.monotonic()
+        try:
+            yield span
+        except asyncio.CancelledError:
+            span.status = "cancelled"
+            raise
+        except Exception as err:
+            span.status = "error"
+            span.attributes["error"] = f"{type(err).__name__}: {err}"
+            raise
+        finally:
+            span.duration = time.monotonic() - start
+            _current_span.reset(token)
+            self._end_span(span)
+            if parent is None:
+                self._finish_trace(span)
+
+    def add_span(self, name: str, start: float, **attributes: Any) -> None:
+        """Record a finished child span that started at time.monotonic() start."""
+        if (parent := _current_span.get()) is None:
+            return
+        duration = time.monotonic() - start
+        self._end_span(
+            Span(
+                name=name,
+                trace_id=parent.trace_id,
+                span_id=uuid.uuid4().hex[:16],
+                parent_id=parent.span_id,
+                conversation_id=parent.conversation_id,
+                start=time.time() - duration,
+                duration=duration,
+                attributes=attributes,
+                trace=parent.trace,
+            )
+        )
+
+    def _end_span(self, span: Span) -> None:
+        """Add an ended span to its trace, or to the buffer if the trace is done."""
+        trace = span.trace
+        if not trace.finished:
+            trace.spans.append(span)
+        elif trace.kept or span.status != "ok":
+            # Ended after the turn, e.g. a hedge loser cancelled on the way out
+            self._spans.append(span)
+
+    def _finish_trace(self, root: Span) -> None:
+        """Keep the spans of a finished trace if it is sampled."""
+        trace = root.trace
+        keep = (
+            root.duration is not None and root.duration >= self._slow_seconds
+        ) or any(span.status != "ok" for span in trace.spans)
+        trace.kept = keep or random.random() < self._sample_rate
+        if trace.kept:
+            self._spans.extend(sorted(trace.spans, key=lambda span: span.start))
+        trace.finished = True
+        trace.spans.clear()
+
+    def spans(self) -> list[dict[str, Any]]:
+        """Return the buffered spans, oldest first."""
+        return [span.as_dict() for span in self._spans]
+
+
+def export_spans_jsonl(spans: list[dict[str, Any]], path: str) -> int:
+    """Append spans to a JSONL file, one span per line. Blocking."""
+    with open(path, "a", encoding="utf-8") as file:
+        for span in spans:
+            file.write(json.dumps(span, ensure_ascii=False) + "\n")
+    return len(spans)
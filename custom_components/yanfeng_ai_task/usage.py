@@ -0,0 +1,138 @@
+"""Token usage accounting for the Yanfeng AI Task integration.
+
+Counts requests and the prompt and completion tokens from the usage block of
+each chat response, per subentry and model, with the time spent waiting for
+responses so that throughput (completion tokens per second) can be compared
+between models. Totals are stored across restarts.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, USAGE_SAVE_DELAY, USAGE_STORAGE_VERSION
+
+
+@dataclass(slots=True)
+class UsageCounter:
+    """Usage totals of one model in one subentry."""
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    # Seconds spent waiting for the responses counted above
+    response_seconds: float = 0.0
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        """Return completion tokens per second of response time."""
+        if not self.response_seconds or not self.completion_tokens:
+            return None
+        return round(self.completion_tokens / self.response_seconds, 1)
+
+    def add(self, other: UsageCounter) -> None:
+        """Add the totals of another counter."""
+        self.requests += other.requests
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+        self.response_seconds += other.response_seconds
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the totals and throughput."""
+        return {
+            **asdict(self),
+            "response_seconds": round(self.response_seconds, 3),
+            "tokens_per_second": self.tokens_per_second,
+        }
+
+
+class TokenUsageTracker:
+    """Usage counters of a config entry, keyed by subentry and model."""
+
+    def __init__(self, hass: HomeAssistant | None = None, entry_id: str = "") -> None:
+        """Initialize the tracker, stored in .storage if hass is given."""
+        self._counters: dict[str, dict[str, UsageCounter]] = {}
+        self._store: Store[dict[str, Any]] | None = None
+        if hass is not None:
+            self._store = Store(
+                hass, USAGE_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.usage"
+            )
+
+    async def async_load(self) -> None:
+        """Load the stored totals."""
+        if self._store is None or not (data := await self._store.async_load()):
+            return
+        self._counters = {
+            subentry_id: {
+                model: UsageCounter(**counter) for model, counter in models.items()
+            }
+            for subentry_id, models in data.get("counters", {}).items()
+        }
+
+    async def async_save(self) -> None:
+        """Store the totals now, e.g. when the entry is unloaded."""
+        if self._store is not None:
+            await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the totals to store."""
+        return {
+            "counters": {
+                subentry_id: {model: asdict(counter) for model, counter in models.items()}
+                for subentry_id, models in self._counters.items()
+            }
+        }
+
+    def record(
+        self,
+        subentry_id: str,
+        model: str,
+        usage: dict[str, Any] | None,
+        response_seconds: float,
+    ) -> None:
+        """Count a chat response and its token usage."""
+        counter = self._counters.setdefault(subentry_id, {}).setdefault(
+            model, UsageCounter()
+        )
+        usage = usage or {}
+        prompt_tokens = _tokens(usage.get("prompt_tokens"))
+        completion_tokens = _tokens(usage.get("completion_tokens"))
+        counter.requests += 1
+        counter.prompt_tokens += prompt_tokens
+        counter.completion_tokens += completion_tokens
+        counter.total_tokens += (
+            _tokens(usage.get("total_tokens")) or prompt_tokens + completion_tokens
+        )
+        counter.response_seconds += response_seconds
+
+        if self._store is not None:
+            self._store.async_delay_save(self._data_to_save, USAGE_SAVE_DELAY)
+
+    def subentry_total(self, subentry_id: str) -> UsageCounter:
+        """Return the totals of a subentry across its models."""
+        total = UsageCounter()
+        for counter in self._counters.get(subentry_id, {}).values():
+            total.add(counter)
+        return total
+
+    def subentry_models(self, subentry_id: str) -> dict[str, UsageCounter]:
+        """Return the counters of a subentry, keyed by model."""
+        return self._counters.get(subentry_id, {})
+
+    def as_dict(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """Return the totals of all subentries and models."""
+        return {
+            subentry_id: {model: counter.as_dict() for model, counter in models.items()}
+            for subentry_id, models in self._counters.items()
+        }
+
+
+def _tokens(value: Any) -> int:
+    """Return a token count from a usage block, 0 if missing or malformed."""
+    return value if isinstance(value, int) and value > 0 else 0
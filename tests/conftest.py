@@ -0,0 +1,16 @@
+"""Shared setup for the unit tests.
+
+The tests cover the integration's pure logic (parsing, matching, planning)
+and need Home Assistant and the manifest requirements installed, but no
+running instance:
+    pip install homeassistant pypinyin pytest
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+# Import the integration from this checkout, like the benchmarks
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "custom_components"))
@@ -0,0 +1,82 @@
+"""Tests of planning bulk commands ("关闭所有灯")."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import State
+import pytest
+
+from yanfeng_ai_task import conversation
+from yanfeng_ai_task.conversation import extract_bulk_service_info
+from yanfeng_ai_task.executor import EXCLUDED_COVER_DEVICE_CLASSES, cover_bulk_calls
+
+
+@pytest.fixture
+def resolved(monkeypatch: pytest.MonkeyPatch) -> dict[str, Any]:
+    """Record how targets are resolved, return one cover and one light."""
+    calls: dict[str, Any] = {}
+
+    def resolve(hass: Any, domain: str, **kwargs: Any) -> list[State]:
+        calls.update(domain=domain, **kwargs)
+        if domain == "cover":
+            return [State("cover.garage", "closed", {"current_position": 0})]
+        return [State(f"{domain}.kitchen", "on"), State(f"{domain}.bedroom", "off")]
+
+    monkeypatch.setattr(conversation, "find_area", lambda hass, text: None)
+    monkeypatch.setattr(conversation, "async_resolve_targets", resolve)
+    return calls
+
+
+def test_bulk_domain(resolved: dict[str, Any]) -> None:
+    """A domain word targets the whole domain, skipping entities already off."""
+    info = extract_bulk_service_info("关闭所有灯", None)
+    assert resolved["domain"] == "light"
+    assert resolved["device_classes"] is None
+    assert [call.entity_ids for call in info["bulk"]] == [["light.kitchen"]]
+    assert info["speech"] == "已关闭2个灯"
+
+
+def test_bulk_switch_is_not_an_action(resolved: dict[str, Any]) -> None:
+    """开关 names the domain, the action is 关闭."""
+    info = extract_bulk_service_info("关闭所有开关", None)
+    assert resolved["domain"] == "switch"
+    assert info["service"] == "turn_off"
+
+
+def test_bulk_covers_exclude_doors(resolved: dict[str, Any]) -> None:
+    """Doors and gates are left out of "所有窗帘"."""
+    extract_bulk_service_info("打开全部窗帘", None)
+    assert resolved["device_classes"] is None
+    assert resolved["exclude_device_classes"] == EXCLUDED_COVER_DEVICE_CLASSES
+
+
+def test_bulk_device_class(resolved: dict[str, Any]) -> None:
+    """A device class word targets that class only, even an excluded one."""
+    info = extract_bulk_service_info("打开所有车库门", None)
+    assert resolved["domain"] == "cover"
+    assert resolved["device_classes"] == ("garage",)
+    assert resolved["exclude_device_classes"] == ()
+    assert info["speech"] == "已打开1个车库门"
+
+    extract_bulk_service_info("关闭所有百叶窗", None)
+    assert resolved["device_classes"] == ("blind",)
+
+
+def test_bulk_needs_quantifier_and_domain(resolved: dict[str, Any]) -> None:
+    """Commands without a quantifier or a known domain are not bulk."""
+    assert extract_bulk_service_info("关闭客厅灯", None) is None
+    assert extract_bulk_service_info("关闭所有东西", None) is None
+
+
+def test_cover_bulk_calls() -> None:
+    """Covers are grouped by the service they support, closed ones skipped."""
+    states = [
+        State("cover.living_room", "open", {"current_position": 100, "supported_features": 3}),
+        State("cover.blind", "open", {"supported_features": 32}),
+        State("cover.bedroom", "closed", {"current_position": 0}),
+    ]
+    move, tilt = cover_bulk_calls(states, close=True)
+    assert (move.service, move.entity_ids) == ("close_cover", ["cover.living_room"])
+    assert move.fallback_service == "close_cover_tilt"
+    assert (tilt.service, tilt.entity_ids) == ("close_cover_tilt", ["cover.blind"])
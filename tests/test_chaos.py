@@ -0,0 +1,95 @@
+"""Tests of the fault injection profiles, drawn with a fixed seed."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+import voluptuous as vol
+
+from yanfeng_ai_task.chaos import (
+    CHAOS_CHAT,
+    CHAOS_IMAGE,
+    CHAOS_POLL,
+    ChaosInjector,
+    ChaosProfile,
+)
+
+
+def statuses(
+    injector: ChaosInjector, count: int, endpoint: str = CHAOS_CHAT
+) -> list[int | None]:
+    """Return the statuses injected into count requests."""
+
+    async def inject() -> list[int | None]:
+        return [await injector.async_inject(endpoint) for _ in range(count)]
+
+    return asyncio.run(inject())
+
+
+def test_seed_replays_faults() -> None:
+    """The same seed injects the same faults in the same order."""
+    profile = ChaosProfile(seed=42, error_rate=0.3, error_codes=[500, 503])
+    first = statuses(ChaosInjector(profile), 100)
+    assert first == statuses(ChaosInjector(profile), 100)
+    assert set(first) == {500, 503, None}
+    assert first != statuses(ChaosInjector(ChaosProfile(seed=7, error_rate=0.3)), 100)
+
+
+def test_storm_fails_requests_in_a_row() -> None:
+    """A storm fails storm_length requests in a row with storm_status."""
+    injector = ChaosInjector(ChaosProfile(seed=1, storm_rate=1.0, storm_length=3))
+    assert statuses(injector, 4) == [429, 429, 429, 429]
+    assert injector.injected["storms"] == 2
+    assert injector.injected["status_429"] == 4
+
+
+def test_other_endpoints_untouched() -> None:
+    """Only the endpoints of the profile get faults."""
+    injector = ChaosInjector(
+        ChaosProfile(
+            seed=1, endpoints=[CHAOS_IMAGE], error_rate=1.0, malformed_rate=1.0, stuck_task_rate=1.0
+        )
+    )
+    assert statuses(injector, 5) == [None] * 5
+    assert injector.corrupt(CHAOS_CHAT, '{"a": 1}') == '{"a": 1}'
+    assert not injector.is_stuck("task")
+    assert statuses(injector, 1, CHAOS_IMAGE) == [500]
+    assert injector.corrupt(CHAOS_IMAGE, '{"a": 1}') == '{"a"'
+
+
+def test_stuck_task_decided_once() -> None:
+    """A task stays stuck, or not, for every poll."""
+    injector = ChaosInjector(ChaosProfile(seed=3, endpoints=[CHAOS_POLL], stuck_task_rate=0.5))
+    stuck = {task_id: injector.is_stuck(task_id) for task_id in map(str, range(20))}
+    assert True in stuck.values() and False in stuck.values()
+    assert all(injector.is_stuck(task_id) is value for task_id, value in stuck.items())
+    assert injector.injected["stuck_tasks"] == sum(stuck.values())
+
+
+@pytest.mark.parametrize("distribution", ["fixed", "uniform", "normal", "lognormal"])
+def test_latency(distribution: str) -> None:
+    """Latency follows the distribution, is never negative, and replays."""
+    profile = ChaosProfile(
+        seed=5, latency_distribution=distribution, latency_mean=0.5, latency_spread=1.0
+    )
+    draws = [ChaosInjector(profile)._latency() for _ in range(2)]  # noqa: SLF001
+    assert draws[0] == draws[1]
+
+    injector = ChaosInjector(profile)
+    samples = [injector._latency() for _ in range(200)]  # noqa: SLF001
+    assert min(samples) >= 0
+    if distribution == "fixed":
+        assert set(samples) == {0.5}
+    if distribution == "uniform":
+        assert max(samples) <= 1.5
+
+
+def test_profile_validation() -> None:
+    """Malformed profiles are rejected."""
+    assert ChaosProfile.from_dict({"seed": "3", "error_rate": "0.5"}) == ChaosProfile(
+        seed=3, error_rate=0.5
+    )
+    for data in ({"error_rate": 2}, {"endpoints": ["tts"]}, {"error_codes": [200]}, {"x": 1}):
+        with pytest.raises(vol.Invalid):
+            ChaosProfile.from_dict(data)
@@ -0,0 +1,129 @@
+"""Tests of follow-up commands resolved from the conversation context."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+from homeassistant.core import State
+import pytest
+
+from yanfeng_ai_task.context import (
+    ConversationContextStore,
+    TurnContext,
+    context_from_service_calls,
+    extract_ellipsis_service_info,
+    follow_up_clauses,
+)
+from yanfeng_ai_task.entity_index import EntityNameIndex, _build_entry
+
+STATES = {
+    "light.living_room": State("light.living_room", "on", {"friendly_name": "客厅灯"}),
+    "light.bedroom": State("light.bedroom", "off", {"friendly_name": "卧室灯"}),
+    "light.study": State("light.study", "off", {"friendly_name": "书房灯"}),
+    "climate.living_room": State(
+        "climate.living_room", "cool", {"friendly_name": "客厅空调", "temperature": 26}
+    ),
+}
+
+
+@pytest.fixture
+def hass() -> Any:
+    """Return the states the functions read, without Home Assistant."""
+    return SimpleNamespace(states=SimpleNamespace(get=STATES.get))
+
+
+@pytest.fixture
+def index() -> EntityNameIndex:
+    """Return an index of the entity names."""
+    index = EntityNameIndex(None)  # type: ignore[arg-type]
+    for entity_id, state in STATES.items():
+        index._add(entity_id, _build_entry([state.attributes["friendly_name"]]))  # noqa: SLF001
+    return index
+
+
+@pytest.mark.parametrize(
+    ("clause", "entity_ids", "clauses"),
+    [
+        ("把它关掉", ["light.living_room"], ["把客厅灯关掉"]),
+        ("把它们关掉", ["light.living_room", "light.bedroom"], ["把客厅灯关掉", "把卧室灯关掉"]),
+        ("再调高一点", ["climate.living_room"], ["客厅空调再调高一点"]),
+        ("关掉吧", ["light.living_room"], ["客厅灯关掉吧"]),
+        # Names its own target
+        ("关掉卧室灯", ["light.living_room"], []),
+        # The previous entity is gone
+        ("把它关掉", ["light.gone"], []),
+    ],
+)
+def test_follow_up_clauses(
+    hass: Any, clause: str, entity_ids: list[str], clauses: list[str]
+) -> None:
+    """Pronouns and clauses without a target refer to the previous turn."""
+    context = TurnContext(entity_ids, entity_ids[0].split(".")[0], "turn_off")
+    assert follow_up_clauses(clause, context, hass) == clauses
+
+
+@pytest.mark.parametrize("clause", ["还有卧室的", "卧室的也是", "卧室灯呢", "那卧室灯也要"])
+def test_ellipsis(hass: Any, index: EntityNameIndex, clause: str) -> None:
+    """The previous call is repeated on the new target."""
+    context = TurnContext(["light.living_room"], "light", "turn_on", {"brightness_pct": 50})
+    info = extract_ellipsis_service_info(clause, context, hass, index)
+    assert info is not None
+    assert (info["domain"], info["service"]) == ("light", "turn_on")
+    assert info["data"] == {"brightness_pct": 50, "entity_id": "light.bedroom"}
+    assert info["speech"] == "卧室灯也已打开"
+
+
+def test_ellipsis_needs_marker_and_new_target(hass: Any, index: EntityNameIndex) -> None:
+    """No marker, or the entity just controlled, is not an ellipsis."""
+    context = TurnContext(["light.living_room"], "light", "turn_on")
+    assert extract_ellipsis_service_info("卧室灯", context, hass, index) is None
+    assert extract_ellipsis_service_info("客厅灯也是", context, hass, index) is None
+
+
+@pytest.mark.parametrize(
+    "text", ["给他开个玩笑", "让她开心一点", "他开车去公司了吗", "那个开会的时间定了吗", "它"]
+)
+def test_not_follow_ups(hass: Any, index: EntityNameIndex, text: str) -> None:
+    """Pronouns of people, and pronouns left with more than an action, are not follow-ups."""
+    context = TurnContext(["light.living_room"], "light", "turn_off")
+    assert follow_up_clauses(text, context, hass) == []
+    assert extract_ellipsis_service_info(text, context, hass, index) is None
+
+
+def test_context_from_service_calls() -> None:
+    """The context keeps every entity and the last call's data."""
+    context = context_from_service_calls(
+        [
+            {"domain": "light", "service": "turn_on", "data": {"entity_id": "light.bedroom"}},
+            {
+                "domain": "light",
+                "service": "turn_on",
+                "data": {"entity_id": "light.study", "brightness_pct": 30},
+            },
+        ]
+    )
+    assert context is not None
+    assert context.entity_ids == ["light.bedroom", "light.study"]
+    assert context.data == {"brightness_pct": 30}
+    assert context_from_service_calls([{"domain": "light", "service": "x", "data": {}}]) is None
+
+
+def test_context_store_expiry_and_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Contexts expire after the TTL and the oldest is evicted."""
+    now = 1000.0
+    monkeypatch.setattr(
+        "yanfeng_ai_task.context.time", SimpleNamespace(monotonic=lambda: now)
+    )
+    store = ConversationContextStore(ttl=60, max_size=2)
+    for conversation_id in ("a", "b", "c"):
+        store.set(
+            conversation_id, TurnContext(["light.study"], "light", "turn_on", updated=now)
+        )
+
+    assert store.get("a") is None
+    assert store.get("c") is not None
+    assert store.get(None) is None
+
+    now += 61
+    assert store.get("c") is None
@@ -0,0 +1,107 @@
+"""Tests of the entity name index."""
+
+from __future__ import annotations
+
+from yanfeng_ai_task.entity_index import (
+    EntityNameIndex,
+    _build_entry,
+    normalize_text,
+    to_fuzzy_pinyin,
+)
+
+
+def make_index(names: dict[str, list[str]]) -> EntityNameIndex:
+    """Return an index of the given entity names, without Home Assistant."""
+    index = EntityNameIndex(None)  # type: ignore[arg-type]
+    for entity_id, entity_names in names.items():
+        index._add(entity_id, _build_entry(entity_names))  # noqa: SLF001
+    return index
+
+
+def test_normalize_text() -> None:
+    """Traditional characters and punctuation are normalized away."""
+    assert normalize_text("客廳 燈！") == "客厅灯"
+    assert normalize_text("Living Room") == "livingroom"
+
+
+def test_fuzzy_pinyin_homophones() -> None:
+    """STT homophones and fuzzy initials get the same key."""
+    assert to_fuzzy_pinyin("客厅灯") == to_fuzzy_pinyin("客厅等")
+    assert to_fuzzy_pinyin("窗帘") == to_fuzzy_pinyin("窗连")
+    # zh/z, n/l and in/ing are merged
+    assert to_fuzzy_pinyin("支") == to_fuzzy_pinyin("资")
+    assert to_fuzzy_pinyin("南") == to_fuzzy_pinyin("兰")
+
+
+def test_match_homophone() -> None:
+    """A homophone of a name matches that entity, only in its domain."""
+    index = make_index(
+        {
+            "light.living_room": ["客厅灯"],
+            "light.bedroom": ["卧室灯"],
+            "cover.living_room": ["客厅窗帘"],
+        }
+    )
+    assert index.match("light", "打开客厅等") == "light.living_room"
+    assert index.match("cover", "打开客厅窗连") == "cover.living_room"
+    assert index.match("switch", "打开客厅等") is None
+
+
+def test_match_ambiguous() -> None:
+    """A partial name shared by several entities does not match."""
+    index = make_index(
+        {"light.living_room": ["客厅主灯"], "light.living_room_strip": ["客厅灯带"]}
+    )
+    assert index.match("light", "客厅") is None
+
+
+def test_match_alias() -> None:
+    """Aliases are indexed like names."""
+    index = make_index({"light.desk": ["书房台灯", "阅读灯"]})
+    assert index.match("light", "打开月读灯") == "light.desk"
+
+
+def test_rank_prefers_full_name() -> None:
+    """The entity whose whole name is in the text ranks first."""
+    index = make_index(
+        {
+            "light.living_room": ["客厅灯"],
+            "light.living_room_strip": ["客厅灯带"],
+            "light.bedroom": ["卧室灯"],
+        }
+    )
+    ranked = index.rank("light", "打开客厅灯带")
+    assert ranked[0].entity_id == "light.living_room_strip"
+    assert index.resolve("light", "打开客厅灯带").entity_id == "light.living_room_strip"
+    assert index.resolve("light", "打开卧室灯").entity_id == "light.bedroom"
+
+
+def test_rank_ties_by_entity_id() -> None:
+    """Equal scores are ordered by entity_id, not insertion order."""
+    index = make_index({"light.b": ["灯"], "light.a": ["灯"]})
+    assert [match.entity_id for match in index.rank("light", "灯")] == [
+        "light.a",
+        "light.b",
+    ]
+
+
+def test_resolve_ambiguous_and_weak() -> None:
+    """Close runner-ups and weak matches defer to the LLM."""
+    index = make_index({"light.a": ["客厅主灯"], "light.b": ["客厅副灯"]})
+    assert index.resolve("light", "客厅灯") is None
+    assert index.resolve("light", "厨房") is None
+    assert index.resolve("switch", "客厅主灯") is None
+
+
+def test_resolve_sole_candidate() -> None:
+    """A lone candidate of the domain needs less evidence."""
+    index = make_index({"climate.living_room": ["客厅空调"]})
+    assert index.resolve("climate", "空调").entity_id == "climate.living_room"
+
+
+def test_remove_entity() -> None:
+    """Removed entities no longer rank."""
+    index = make_index({"light.a": ["客厅灯"], "light.b": ["卧室灯"]})
+    index._remove("light.a")  # noqa: SLF001
+    assert "light.a" not in {match.entity_id for match in index.rank("light", "客厅灯")}
+    assert len(index) == 1
@@ -0,0 +1,35 @@
+"""Tests of the utterance hashes kept by the flight recorder."""
+
+from __future__ import annotations
+
+import hashlib
+
+from yanfeng_ai_task.flight_recorder import FlightRecorder, hash_utterance
+
+KEY = bytes(32)
+
+
+def test_hash_is_keyed() -> None:
+    """Repeats hash alike under one key, but not as a plain hash would."""
+    assert hash_utterance("打开客厅灯", KEY) == hash_utterance(" 打开客厅灯 ", KEY)
+    assert hash_utterance("打开客厅灯", KEY) != hash_utterance("打开客厅灯", b"other")
+    assert hash_utterance("打开客厅灯", KEY) != (
+        hashlib.sha256("打开客厅灯".encode()).hexdigest()[:16]
+    )
+
+
+def test_recorded_turns() -> None:
+    """Text is kept only when allowed, a hash only with a key."""
+    recorder = FlightRecorder(hash_key=KEY)
+    with recorder.turn("conversation", None, "打开客厅灯") as turn:
+        pass
+    assert turn.utterance_hash == hash_utterance("打开客厅灯", KEY)
+    assert turn.utterance is None
+
+    with FlightRecorder().turn("conversation", None, "打开客厅灯") as turn:
+        pass
+    assert turn.utterance_hash is None
+
+    with FlightRecorder(record_text=True).turn("conversation", None, "打开客厅灯") as turn:
+        pass
+    assert turn.utterance == "打开客厅灯"
@@ -0,0 +1,235 @@
+"""Tests of chat model health tracking and hedged requests."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+
+from yanfeng_ai_task import _local_servers
+from yanfeng_ai_task.const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN_SECONDS,
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_MIN_SAMPLES,
+)
+from yanfeng_ai_task.helpers import (
+    ChatProvider,
+    FailoverClient,
+    ModelHealth,
+    async_hedged_chat,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """Replace the monotonic clock of the helpers with one the test moves."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        "yanfeng_ai_task.helpers.time", SimpleNamespace(monotonic=lambda: clock.now)
+    )
+    return clock
+
+
+def test_circuit_opens_and_recovers(clock: SimpleNamespace) -> None:
+    """Repeated failures open the circuit until the period is over."""
+    health = ModelHealth()
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        health.record_failure("modelscope", "qwen")
+    assert not health.is_degraded("modelscope", "qwen")
+
+    health.record_failure("modelscope", "qwen")
+    assert health.is_degraded("modelscope", "qwen")
+    assert not health.is_degraded("modelscope", "other")
+    # A local server sent the same model id is tracked apart
+    assert not health.is_degraded("http://192.168.1.10:8080/v1", "qwen")
+
+    clock.now += CIRCUIT_OPEN_SECONDS + 1
+    assert not health.is_degraded("modelscope", "qwen")
+
+    # The trial request fails: open again right away
+    health.record_failure("modelscope", "qwen")
+    assert health.is_degraded("modelscope", "qwen")
+
+    health.record_success("modelscope", "qwen", 1.0)
+    assert not health.is_degraded("modelscope", "qwen")
+    assert health.as_dict()["modelscope"]["qwen"]["consecutive_failures"] == 0
+
+
+def test_hedge_delay_is_rolling_p95() -> None:
+    """The hedge delay needs enough samples, then follows the p95."""
+    health = ModelHealth()
+    assert health.hedge_delay("modelscope", "qwen") == HEDGE_DEFAULT_DELAY
+
+    for latency in range(1, 21):
+        health.record_success("modelscope", "qwen", float(latency))
+    assert health.hedge_delay("modelscope", "qwen") == 20.0
+
+
+def sender(
+    delays: dict[str, float], failing: tuple[str, ...] = ()
+) -> tuple[list[str], Any]:
+    """Return the models requested and a send function answering after delays."""
+    sent: list[str] = []
+
+    async def send(model: str) -> dict[str, Any]:
+        sent.append(model)
+        await asyncio.sleep(delays.get(model, 0))
+        if model in failing:
+            raise HomeAssistantError(f"{model} failed")
+        return {"model": model}
+
+    return sent, send
+
+
+def hedging_health() -> ModelHealth:
+    """Return health with a short hedge delay for the primary model."""
+    health = ModelHealth()
+    for _ in range(HEDGE_MIN_SAMPLES):
+        health.record_success("modelscope", "primary", 0.01)
+    return health
+
+
+def test_hedge_slow_primary() -> None:
+    """A primary slower than its p95 is hedged, and counted as a stall."""
+    health = hedging_health()
+    sent, send = sender({"primary": 1.0})
+    result = asyncio.run(async_hedged_chat(health, "modelscope", "primary", "fallback", send))
+    assert result == {"model": "fallback"}
+    assert sent == ["primary", "fallback"]
+    assert health.as_dict()["modelscope"]["primary"]["consecutive_failures"] == 1
+
+
+def test_failed_primary_retries_fallback() -> None:
+    """A primary that fails outright is retried on the fallback."""
+    health = hedging_health()
+    sent, send = sender({}, failing=("primary",))
+    result = asyncio.run(async_hedged_chat(health, "modelscope", "primary", "fallback", send))
+    assert result == {"model": "fallback"}
+    assert health.as_dict()["modelscope"]["primary"]["consecutive_failures"] == 1
+
+
+def test_degraded_primary_is_skipped() -> None:
+    """An open circuit sends the request to the fallback only."""
+    health = hedging_health()
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        health.record_failure("modelscope", "primary")
+    sent, send = sender({})
+    asyncio.run(async_hedged_chat(health, "modelscope", "primary", "fallback", send))
+    assert sent == ["fallback"]
+
+
+def test_both_fail_raises_primary_error() -> None:
+    """The primary's error is raised when both models fail."""
+    sent, send = sender({}, failing=("primary", "fallback"))
+    with pytest.raises(HomeAssistantError, match="primary failed"):
+        asyncio.run(async_hedged_chat(hedging_health(), "modelscope", "primary", "fallback", send))
+
+
+def test_timeout_is_a_failure() -> None:
+    """A request exceeding the per-request timeout counts as a failure."""
+    health = ModelHealth()
+    sent, send = sender({"qwen": 1.0})
+    with pytest.raises(TimeoutError):
+        asyncio.run(async_hedged_chat(health, "local", "qwen", None, send, timeout=0.01))
+    assert health.as_dict()["local"]["qwen"]["consecutive_failures"] == 1
+
+
+def cancel_after(health: ModelHealth, delay: float) -> None:
+    """Cancel a request to a stalled model after delay seconds."""
+    _, send = sender({"qwen": 1.0})
+
+    async def cancel() -> None:
+        task = asyncio.create_task(async_hedged_chat(health, "local", "qwen", None, send))
+        await asyncio.sleep(delay)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+
+
+def test_deadline_cancel_is_a_failure() -> None:
+    """A request cancelled after the model's p95 counts as a stall."""
+    health = ModelHealth()
+    for _ in range(HEDGE_MIN_SAMPLES):
+        health.record_success("local", "qwen", 0.01)
+
+    cancel_after(health, 0.1)
+    assert health.as_dict()["local"]["qwen"]["consecutive_failures"] == 1
+
+
+def test_quick_cancel_is_not_a_failure() -> None:
+    """A request cancelled early, e.g. a speculative one, counts as nothing."""
+    health = ModelHealth()
+    cancel_after(health, 0.01)
+    assert health.as_dict() == {}
+
+
+def test_hedge_loser_is_not_a_failure() -> None:
+    """The fallback cancelled because the primary answered first is not failed."""
+    health = hedging_health()
+    sent, send = sender({"primary": 0.1, "fallback": 1.0})
+    result = asyncio.run(async_hedged_chat(health, "modelscope", "primary", "fallback", send))
+    assert result == {"model": "primary"}
+    assert sent == ["primary", "fallback"]
+    assert "fallback" not in health.as_dict()["modelscope"]
+
+
+class FakeProvider(ChatProvider):
+    """A provider answering after a delay."""
+
+    def __init__(self, name: str, delay: float, health: ModelHealth) -> None:
+        """Initialize the provider."""
+        self.name = name
+        self.delay = delay
+        self.health = health
+
+    async def generate_text(
+        self, model: str, messages: list[dict[str, Any]], **kwargs: Any
+    ) -> dict[str, Any]:
+        """Answer with the provider's name."""
+        _, send = sender({model: self.delay})
+        await async_hedged_chat(
+            self.health, self.name, model, None, send, kwargs.get("timeout")
+        )
+        return {"provider": self.name}
+
+
+def test_failover_on_attempt_timeout() -> None:
+    """A stalled primary fails over within the turn and opens its circuit."""
+    health = ModelHealth()
+    client = FailoverClient(
+        FakeProvider("local", 1.0, health),
+        FakeProvider("modelscope", 0, health),
+        attempt_timeout=0.01,
+    )
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        assert asyncio.run(client.generate_text("qwen", [])) == {"provider": "modelscope"}
+
+    assert health.is_degraded("local", "qwen")
+    assert not health.is_degraded("modelscope", "qwen")
+
+
+def test_setup_tests_configured_providers() -> None:
+    """Local servers are grouped by the role the subentries give them."""
+    def subentry(**data: Any) -> SimpleNamespace:
+        """Return a subentry with data."""
+        return SimpleNamespace(data=data)
+
+    entry = SimpleNamespace(
+        subentries={
+            "a": subentry(chat_provider="local_primary", local_base_url="http://a/v1"),
+            "b": subentry(
+                chat_provider="local_failover", local_base_url="http://b/v1", local_api_key="k"
+            ),
+            "c": subentry(chat_provider="local_primary", local_base_url="http://a/v1"),
+            "d": subentry(chat_provider="modelscope", local_base_url="http://d/v1"),
+            "e": subentry(chat_provider="local_failover", local_base_url=" "),
+            "f": subentry(),
+        }
+    )
+    assert _local_servers(entry) == ([("http://a/v1", None)], [("http://b/v1", "k")])
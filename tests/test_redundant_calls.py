@@ -0,0 +1,93 @@
+"""Tests of skipping service calls that would not change anything."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import State
+import pytest
+
+from yanfeng_ai_task.executor import is_redundant_call, plan_climate_calls
+
+
+@pytest.mark.parametrize(
+    ("state", "service", "data", "redundant"),
+    [
+        (State("light.a", "on"), "turn_on", None, True),
+        (State("light.a", "off"), "turn_on", None, False),
+        (State("light.a", "unavailable"), "turn_off", None, False),
+        (State("cover.a", "closing"), "close_cover", None, True),
+        (State("cover.a", "open"), "close_cover", None, False),
+        (State("climate.a", "heat"), "turn_on", None, True),
+        (State("climate.a", "off"), "turn_on", None, False),
+        (State("media_player.a", "paused"), "media_pause", None, True),
+        # Unknown services always run
+        (State("light.a", "on"), "toggle", None, False),
+        (None, "turn_on", None, False),
+    ],
+)
+def test_on_off(
+    state: State | None, service: str, data: dict[str, Any] | None, redundant: bool
+) -> None:
+    """Plain calls compare the state."""
+    assert is_redundant_call(state, service, data) is redundant
+
+
+@pytest.mark.parametrize(
+    ("state", "service", "data", "redundant"),
+    [
+        # brightness 128 is 50%
+        (State("light.a", "on", {"brightness": 128}), "turn_on", {"brightness_pct": 50}, True),
+        (State("light.a", "on", {"brightness": 128}), "turn_on", {"brightness_pct": 60}, False),
+        (State("light.a", "off", {}), "turn_on", {"brightness_pct": 50}, False),
+        # Data that cannot be compared always runs
+        (State("light.a", "on", {"brightness": 128}), "turn_on", {"brightness_step_pct": 10}, False),
+        (State("light.a", "on", {}), "turn_on", {"color_name": "red"}, False),
+        (State("climate.a", "cool", {"temperature": 26}), "set_temperature", {"temperature": 26}, True),
+        (State("climate.a", "off", {"temperature": 26}), "set_temperature", {"temperature": 26}, False),
+        (
+            State("climate.a", "cool", {"temperature": 26}),
+            "set_temperature",
+            {"temperature": 26, "hvac_mode": "heat"},
+            False,
+        ),
+        (State("cover.a", "open", {"current_position": 50}), "set_cover_position", {"position": 50}, True),
+        (State("media_player.a", "on", {"volume_level": 0.4}), "volume_set", {"volume_level": 0.4}, True),
+        (State("fan.a", "on", {"percentage": 33}), "set_percentage", {"percentage": 66}, False),
+    ],
+)
+def test_with_data(
+    state: State, service: str, data: dict[str, Any], redundant: bool
+) -> None:
+    """Calls with data compare the attributes they set."""
+    data = {"entity_id": state.entity_id, **data}
+    assert is_redundant_call(state, service, data) is redundant
+
+
+def test_plan_climate_calls() -> None:
+    """A mode and a temperature merge into one call, turn_on only when needed."""
+    off = State("climate.a", "off", {"temperature": 24})
+    cool = State("climate.a", "cool", {"temperature": 24})
+
+    assert plan_climate_calls(cool, temperature=24) == []
+    assert [call.service for call in plan_climate_calls(off, temperature=26)] == [
+        "turn_on",
+        "set_temperature",
+    ]
+
+    (call,) = plan_climate_calls(off, temperature=26, hvac_mode="heat")
+    assert call.service == "set_temperature"
+    assert call.data == {"entity_id": "climate.a", "temperature": 26, "hvac_mode": "heat"}
+
+    (call,) = plan_climate_calls(cool, hvac_mode="heat")
+    assert call.service == "set_hvac_mode"
+
+
+def test_plan_climate_turn_on() -> None:
+    """turn_on may fail quietly, unless turning on is the whole action."""
+    off = State("climate.a", "off", {"temperature": 24})
+
+    (call,) = plan_climate_calls(off)
+    assert (call.service, call.optional) == ("turn_on", True)
+    (call,) = plan_climate_calls(off, turn_on_optional=False)
+    assert (call.service, call.optional) == ("turn_on", False)
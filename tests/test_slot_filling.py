@@ -0,0 +1,182 @@
+"""Tests of slot filling for parameterized Layer 1 commands."""
+
+from __future__ import annotations
+
+from homeassistant.core import State
+import pytest
+
+from yanfeng_ai_task.slot_filling import (
+    UNIT_DEGREE,
+    UNIT_LEVEL,
+    UNIT_PERCENT,
+    SlotValueError,
+    build_parameterized_service,
+    extract_numeric_slot,
+    parse_chinese_number,
+    strip_slot_words,
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "value"),
+    [
+        ("26", 26),
+        ("26.5", 26.5),
+        ("二十六", 26),
+        ("十五", 15),
+        ("两", 2),
+        ("一百", 100),
+        ("二十六点五", 26.5),
+        ("灯", None),
+        ("", None),
+    ],
+)
+def test_parse_chinese_number(text: str, value: float | None) -> None:
+    """Arabic and Chinese numerals are parsed."""
+    assert parse_chinese_number(text) == value
+
+
+@pytest.mark.parametrize(
+    ("text", "value", "unit", "direction"),
+    [
+        ("把客厅空调调到26度", 26, UNIT_DEGREE, 0),
+        ("空调温度设置为二十二度", 22, UNIT_DEGREE, 0),
+        ("客厅空调调高两度", 2, UNIT_DEGREE, 1),
+        ("空调降低1度", 1, UNIT_DEGREE, -1),
+        ("客厅空调加两度", 2, UNIT_DEGREE, 1),
+        ("卧室灯亮度调到百分之三十", 30, UNIT_PERCENT, 0),
+        ("客厅灯亮度50%", 50, UNIT_PERCENT, 0),
+        ("窗帘开到一半", 50, UNIT_PERCENT, 0),
+        ("风扇调到三档", 3, UNIT_LEVEL, 0),
+        ("把卧室灯调亮一点", None, None, 1),
+        ("音量小一点", None, None, -1),
+        # Modes are not directions
+        ("空调设为制冷26度", 26, UNIT_DEGREE, 0),
+        ("空调制热26度", 26, UNIT_DEGREE, 0),
+    ],
+)
+def test_extract_numeric_slot(
+    text: str, value: float | None, unit: str | None, direction: int
+) -> None:
+    """Values, units and directions are extracted."""
+    slot = extract_numeric_slot(text)
+    assert slot is not None
+    assert (slot.value, slot.unit, slot.direction) == (value, unit, direction)
+
+
+@pytest.mark.parametrize("text", ["打开二楼灯", "打开客厅灯", "等一下", "调热一点"])
+def test_extract_no_slot(text: str) -> None:
+    """Numbers in names and non-numbers are not slots."""
+    assert extract_numeric_slot(text) is None
+
+
+def test_extract_hvac_mode() -> None:
+    """An HVAC mode named with the temperature is kept."""
+    assert extract_numeric_slot("空调设为制冷26度").hvac_mode == "cool"
+    assert extract_numeric_slot("空调调到26度").hvac_mode is None
+
+
+@pytest.mark.parametrize(
+    ("text", "name"),
+    [
+        ("把客厅空调调到26度", "客厅空调"),
+        ("打开空调到26度", "空调"),
+        ("空调设为制冷26度", "空调"),
+        ("客厅空调加两度", "客厅空调"),
+        ("把卧室灯调亮一点", "卧室灯"),
+        ("窗帘开到一半", "窗帘"),
+        ("风扇调到三档", "风扇"),
+    ],
+)
+def test_strip_slot_words(text: str, name: str) -> None:
+    """Only the entity name is left."""
+    slot = extract_numeric_slot(text)
+    assert strip_slot_words(text, slot).strip() == name
+
+
+def climate(**attributes: object) -> State:
+    """Return a climate state."""
+    return State(
+        "climate.living_room",
+        "cool",
+        {"temperature": 24, "min_temp": 16, "max_temp": 30, **attributes},
+    )
+
+
+def test_climate_absolute_and_relative() -> None:
+    """Targets and relative changes become set_temperature."""
+    service = build_parameterized_service(climate(), extract_numeric_slot("调到26度"))
+    assert service["data"] == {"entity_id": "climate.living_room", "temperature": 26}
+
+    service = build_parameterized_service(climate(), extract_numeric_slot("调高两度"))
+    assert service["data"]["temperature"] == 26
+
+    with pytest.raises(SlotValueError):
+        build_parameterized_service(climate(), extract_numeric_slot("调到40度"))
+
+
+def test_climate_with_mode() -> None:
+    """A mode and a temperature go in one call, only if the unit has the mode."""
+    slot = extract_numeric_slot("空调设为制热26度")
+    service = build_parameterized_service(climate(hvac_modes=["off", "cool", "heat"]), slot)
+    assert service["data"] == {
+        "entity_id": "climate.living_room",
+        "temperature": 26,
+        "hvac_mode": "heat",
+    }
+
+    with pytest.raises(SlotValueError):
+        build_parameterized_service(climate(hvac_modes=["off", "cool"]), slot)
+
+
+def test_light_brightness() -> None:
+    """Brightness targets and steps become light.turn_on."""
+    light = State("light.bedroom", "on", {"brightness": 255})
+    service = build_parameterized_service(light, extract_numeric_slot("亮度调到50%"))
+    assert service["data"] == {"entity_id": "light.bedroom", "brightness_pct": 50}
+
+    service = build_parameterized_service(light, extract_numeric_slot("调暗一点"))
+    assert service["data"] == {"entity_id": "light.bedroom", "brightness_step_pct": -10}
+
+    assert build_parameterized_service(light, extract_numeric_slot("调到26度")) is None
+    assert build_parameterized_service(light, extract_numeric_slot("调到三档")) is None
+
+
+def test_fan_levels() -> None:
+    """Levels map through percentage_step, never to a raw percentage."""
+    fan = State("fan.bedroom", "on", {"percentage_step": 100 / 3, "percentage": 33})
+    service = build_parameterized_service(fan, extract_numeric_slot("风扇调到二档"))
+    assert service["data"] == {"entity_id": "fan.bedroom", "percentage": 66}
+
+    service = build_parameterized_service(fan, extract_numeric_slot("风扇调到三档"))
+    assert service["data"]["percentage"] == 100
+
+    service = build_parameterized_service(fan, extract_numeric_slot("风扇调高一档"))
+    assert service["service"] == "increase_speed"
+    assert service["data"] == {"entity_id": "fan.bedroom"}
+
+    with pytest.raises(SlotValueError):
+        build_parameterized_service(fan, extract_numeric_slot("风扇调到五档"))
+
+    # No speed count known, a level cannot be converted
+    with pytest.raises(SlotValueError):
+        build_parameterized_service(
+            State("fan.desk", "on", {}), extract_numeric_slot("风扇调到三档")
+        )
+
+
+def test_cover_and_volume() -> None:
+    """Covers need a position, volume is scaled to 0-1."""
+    cover = State("cover.living_room", "closed", {"current_position": 0})
+    service = build_parameterized_service(cover, extract_numeric_slot("窗帘开到一半"))
+    assert service["data"] == {"entity_id": "cover.living_room", "position": 50}
+    assert (
+        build_parameterized_service(
+            State("cover.garage", "closed", {}), extract_numeric_slot("开到一半")
+        )
+        is None
+    )
+
+    speaker = State("media_player.living_room", "playing", {"volume_level": 0.3})
+    service = build_parameterized_service(speaker, extract_numeric_slot("音量调到40"))
+    assert service["data"]["volume_level"] == 0.4
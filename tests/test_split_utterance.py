@@ -0,0 +1,57 @@
+"""Tests of splitting multi-command utterances into clauses."""
+
+from __future__ import annotations
+
+import pytest
+
+from yanfeng_ai_task.conversation import split_utterance
+
+
+@pytest.mark.parametrize(
+    ("text", "clauses"),
+    [
+        ("打开客厅灯", ["打开客厅灯"]),
+        ("打开开关", ["打开开关"]),
+        ("关掉客厅灯和卧室空调", ["关掉客厅灯", "关掉卧室空调"]),
+        ("打开客厅灯跟卧室灯", ["打开客厅灯", "打开卧室灯"]),
+        ("关闭卧室灯然后打开客厅窗帘", ["关闭卧室灯", "打开客厅窗帘"]),
+        ("打开书房台灯，关闭厨房灯", ["打开书房台灯", "关闭厨房灯"]),
+    ],
+)
+def test_split_commands(text: str, clauses: list[str]) -> None:
+    """Each command is a clause, missing actions are borrowed."""
+    assert split_utterance(text) == clauses
+
+
+@pytest.mark.parametrize(
+    ("text", "clauses"),
+    [
+        ("把客厅和餐厅的灯打开", ["把客厅的灯打开", "餐厅的灯打开"]),
+        (
+            "把客厅、餐厅和卧室的灯打开",
+            ["把客厅的灯打开", "餐厅的灯打开", "卧室的灯打开"],
+        ),
+    ],
+)
+def test_split_shared_head(text: str, clauses: list[str]) -> None:
+    """Modifiers joined by 和 share the head noun and its predicate."""
+    assert split_utterance(text) == clauses
+
+
+def test_switch_is_a_noun() -> None:
+    """开关 names a switch, its 开 is not an action."""
+    assert split_utterance("关闭灯和开关") == ["关闭灯", "关闭开关"]
+
+
+@pytest.mark.parametrize(
+    ("text", "clauses"),
+    [
+        ("客厅灯和卧室灯调到50%", ["客厅灯调到50%", "卧室灯调到50%"]),
+        ("客厅灯和餐厅的灯调到50%", ["客厅灯调到50%", "餐厅的灯调到50%"]),
+        ("客厅灯和卧室灯亮度调到50%", ["客厅灯亮度调到50%", "卧室灯亮度调到50%"]),
+        ("客厅窗帘和卧室窗帘开到一半", ["客厅窗帘开到一半", "卧室窗帘开到一半"]),
+    ],
+)
+def test_split_borrows_slot(text: str, clauses: list[str]) -> None:
+    """A value is borrowed with its predicate only, not the other name."""
+    assert split_utterance(text) == clauses
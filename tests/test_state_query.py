@@ -0,0 +1,96 @@
+"""Tests of read-only state questions."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from homeassistant.core import State
+import pytest
+
+from yanfeng_ai_task.state_query import (
+    answer_state_query,
+    is_state_query,
+    render_state,
+    state_domain_hints,
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "domains"),
+    [
+        ("门锁了吗", ["lock", "binary_sensor"]),
+        ("大门锁了吗", ["lock", "binary_sensor"]),
+        ("卧室窗帘关着吗", ["cover", "binary_sensor"]),
+        ("车库门开着吗", ["cover", "binary_sensor"]),
+        ("后门开着吗", ["binary_sensor"]),
+        ("插座开着吗", ["switch"]),
+        ("客厅灯开着吗", ["light"]),
+        ("现在几点了", []),
+    ],
+)
+def test_state_domain_hints(text: str, domains: list[str]) -> None:
+    """The most specific hint decides the domain tried first."""
+    assert state_domain_hints(text) == domains
+
+
+@pytest.mark.parametrize(
+    ("text", "query"),
+    [
+        ("客厅灯开着吗", True),
+        ("客厅温度多少", True),
+        ("空调是什么模式", True),
+        ("打开客厅灯", False),
+        # How-to and why questions are for the LLM
+        ("锁坏了怎么办", False),
+        ("电视为什么没声音", False),
+        ("空调怎么用才省电", False),
+        ("如何设置定时", False),
+    ],
+)
+def test_is_state_query(text: str, query: bool) -> None:
+    """Questions are state queries, commands are not."""
+    assert is_state_query(text) is query
+
+
+@pytest.mark.parametrize(
+    ("text", "answer"),
+    [("门锁了吗", "大门锁已上锁"), ("锁的状态", "大门锁已上锁"), ("锁坏了吗", None)],
+)
+def test_lone_entity_needs_state_phrase(text: str, answer: str | None) -> None:
+    """The only entity of the hinted domain answers questions about its state only."""
+    lock = State("lock.front_door", "locked", {"friendly_name": "大门锁"})
+    hass = SimpleNamespace(
+        states=SimpleNamespace(
+            get=lambda entity_id: None,
+            async_all=lambda domain: [lock] if domain == "lock" else [],
+        )
+    )
+    assert answer_state_query(text, hass) == answer  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize(
+    ("state", "text"),
+    [
+        (State("lock.front_door", "locked", {"friendly_name": "大门"}), "大门已上锁"),
+        (
+            State("binary_sensor.door", "on", {"friendly_name": "后门", "device_class": "door"}),
+            "后门开着",
+        ),
+        (
+            State("cover.bedroom", "open", {"friendly_name": "卧室窗帘", "current_position": 30}),
+            "卧室窗帘开着，开了30%",
+        ),
+        (
+            State(
+                "climate.living_room",
+                "cool",
+                {"friendly_name": "客厅空调", "temperature": 24, "current_temperature": 27},
+            ),
+            "客厅空调开着，制冷模式，设定温度24度，当前27度",
+        ),
+        (State("light.kitchen", "unavailable", {"friendly_name": "厨房灯"}), "厨房灯当前不可用"),
+    ],
+)
+def test_render_state(state: State, text: str) -> None:
+    """States are rendered as short sentences."""
+    assert render_state(state) == text
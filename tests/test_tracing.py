@@ -0,0 +1,49 @@
+"""Tests of trace sampling, spans ending after their turn included."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from yanfeng_ai_task.tracing import Tracer
+
+
+def run_turn(tracer: Tracer, child_delay: float) -> None:
+    """Run a turn whose hedged request outlives it and is then cancelled."""
+
+    async def hedged() -> None:
+        with tracer.span("llm_request"):
+            await asyncio.sleep(child_delay)
+
+    async def turn() -> None:
+        with tracer.span("turn", conversation_id="c1"):
+            task = asyncio.create_task(hedged())
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(turn())
+
+
+@pytest.mark.parametrize(
+    ("sample_rate", "child_delay", "names"),
+    [
+        # A kept trace gets the late span whatever its status
+        (1.0, 0, ["turn", "llm_request"]),
+        (1.0, 1, ["turn", "llm_request"]),
+        # A sampled out trace only gets a late span that failed
+        (0.0, 0, []),
+        (0.0, 1, ["llm_request"]),
+    ],
+)
+def test_late_spans(sample_rate: float, child_delay: float, names: list[str]) -> None:
+    """Spans ending after the root are not lost."""
+    tracer = Tracer(sample_rate=sample_rate, slow_seconds=60)
+    run_turn(tracer, child_delay)
+    spans = tracer.spans()
+    assert [span["name"] for span in spans] == names
+    assert len({span["trace_id"] for span in spans}) <= 1
+    if child_delay and names:
+        assert spans[-1]["status"] == "cancelled"
@@ -0,0 +1,30 @@
+"""Tests of which optimistically acknowledged calls can be verified."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from yanfeng_ai_task.executor import PlannedCall, is_comparable_call
+
+
+@pytest.mark.parametrize(
+    ("domain", "service", "data", "comparable"),
+    [
+        ("light", "turn_on", {}, True),
+        ("light", "turn_on", {"brightness_pct": 50}, True),
+        ("light", "turn_on", {"brightness_step_pct": 10}, False),
+        ("light", "turn_on", {"brightness_pct": 50, "color_name": "red"}, False),
+        ("light", "turn_on", {"rgb_color": [255, 0, 0]}, False),
+        ("climate", "set_temperature", {"temperature": 26, "hvac_mode": "heat"}, True),
+        ("cover", "set_cover_position", {"position": 50}, True),
+        ("fan", "increase_speed", {}, False),
+    ],
+)
+def test_is_comparable_call(
+    domain: str, service: str, data: dict[str, Any], comparable: bool
+) -> None:
+    """Only data the state shows is compared, the rest waits for any change."""
+    call = PlannedCall(domain, service, {"entity_id": f"{domain}.a", **data})
+    assert is_comparable_call(call) is comparable